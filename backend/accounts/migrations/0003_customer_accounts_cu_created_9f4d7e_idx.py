@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customer'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['created_at', 'id'], name='accounts_cu_created_9f4d7e_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# GIN trigram indexes behind core.search's word-similarity and prefix
+# matching. PostgreSQL only: other backends search an in-process index.
+INDEXES = {
+    'accounts_customer_first_name_trgm': 'first_name',
+    'accounts_customer_last_name_trgm': 'last_name',
+    'accounts_customer_phone_number_trgm': 'phone_number',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, column in INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON accounts_customer USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customer_accounts_cu_created_9f4d7e_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
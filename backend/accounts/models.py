@@ -60,6 +60,11 @@ class Customer (models.Model):
     phone_number = models.CharField(max_length=15)
     email = models.EmailField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f'{self.title} {self.first_name} {self.last_name}' if self.first_name else 'Anonymous'
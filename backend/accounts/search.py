@@ -0,0 +1,27 @@
+"""Customer lookup by name or phone number (see core.search)."""
+from core import search
+from .models import Customer
+
+FIELDS = ('first_name', 'last_name', 'phone_number')
+
+
+def _documents():
+    for customer_id, *values in Customer.objects.values_list('id', *FIELDS).iterator(chunk_size=5000):
+        yield customer_id, " ".join(values)
+
+
+def matches(query, limit=None):
+    """[(customer_id, relevance)] best first."""
+    if search.in_database():
+        customers = search.database_search(Customer.objects.all(), FIELDS, query)
+        if limit:
+            customers = customers[:limit]
+        return list(customers.values_list('id', 'relevance'))
+    return search.local_index('customer', _documents).search(query, limit)
+
+
+def matching_ids(query):
+    """Every matching customer id, as a subquery where the database can search."""
+    if search.in_database():
+        return search.database_search(Customer.objects.all(), FIELDS, query).values('id')
+    return [customer_id for customer_id, _ in matches(query)]
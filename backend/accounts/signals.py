@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import cache as versioned_cache
+from .models import Customer
+
+
+@receiver([post_save, post_delete], sender=Customer)
+def invalidate_customer_search(sender, instance, **kwargs):
+    versioned_cache.bump('customer')
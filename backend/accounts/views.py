@@ -116,7 +116,7 @@ class MeAPIView(APIView):
 
 
 class UserListCreateAPIView(generics.ListCreateAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('branch')
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
 
@@ -0,0 +1,102 @@
+import hashlib
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from core import cache as versioned_cache
+
+
+class QueryPlanMixin:
+    """
+    Generic views name the relations their serializer reads in
+    ``select_related`` / ``prefetch_related``. The plan is applied in
+    filter_queryset, so it covers list and detail responses whatever
+    get_queryset returns, and a page costs the same number of queries
+    however many rows it holds.
+    """
+    select_related = ()
+    prefetch_related = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+class NotModified(Exception):
+    """Raised from ConditionalGetMixin.initial to answer 304 without running the handler."""
+
+
+class ConditionalGetMixin:
+    """
+    GET responses carry an ETag and a Last-Modified built from the
+    core.cache version counters of ``validator_entities``, read for the
+    branch the response is scoped to; the body is never hashed. A request
+    whose If-None-Match (or, without one, If-Modified-Since) still holds
+    is answered 304 right after authentication, before the handler runs
+    a query or a serializer.
+
+    The branch is the user's own, or for the CEO ``?<branch_query_param>``
+    when the view takes one, else network-wide. Views whose body also
+    depends on something the counters do not see (today's date, say) add
+    it in ``get_validator_parts``; query parameters are always included.
+    """
+    validator_entities = ()
+    branch_query_param = None
+
+    def get_validator_scope(self, request):
+        if request.user.role != 'CEO':
+            return request.user.branch_id
+        branch_id = request.query_params.get(self.branch_query_param) if self.branch_query_param else None
+        return int(branch_id) if branch_id and branch_id.isdigit() else None
+
+    def get_validator_parts(self, request):
+        return ()
+
+    def get_validators(self, request):
+        """(ETag, last modified in epoch seconds) for this request."""
+        scope = self.get_validator_scope(request)
+        versions, modified = versioned_cache.get_validators(self.validator_entities, scope)
+        parts = (
+            type(self).__name__, request.user.role, scope, versions,
+            sorted(request.query_params.lists()), request.accepted_renderer.format,
+            *self.get_validator_parts(request),
+        )
+        return 'W/' + quote_etag(hashlib.md5(repr(parts).encode()).hexdigest()), modified
+
+    def is_not_modified(self, request, etag, modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            # Weak comparison: W/"x" and "x" match
+            tags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+            return '*' in tags or etag.removeprefix('W/') in tags
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        # HTTP dates stop at whole seconds; the ETag, which wins when both are sent, catches changes within one
+        return if_modified_since is not None and int(modified) <= if_modified_since
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method in ('GET', 'HEAD') and self.validator_entities:
+            self.validators = self.get_validators(request)
+            if self.is_not_modified(request, *self.validators):
+                raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'validators', None)
+        if validators and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(int(modified))
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
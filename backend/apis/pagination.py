@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination over a (timestamp, id) ordering.
+
+    Each page is a range scan on the matching index instead of an OFFSET,
+    so deep pages cost the same as the first. Views pick their timestamp
+    column with ``cursor_ordering``; clients may ask for a smaller or
+    larger page with ``?page_size=`` up to ``max_page_size``.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'cursor_ordering', self.ordering)
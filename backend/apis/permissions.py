@@ -17,7 +17,7 @@ class IsCEOOrBranchAdmin(permissions.BasePermission):
             return True
         
         if request.user.role == 'Admin' and request.user.branch:
-            if request.method == ['GET', 'POST']:
+            if request.method in ('GET', 'POST'):
                 return True
         return False
 
@@ -1,13 +1,16 @@
 from sites.models import Site
-from products.models import Product
+from products.models import Product, ProductCode, normalize_code
 from rest_framework import serializers
-from inventory.models import Inventory, StockMovement, StockTransfer, Notification
+from inventory.models import Inventory, ProductStockSummary, StockMovement, StockTransfer, TransferDocument, TransferLine, Notification
 from django.db import transaction
 from sales.models import Sale, SaleItem
+from sales.checkout import checkout_items
+from sales.sync import parse_token as parse_sync_token
+from dashboard.models import DailyBranchSales
 from accounts.models import Customer
-from .utils import invalidate_cache
 from accounts.serializers import UserMeSerializer
 from django.utils.timesince import timesince
+from django.conf import settings
 
 class SiteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,6 +22,22 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'description', 'brand', 'category', 'unit_price', 'created_at', 'manufacturer']
         
+class ProductCodeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductCode
+        fields = ['id', 'code', 'product', 'pack_size', 'label', 'created_at']
+        read_only_fields = ['product']
+        extra_kwargs = {'code': {'validators': []}, 'pack_size': {'min_value': 1}}
+
+    def validate_code(self, code):
+        code = normalize_code(code)
+        if not code:
+            raise serializers.ValidationError("This field may not be blank.")
+        if ProductCode.objects.filter(code=code).exists():
+            raise serializers.ValidationError("This code is already assigned to a product.")
+        return code
+
+
 class InventorySerializer(serializers.ModelSerializer):
     product = ProductSerializer()
 
@@ -26,6 +45,27 @@ class InventorySerializer(serializers.ModelSerializer):
         model = Inventory
         fields = '__all__'
 
+class StockSummarySerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    branches = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductStockSummary
+        fields = [
+            'product', 'product_name', 'total_quantity', 'expiring_soon_quantity', 'expired_quantity',
+            'branches', 'as_of', 'updated_at',
+        ]
+
+    def get_branches(self, obj):
+        # Loaded once and shared by every row of a list
+        if 'site_names' not in self.context:
+            self.context['site_names'] = dict(Site.objects.values_list('id', 'name'))
+        names = self.context['site_names']
+        return [
+            {'branch': int(branch_id), 'branch_name': names.get(int(branch_id)), **stock}
+            for branch_id, stock in sorted(obj.branches.items(), key=lambda item: int(item[0]))
+        ]
+
 class StockMovementSerializer(serializers.ModelSerializer):
     product = ProductSerializer()
 
@@ -34,6 +74,10 @@ class StockMovementSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+# Relations StockTransferSerializer reads; select them with any transfer queryset it serializes
+TRANSFER_RELATED = ('product', 'from_branch', 'to_branch', 'requested_by', 'approved_by', 'processed_by', 'confirmed_by')
+
+
 class StockTransferSerializer(serializers.ModelSerializer):
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     from_branch = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -105,6 +149,24 @@ class StockTransferSerializer(serializers.ModelSerializer):
         }
 
 
+class NotificationListSerializer(serializers.ListSerializer):
+    """
+    Loads every transfer the page's notifications point at in one query and
+    shares them with the child serializer through the context.
+    """
+
+    def to_representation(self, data):
+        notifications = list(data.all() if hasattr(data, 'all') else data)
+        transfer_ids = {
+            notification.related_object_id for notification in notifications
+            if notification.notification_type == 'TRANSFER_REQUEST' and notification.related_object_id
+        }
+        self.context['related_transfers'] = (
+            StockTransfer.objects.select_related(*TRANSFER_RELATED).in_bulk(transfer_ids) if transfer_ids else {}
+        )
+        return super().to_representation(notifications)
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     sender = UserMeSerializer(read_only=True)
     recipient = UserMeSerializer(read_only=True)
@@ -130,19 +192,22 @@ class NotificationSerializer(serializers.ModelSerializer):
             'related_transfer',
         ]
         read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = NotificationListSerializer
 
     def get_time_since(self, obj):
         from django.utils.timesince import timesince
         return timesince(obj.created_at)
 
     def get_related_transfer(self, obj):
-        if obj.notification_type == 'TRANSFER_REQUEST':
-            try:
-                transfer = StockTransfer.objects.get(id=obj.related_object_id)
-                return StockTransferSerializer(transfer, context=self.context).data
-            except StockTransfer.DoesNotExist:
-                return None
-        return None
+        if obj.notification_type != 'TRANSFER_REQUEST':
+            return None
+        transfers = self.context.get('related_transfers')
+        if transfers is None:
+            # Single notification: nothing was bulk-loaded
+            transfer = StockTransfer.objects.select_related(*TRANSFER_RELATED).filter(id=obj.related_object_id).first()
+        else:
+            transfer = transfers.get(obj.related_object_id)
+        return StockTransferSerializer(transfer, context=self.context).data if transfer else None
 
 
 class SaleItemSerializer(serializers.ModelSerializer):
@@ -160,7 +225,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
 
 class SaleSerializer(serializers.ModelSerializer):
     items = SaleItemSerializer(many=True)  # Nested serializer for SaleItem
-    customer_name = serializers.CharField(source='customer.name', read_only=True)
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
 
     class Meta:
         model = Sale
@@ -168,61 +233,88 @@ class SaleSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         items_data = validated_data.pop('items')  # Extract nested items data
-        print("ITEM DESERIALIZATION TYPES:")
-        for i, item in enumerate(items_data):
-            print(f"Item {i}: product={item.get('product')} ({type(item.get('product'))})")
-
-        print("Validated Data:", validated_data)  # Debug log
-        print("Items Data:", items_data)  # Debug log
 
         with transaction.atomic():
             # Create the Sale object
             sale = Sale.objects.create(**validated_data)
 
-            # Create SaleItem objects for each item in items_data
-            for item_data in items_data:
-                print("Processing Item:", item_data)  # Debug log
-                product= item_data.get('product')  # Use .get() to avoid KeyError
-                quantity = item_data.get('quantity')
-                price_at_sale = item_data.get('price_at_sale')
-
-                # Validate that product_id is present
-                if not product:
-                    raise serializers.ValidationError("Product ID is required for each item.")
-                    print("Product ID is required for each item.")  # Debug log
-
-                # Fetch the inventory item
-                inventory_item = Inventory.objects.filter(product=product, branch=sale.branch).first()
-                
-                if not inventory_item or inventory_item.quantity < quantity:
-                    raise serializers.ValidationError(f"Insufficient stock for product {product.name}")
-                
-                # Deduct stock
-                inventory_item.quantity -= quantity
-                inventory_item.save()
-                
-                # Log the stock movement
-                StockMovement.objects.create(
-                    product=product,
-                    branch=sale.branch,
-                    movement_type='REMOVE',
-                    quantity=quantity,
-                    details=f"Sold via {sale.payment_method}"
-                )
-
-                # Create SaleItem
-                SaleItem.objects.create(
-                    sale=sale,
-                    product=product,
-                    quantity=quantity,
-                    price_at_sale=price_at_sale
-                )
-            
-            # Invalidate cache (if applicable)
-            invalidate_cache(user=self.context['request'].user)
+            # Deduct stock and create SaleItem objects in one batch
+            items = checkout_items(sale, items_data)
+            sale._prefetched_objects_cache = {'items': items}
+
+            # Keep the dashboard rollup in step with the sale
+            DailyBranchSales.objects.record_sale(sale)
         
         return sale
 
+class SyncSaleItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+    price_at_sale = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class SyncSaleSerializer(serializers.Serializer):
+    client_id = serializers.UUIDField()
+    payment_method = serializers.ChoiceField(choices=Sale.PAYMENT_METHOD_CHOICES)
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    customer_id = serializers.IntegerField(min_value=1, required=False, allow_null=True, default=None)
+    sold_at = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    items = SyncSaleItemSerializer(many=True, allow_empty=False)
+
+
+class SaleSyncSerializer(serializers.Serializer):
+    branch = serializers.PrimaryKeyRelatedField(queryset=Site.objects.all())
+    sync_token = serializers.CharField(required=False, allow_null=True, default=None)
+    sales = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+
+    def validate_sync_token(self, token):
+        if token is None:
+            return None
+        since = parse_sync_token(token)
+        if since is None:
+            raise serializers.ValidationError("Not a sync token.")
+        return since
+
+    def validate_sales(self, sales):
+        """
+        Each queued sale is checked on its own, so one bad sale comes back
+        as {'client_id', 'errors'} instead of holding back the rest of the
+        upload. Products and customers are loaded with one query each.
+        """
+        if len(sales) > settings.POS_SYNC_MAX_SALES:
+            raise serializers.ValidationError(f"At most {settings.POS_SYNC_MAX_SALES} sales per upload.")
+        checked = []
+        for data in sales:
+            sale = SyncSaleSerializer(data=data)
+            checked.append(sale.validated_data if sale.is_valid() else {'client_id': data.get('client_id'), 'errors': sale.errors})
+
+        valid = [sale for sale in checked if 'errors' not in sale]
+        products = Product.objects.in_bulk({item['product_id'] for sale in valid for item in sale['items']})
+        customers = Customer.objects.in_bulk({sale['customer_id'] for sale in valid if sale['customer_id']})
+        for index, sale in enumerate(checked):
+            if 'errors' in sale:
+                continue
+            errors = {}
+            if sale['customer_id'] and sale['customer_id'] not in customers:
+                errors['customer_id'] = [f"Invalid pk \"{sale['customer_id']}\" - object does not exist."]
+            missing = [item['product_id'] for item in sale['items'] if item['product_id'] not in products]
+            if missing:
+                errors['items'] = [f"Invalid pk \"{product_id}\" - object does not exist." for product_id in missing]
+            if errors:
+                checked[index] = {'client_id': str(sale['client_id']), 'errors': errors}
+                continue
+            sale['customer'] = customers.get(sale['customer_id'])
+            for item in sale['items']:
+                item['product'] = products[item['product_id']]
+        return checked
+
+
+class SyncInventorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Inventory
+        fields = ['id', 'product', 'batch_number', 'expiration_date', 'quantity', 'threshold_quantity', 'updated_at']
+
+
 class CustomerSerializer(serializers.ModelSerializer):
     name = serializers.SerializerMethodField(read_only=True)
 
@@ -234,46 +326,6 @@ class CustomerSerializer(serializers.ModelSerializer):
         return f'{obj.title} {obj.first_name} {obj.last_name}'.strip() or 'Anonymous'
     
 
-class NotificationSerializer(serializers.ModelSerializer):
-    sender = UserMeSerializer(read_only=True)
-    recipient = UserMeSerializer(read_only=True)
-    related_branch = SiteSerializer(read_only=True)
-    time_since = serializers.SerializerMethodField()
-    related_transfer = serializers.SerializerMethodField()
-
-    class Meta:
-        model = Notification
-        fields = [
-            'id',
-            'notification_type',
-            'title',
-            'message',
-            'is_read',
-            'sender',
-            'recipient',
-            'related_branch',
-            'related_object_id',
-            'created_at',
-            'updated_at',
-            'time_since',
-            'related_transfer',
-        ]
-        read_only_fields = ['created_at', 'updated_at']
-
-    def get_time_since(self, obj):
-        from django.utils.timesince import timesince
-        return timesince(obj.created_at)
-
-    def get_related_transfer(self, obj):
-        if obj.notification_type == 'TRANSFER_REQUEST':
-            try:
-                transfer = StockTransfer.objects.get(id=obj.related_object_id)
-                return StockTransferSerializer(transfer, context=self.context).data
-            except StockTransfer.DoesNotExist:
-                return None
-        return None
-    
-
 class WarehouseReceivingSerializer(serializers.Serializer):
     product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
     quantity = serializers.IntegerField(min_value=1)
@@ -284,3 +336,77 @@ class WarehouseReceivingSerializer(serializers.Serializer):
         if data['quantity'] <= 0:
             raise serializers.ValidationError("Quantity must be greater than 0.")
         return data
+
+
+class ReceivingLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+    batch_number = serializers.CharField(required=False, allow_blank=True, max_length=50, default='')
+    expiration_date = serializers.DateField(required=False, allow_null=True, default=None)
+
+
+class BulkReceivingSerializer(serializers.Serializer):
+    lines = ReceivingLineSerializer(many=True, allow_empty=False)
+
+    def validate_lines(self, lines):
+        if len(lines) > settings.RECEIVING_MAX_LINES:
+            raise serializers.ValidationError(f"At most {settings.RECEIVING_MAX_LINES} lines per delivery.")
+        return with_products(lines)
+
+
+def with_products(lines):
+    """Attach the Product to each validated line, with one query for all of them."""
+    products = Product.objects.in_bulk({line['product_id'] for line in lines})
+    errors = [
+        {} if line['product_id'] in products else {'product_id': [f"Invalid pk \"{line['product_id']}\" - object does not exist."]}
+        for line in lines
+    ]
+    if any(errors):
+        raise serializers.ValidationError(errors)
+    return [{**line, 'product': products[line['product_id']]} for line in lines]
+
+
+class TransferLineInputSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class TransferDocumentDispatchSerializer(serializers.Serializer):
+    destination_id = serializers.PrimaryKeyRelatedField(queryset=Site.objects.all())
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    lines = TransferLineInputSerializer(many=True, allow_empty=False)
+
+    def validate_lines(self, lines):
+        if len(lines) > settings.TRANSFER_DOCUMENT_MAX_LINES:
+            raise serializers.ValidationError(f"At most {settings.TRANSFER_DOCUMENT_MAX_LINES} lines per document.")
+        return with_products(lines)
+
+    def validate_destination_id(self, destination):
+        # Documents are dispatched from the requesting user's branch
+        if destination.id == self.context['request'].user.branch_id:
+            raise serializers.ValidationError("Cannot transfer stock to the branch it is dispatched from.")
+        return destination
+
+
+class TransferLineSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+
+    class Meta:
+        model = TransferLine
+        fields = ['product', 'product_name', 'quantity']
+
+
+class TransferDocumentSerializer(serializers.ModelSerializer):
+    from_branch_name = serializers.CharField(source='from_branch.name', read_only=True)
+    to_branch_name = serializers.CharField(source='to_branch.name', read_only=True)
+    dispatched_by = serializers.StringRelatedField(read_only=True)
+    received_by = serializers.StringRelatedField(read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    lines = TransferLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = TransferDocument
+        fields = [
+            'id', 'from_branch', 'from_branch_name', 'to_branch', 'to_branch_name', 'status', 'status_display',
+            'notes', 'dispatched_by', 'dispatched_at', 'received_by', 'received_at', 'lines',
+        ]
@@ -2,9 +2,16 @@ from django.urls import path
 from .views import (SiteDetailAPIView, 
                     SiteListCreateAPIView,
                     ProductListCreateAPIView,
+                    ProductSearchAPIView,
+                    ProductByCodeAPIView,
+                    ProductCodeListCreateAPIView,
                     ProductDetailAPIView,
                     InventoryListCreateAPIView,
                     InventoryDetailAPIView,
+                    StockSummaryListAPIView,
+                    StockSummaryDetailAPIView,
+                    LowStockAlertAPIView,
+                    StockAtAPIView,
                     StockMovementListCreateAPIView,
                     StockTransferListCreateAPIView,
                     StockTransferDetailAPIView,
@@ -12,11 +19,15 @@ from .views import (SiteDetailAPIView,
                     StockMovementReportAPIView,
                     StockTransferReportAPIView,
                     CustomerListCreateAPIView,
+                    CustomerSearchAPIView,
                     SaleListCreateAPIView,
+                    SaleSyncAPIView,
+                    ChangeFeedAPIView,
                     SalesReportAPIView,
                     GenerateReceiptAPIView,
                     SendReceiptEmailAPIView,
                     SendReceiptSMSAPIView,
+                    RetryReceiptAPIView,
                     StockTransferApprovalAPIView,
                     NotificationListCreateAPIView,
                     NotificationDetailAPIView,
@@ -24,6 +35,7 @@ from .views import (SiteDetailAPIView,
                     MarkAllAsReadAPIView,
                     UnreadCountAPIView,
                     WarehouseReceivingAPIView,
+                    WarehouseBulkReceivingAPIView,
                     ClearAllNotificationsAPIView,
                     GenerateTransferReceiptAPIView,
                     WarehouseReceivingDocumentPDFView,
@@ -31,6 +43,9 @@ from .views import (SiteDetailAPIView,
                     WarehouseDispatchAPIView,
                     ReceiveTransferAPIView,
                     InTransitTransfersAPIView,
+                    TransferDocumentDispatchAPIView,
+                    TransferDocumentDetailAPIView,
+                    TransferDocumentReceiveAPIView,
                     DispatchDocumentAPIView,
                     archive_notification,
                     )
@@ -42,11 +57,18 @@ urlpatterns = [
 
     # 📦 PRODUCT CATALOG
     path('products/', ProductListCreateAPIView.as_view(), name='product-list-create'),  # Create or list products
+    path('products/search/', ProductSearchAPIView.as_view(), name='product-search'),  # POS lookup by name or brand
+    path('products/by-code/<str:code>/', ProductByCodeAPIView.as_view(), name='product-by-code'),  # Scan-to-sell barcode lookup
+    path('products/<int:product_id>/codes/', ProductCodeListCreateAPIView.as_view(), name='product-codes'),  # Barcodes per pack size
     path('products/<int:pk>/', ProductDetailAPIView.as_view(), name='product-detail'),  # Retrieve, update, delete a product
 
     # 📊 INVENTORY MANAGEMENT
     path('inventory/', InventoryListCreateAPIView.as_view(), name='inventory-list-create'),  # View or add stock to a branch
     path('inventory/<int:pk>/', InventoryDetailAPIView.as_view(), name='inventory-detail'),  # Get inventory details per item/branch
+    path('stock-summary/', StockSummaryListAPIView.as_view(), name='stock-summary'),  # Network-wide stock per product (CEO)
+    path('stock-summary/<int:product_id>/', StockSummaryDetailAPIView.as_view(), name='stock-summary-detail'),
+    path('sites/<int:branch_id>/low-stock/', LowStockAlertAPIView.as_view(), name='low-stock'),  # Batches below their threshold
+    path('sites/<int:branch_id>/stock-at/', StockAtAPIView.as_view(), name='stock-at'),  # Point-in-time stock from the ledger
 
     # 🚚 STOCK MOVEMENTS (historical records)
     path('stock-movement/', StockMovementListCreateAPIView.as_view(), name='stock-movement-list-create'),
@@ -63,13 +85,17 @@ urlpatterns = [
 
     # 💳 SALES & CUSTOMERS
     path('customers/', CustomerListCreateAPIView.as_view(), name='customer-list-create'),
+    path('customers/search/', CustomerSearchAPIView.as_view(), name='customer-search'),
     path('sales/', SaleListCreateAPIView.as_view(), name='sale-list-create'),
+    path('sales/sync/', SaleSyncAPIView.as_view(), name='sale-sync'),  # Offline POS upload and catalog/stock delta
+    path('sync/changes/', ChangeFeedAPIView.as_view(), name='change-feed'),  # Rows changed since a change sequence, tombstones included
     path('reports/sales/', SalesReportAPIView.as_view(), name='sales-report'),
 
     # 🧾 RECEIPTS
     path('receipts/<int:sale_id>/', GenerateReceiptAPIView.as_view(), name='generate-receipt'),  # View/print receipt
     path('receipts/<int:sale_id>/send-email/', SendReceiptEmailAPIView.as_view(), name='send-receipt-email'),  # Email receipt
     path('api/receipts/<int:sale_id>/send-sms/', SendReceiptSMSAPIView.as_view(), name='send-receipt-sms'),  # SMS receipt
+    path('receipts/<int:sale_id>/retry/', RetryReceiptAPIView.as_view(), name='retry-receipt'),  # Re-queue failed email/SMS receipts
 
     # 🔔 NOTIFICATIONS
     path('notifications/', NotificationListCreateAPIView.as_view(), name='notification-list-create'),
@@ -82,6 +108,7 @@ urlpatterns = [
 
     # 📥 WAREHOUSE RECEIVING
     path('warehouse/receive/', WarehouseReceivingAPIView.as_view(), name='warehouse-receive'),  # Manual input of warehouse stock
+    path('warehouse/receive/bulk/', WarehouseBulkReceivingAPIView.as_view(), name='warehouse-receive-bulk'),  # Whole supplier delivery (JSON or CSV)
     path('warehouse/receiving-document/<int:inventory_id>/', WarehouseReceivingDocumentPDFView.as_view()),  # PDF for receiving docs
     path('transfer-receipt/<int:pk>/', GenerateTransferReceiptAPIView.as_view, name="generate-transfer"),  # Receipt for stock transfer
 
@@ -92,4 +119,7 @@ urlpatterns = [
 
     # 🚚 TRANSFER TRACKING
     path('transfers/in-transit/', InTransitTransfersAPIView.as_view(), name='in-transit-transfers'),  # View all IN_TRANSIT transfers
+    path('transfer-documents/', TransferDocumentDispatchAPIView.as_view(), name='transfer-document-dispatch'),  # Dispatch many products at once
+    path('transfer-documents/<int:pk>/', TransferDocumentDetailAPIView.as_view(), name='transfer-document-detail'),
+    path('transfer-documents/<int:document_id>/receive/', TransferDocumentReceiveAPIView.as_view(), name='transfer-document-receive'),  # Confirm delivery of every line
 ]
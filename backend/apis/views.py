@@ -7,36 +7,64 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import generics
-from products.models import Product
+from products.models import Product, ProductCode
 from apis.serializers import (ProductSerializer, 
                               InventorySerializer, 
                               StockMovementSerializer, 
                               StockTransferSerializer,
                               CustomerSerializer,
                               NotificationSerializer,
-                              WarehouseReceivingSerializer)
-from inventory.models import Inventory, StockMovement, StockTransfer, Notification, InventoryVersion
+                              WarehouseReceivingSerializer,
+                              StockSummarySerializer,
+                              BulkReceivingSerializer,
+                              ProductCodeSerializer,
+                              TransferDocumentDispatchSerializer,
+                              TransferDocumentSerializer,
+                              SaleSyncSerializer,
+                              SyncInventorySerializer,
+                              TRANSFER_RELATED)
+from inventory.models import Inventory, StockMovement, StockTransfer, TransferDocument, Notification, InventoryVersion, InsufficientStock, ProductStockSummary
 from accounts.models import User, Customer
-import csv
 from django.http import HttpResponse
 from sales.models import Sale
 from apis.serializers import SaleSerializer
 from sales.models import SaleItem
-from .utils import generate_pdf, send_email, send_sms, check_low_stock, create_transfer_request_notification
+from .utils import check_low_stock, create_transfer_request_notification
+from sales.receipts import queue_receipt, STATUS_FIELDS as RECEIPT_STATUS_FIELDS
 from django.template.loader import render_to_string
-from django.core.paginator import Paginator
-from .utils import send_sms
+from .pagination import KeysetPagination
+from .mixins import ConditionalGetMixin, QueryPlanMixin
+from .exports import CSVRenderer, PDFRenderer, stream_csv, display
+from documents.rendering import request_pdf
+from rest_framework.settings import api_settings
 from rest_framework import status
-from .utils import invalidate_cache
+from core import cache as versioned_cache
+from inventory import ledger, summary as stock_summary, unread
+from inventory.fanout import notify_roles
+from inventory.receiving import receive_lines
+from inventory import transfers
+from sales import sync as pos_sync
+from changes import feed as change_feed
+from products import barcodes, search as product_search
+from accounts import search as customer_search
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.shortcuts import get_object_or_404
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 from django.http import HttpResponse
 from django.http import FileResponse
 from io import BytesIO
+import csv
+from datetime import datetime
+from decimal import Decimal
+import io
 import logging
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import Prefetch, Q, Value
+from django.db.models.functions import Concat
 
 logger = logging.getLogger(__name__)
 
@@ -44,8 +72,9 @@ logger = logging.getLogger(__name__)
 
 # Create your views here.
 
-class SiteListCreateAPIView(APIView):
+class SiteListCreateAPIView(ConditionalGetMixin, APIView):
     permission_classes = [IsAuthenticated]
+    validator_entities = ('site',)
     
     def get(self, request, *args, **kwargs):
         user = request.user
@@ -113,11 +142,83 @@ class SiteDetailAPIView(APIView):
         return Response({'detail': 'Branch deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
     
 
-class ProductListCreateAPIView(generics.ListCreateAPIView):
+class ProductListCreateAPIView(ConditionalGetMixin, generics.ListCreateAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    validator_entities = ('product',)
     
+class ProductSearchAPIView(APIView):
+    """
+    The POS product lookup: ``?q=`` matched by prefix or fuzzily on name
+    and brand, ranked by relevance and by stock at the branch (the
+    user's own, or ``?branch=`` for the CEO). Returns the top 20.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        branch_id = request.user.branch_id
+        if request.user.role == 'CEO' and request.query_params.get('branch'):
+            branch_id = request.query_params.get('branch')
+
+        results = [
+            {**ProductSerializer(product).data, "relevance": round(relevance, 3), "in_stock": in_stock}
+            for product, relevance, in_stock in product_search.search_products(query, branch_id)
+        ]
+        return Response({"query": query, "results": results})
+
+
+class ProductCodeListCreateAPIView(generics.ListCreateAPIView):
+    """The barcodes, GTINs and SKUs of one product; add one per pack size."""
+    serializer_class = ProductCodeSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_product(self):
+        return get_object_or_404(Product, pk=self.kwargs['product_id'])
+
+    def get_queryset(self):
+        return ProductCode.objects.filter(product_id=self.kwargs['product_id']).order_by('pk')
+
+    def perform_create(self, serializer):
+        serializer.save(product=self.get_product())
+
+
+class ProductByCodeAPIView(APIView):
+    """
+    Resolve a scanned code to its product, price and stock at the user's
+    branch (or ``?branch=`` for the CEO). Served from the per-process
+    barcode cache without touching the database on a hit.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, code):
+        branch_id = request.user.branch_id
+        if request.user.role == 'CEO' and request.query_params.get('branch'):
+            branch_id = request.query_params.get('branch')
+
+        found = barcodes.lookup(code, branch_id)
+        if found is None:
+            return Response({"error": "Unknown code"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "code": found['code'],
+            "product": {
+                "id": found['product_id'],
+                "name": found['name'],
+                "brand": found['brand'],
+                "unit_price": str(found['unit_price']),
+            },
+            "pack_size": found['pack_size'],
+            "label": found['label'],
+            "pack_price": str(found['unit_price'] * found['pack_size']),
+            "branch": branch_id,
+            "in_stock": found['in_stock'],
+        })
+
+
 class ProductDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
@@ -137,14 +238,14 @@ class InventoryListCreateAPIView(generics.ListCreateAPIView):
     
     def perform_create(self, serializer):
         serializer.save(received_by=self.request.user)
-        
-        #Invalidate Cache
-        invalidate_cache(user=self.request.user)
 
-class InventoryListCreateAPIView(generics.ListCreateAPIView):
+class InventoryListCreateAPIView(ConditionalGetMixin, QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    select_related = ('product',)
+    validator_entities = ('inventory', 'product')
 
     def get_queryset(self):
         user = self.request.user
@@ -155,15 +256,47 @@ class InventoryListCreateAPIView(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         serializer.save(received_by=self.request.user)
-        # Invalidate Cache (if applicable)
-        invalidate_cache(user=self.request.user)
 
 
         
-class InventoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class StockSummaryListAPIView(QueryPlanMixin, generics.ListAPIView):
+    """Network-wide stock per product, with per-branch and expiry breakdowns."""
+    serializer_class = StockSummarySerializer
+    permission_classes = [IsAuthenticated, IsCEO]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('pk',)
+    select_related = ('product',)
+
+    def get_queryset(self):
+        queryset = ProductStockSummary.objects.all()
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset.filter(product__name__icontains=search)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        page = stock_summary.refresh_stale(page)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class StockSummaryDetailAPIView(QueryPlanMixin, generics.RetrieveAPIView):
+    queryset = ProductStockSummary.objects.all()
+    serializer_class = StockSummarySerializer
+    permission_classes = [IsAuthenticated, IsCEO]
+    select_related = ('product',)
+    lookup_url_kwarg = 'product_id'
+
+    def retrieve(self, request, *args, **kwargs):
+        summary = stock_summary.refresh_stale([self.get_object()])[0]
+        return Response(self.get_serializer(summary).data)
+
+
+class InventoryDetailAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [IsAuthenticated]
+    select_related = ('product',)
     
     def get_queryset(self):
         user = self.request.user
@@ -171,23 +304,14 @@ class InventoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
             return Inventory.objects.all()
         return Inventory.objects.filter(branch=user.branch)
     
-    def perform_update(self, serializer):
-        inventory = serializer.save()
-        
-        # Invalidate cache when inventory is updated
-        invalidate_cache(user=self.request.user)
-    
-    def perform_destroy(self, instance):
-        instance.delete()
-        
-        # Invalidate cache when inventory is deleted
-        invalidate_cache(user=self.request.user)
-    
 
-class StockMovementListCreateAPIView(generics.ListCreateAPIView):
+class StockMovementListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-date', '-id')
+    select_related = ('product',)
     
     def get_queryset(self):
         user = self.request.user
@@ -198,10 +322,13 @@ class StockMovementListCreateAPIView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(branch=self.request.user.branch)
         
-class StockTransferListCreateAPIView(generics.ListCreateAPIView):
+class StockTransferListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = StockTransfer.objects.all()
     serializer_class = StockTransferSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-transfer_date', '-id')
+    select_related = TRANSFER_RELATED
     
     def get_queryset(self):
         user = self.request.user
@@ -223,14 +350,12 @@ class StockTransferListCreateAPIView(generics.ListCreateAPIView):
         
         # Create StockMovement placeholder
         create_transfer_request_notification(transfer)
-        invalidate_cache(user=self.request.user)
-        if transfer.to_branch:
-            invalidate_cache()
 
-class StockTransferDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class StockTransferDetailAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = StockTransfer.objects.all()
     serializer_class = StockTransferSerializer
     permission_classes = [IsAuthenticated]
+    select_related = TRANSFER_RELATED
     
     def get_queryset(self):
         user = self.request.user
@@ -238,25 +363,24 @@ class StockTransferDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
             return super().get_queryset()
         return StockTransfer.objects.filter(from_branch=user.branch)
     
-    def perform_update(self, serializer):
-        serializer.save()
-        
-        #Invalidate Cache for both branches
-        invalidate_cache(user=self.request.user)
-        if serializer.save().to_branch:
-            invalidate_cache()
-            
-    def perform_destroy(self, instance):
-        instance.delete()
-        
-        #Invalidate Cache for both branches
-        invalidate_cache(user=self.request.user)
-    
     
 class InventoryReportAPIView(APIView):
     permission_classes = [IsCEOOrBranchAdmin]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, PDFRenderer]
+    csv_columns = [
+        ('Product', 'product__name'),
+        ('Branch', 'branch__name'),
+        ('Batch', 'batch_number'),
+        ('Expiration Date', 'expiration_date'),
+        ('Quantity', 'quantity'),
+        ('Threshold', 'threshold_quantity'),
+        ('Last Updated', 'updated_at'),
+    ]
+
     def get(self, request, format=None):
-        inventories = Inventory.objects.all() if User.role == 'CEO' else Inventory.objects.filter(branch=User.branch)
+        format = format or request.accepted_renderer.format
+        user = request.user
+        inventories = Inventory.objects.all() if user.role == 'CEO' else Inventory.objects.filter(branch=user.branch)
         
         #Filtering Data by Range
         start_date = request.GET.get('start_date')
@@ -265,29 +389,43 @@ class InventoryReportAPIView(APIView):
         if start_date and end_date:
             inventories = inventories.filter(updated_at__range=[start_date, end_date])
             
+        if format == 'csv':
+            return stream_csv(inventories.order_by('-created_at', '-id'), self.csv_columns, 'inventory_report.csv')
+
         # Pagination
-        paginator = Paginator(inventories, 10) #Show 10 inventories per page
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-        
+        paginator = KeysetPagination()
         
-        #Export to CSV
+        #Export to PDF
         if format == 'pdf':
-            context = {'inventories': page_obj}
-            response = generate_pdf('inventory_report_template.html', context)
-            if response:
-                return response
-            return Response({'detail': 'Error generating PDF report.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            context = {'inventories': paginator.paginate_queryset(inventories.select_related('product', 'branch'), request, view=self)}
+            return request_pdf('inventory_report_template.html', context, 'inventory_report.pdf')
         
         #JSON Response
-        serializer = InventorySerializer(page_obj, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def fetch_page():
+            page = paginator.paginate_queryset(inventories.select_related('product'), request, view=self)
+            return paginator.get_paginated_response(InventorySerializer(page, many=True).data).data
+
+        data = versioned_cache.get_or_set(
+            'inventory_report', ('inventory',), None if user.role == 'CEO' else user.branch_id, fetch_page,
+            start_date, end_date, request.GET.get('cursor'), request.GET.get('page_size'),
+        )
+        return Response(data, status=status.HTTP_200_OK)
         
 
 class StockMovementReportAPIView(APIView):
     permission_classes = [IsCEOOrBranchAdmin]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, PDFRenderer]
+    cursor_ordering = ('-date', '-id')
+    csv_columns = [
+        ('Product', 'product__name'),
+        ('Branch', 'branch__name'),
+        ('Type', 'movement_type', display(StockMovement.MOVEMENT_TYPE_CHOICES)),
+        ('Quantity', 'quantity'),
+        ('Date', 'date'),
+    ]
 
     def get(self, request, format=None):
+        format = format or request.accepted_renderer.format
         user = request.user
         movements = StockMovement.objects.all() if user.role == 'CEO' else StockMovement.objects.filter(branch=user.branch)
         
@@ -300,25 +438,20 @@ class StockMovementReportAPIView(APIView):
 
         # Export to CSV
         if format == 'csv':
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename="stock_movement_report.csv"'
-
-            writer = csv.writer(response)
-            writer.writerow(['Product', 'Branch', 'Type', 'Quantity', 'Date'])
-            
-            for movement in movements:
-                writer.writerow([
-                    movement.product.name,
-                    movement.branch.name,
-                    movement.get_movement_type_display(),
-                    movement.quantity,
-                    movement.date
-                ])
-            return response
+            return stream_csv(movements.order_by(*self.cursor_ordering), self.csv_columns, 'stock_movement_report.csv')
 
         # Standard JSON response
-        serializer = StockMovementSerializer(movements, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = KeysetPagination()
+
+        def fetch_page():
+            page = paginator.paginate_queryset(movements.select_related('product'), request, view=self)
+            return paginator.get_paginated_response(StockMovementSerializer(page, many=True).data).data
+
+        data = versioned_cache.get_or_set(
+            'stock_movement_report', ('inventory',), None if user.role == 'CEO' else user.branch_id, fetch_page,
+            start_date, end_date, request.GET.get('cursor'), request.GET.get('page_size'),
+        )
+        return Response(data, status=status.HTTP_200_OK)
  
 class StockTransferApprovalAPIView(APIView):
     permission_classes = [IsCEO]  # or IsCEOOrBranchAdmin
@@ -394,8 +527,22 @@ class StockTransferApprovalAPIView(APIView):
 
 class StockTransferReportAPIView(APIView):
     permission_classes = [IsCEOOrBranchAdmin]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, PDFRenderer]
+    cursor_ordering = ('-transfer_date', '-id')
+    csv_columns = [
+        ('ID', 'id'),
+        ('Date', 'transfer_date'),
+        ('From', 'from_branch__name'),
+        ('To', 'to_branch__name'),
+        ('Product', 'product__name'),
+        ('Quantity', 'quantity'),
+        ('Status', 'transfer_status', display(StockTransfer.TRANSFER_STATUS_CHOICES)),
+        ('Quantity Received', 'quantity_received'),
+        ('Damaged', 'damaged_quantity'),
+    ]
 
     def get(self, request, format=None):
+        format = format or request.accepted_renderer.format
         user = request.user
         transfers = StockTransfer.objects.all() if user.role == 'CEO' else StockTransfer.objects.filter(from_branch=user.branch)
         
@@ -405,29 +552,38 @@ class StockTransferReportAPIView(APIView):
         
         if start_date and end_date:
             transfers = transfers.filter(transfer_date__range=[start_date, end_date])
-            
+
+        if format == 'csv':
+            return stream_csv(transfers.order_by(*self.cursor_ordering), self.csv_columns, 'stock_transfer_report.csv')
+
         # Pagination
-        paginator = Paginator(transfers, 10)  # Show 10 transfers per page
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPagination()
 
-        # Export to CSV
+        # Export to PDF
         if format == 'pdf':
-            context = {'transfers': page_obj}
-            response = generate_pdf('stock_transfer_report_template.html', context)
-            if response:
-                return response
-            return Response({"detail": "Error generating PDF report."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            context = {'transfers': paginator.paginate_queryset(transfers.select_related('from_branch', 'to_branch', 'product'), request, view=self)}
+            return request_pdf('stock_transfer_report_template.html', context, 'stock_transfer_report.pdf')
 
         # Standard JSON response
-        serializer = StockTransferSerializer(page_obj, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def fetch_page():
+            page = paginator.paginate_queryset(transfers.select_related(*TRANSFER_RELATED), request, view=self)
+            return paginator.get_paginated_response(StockTransferSerializer(page, many=True).data).data
+
+        data = versioned_cache.get_or_set(
+            'stock_transfer_report', ('transfer',), None if user.role == 'CEO' else user.branch_id, fetch_page,
+            start_date, end_date, request.GET.get('cursor'), request.GET.get('page_size'),
+        )
+        return Response(data, status=status.HTTP_200_OK)
     
 
-class SaleListCreateAPIView(generics.ListCreateAPIView):
+class SaleListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Sale.objects.all()
     serializer_class = SaleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-date', '-id')
+    select_related = ('customer',)
+    prefetch_related = (Prefetch('items', queryset=SaleItem.objects.select_related('product')),)
 
     def get_queryset(self):
         user = self.request.user
@@ -439,10 +595,106 @@ class SaleListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(processed_by=self.request.user)
 
 
+class SaleSyncAPIView(APIView):
+    """
+    Offline POS sync. A terminal posts the sales it queued while offline,
+    each with its own ``client_id`` UUID, plus the ``sync_token`` from its
+    last sync. Every sale is reported back as created, duplicate (already
+    uploaded), rejected (not enough stock) or invalid, and the response
+    carries the products and branch batches changed since the token along
+    with the token to send next time. Retrying a whole upload is safe.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = SaleSyncSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        branch = serializer.validated_data['branch']
+        if request.user.role != 'CEO' and request.user.branch_id != branch.id:
+            return Response({"error": "Branch not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        checked = serializer.validated_data['sales']
+        valid = [sale for sale in checked if 'errors' not in sale]
+        applied = pos_sync.apply(branch, valid, request.user) if valid else []
+        if applied is None:
+            return Response({"error": "Stock changed while syncing. Retry the upload."}, status=status.HTTP_409_CONFLICT)
+
+        applied = iter(applied)
+        results = [
+            {'client_id': sale['client_id'], 'status': 'invalid', 'errors': sale['errors']} if 'errors' in sale
+            else next(applied)
+            for sale in checked
+        ]
+        products, batches, token = pos_sync.changes(branch, serializer.validated_data['sync_token'])
+        return Response({
+            "results": results,
+            "products": ProductSerializer(products, many=True).data,
+            "inventory": SyncInventorySerializer(batches, many=True).data,
+            "sync_token": token,
+        })
+
+
+class ChangeFeedAPIView(APIView):
+    """
+    Rows changed after the change sequence ``?since=`` (0 for everything),
+    so clients can keep a local mirror of products, sites, customers and
+    their branch's stock (every branch's for the CEO). Rows deleted since
+    are listed under ``deleted``. Ask again from ``next`` until ``more``
+    is false.
+    """
+    permission_classes = [IsAuthenticated]
+    mirrored = {
+        'product': ('products', Product.objects.all(), ProductSerializer),
+        'inventory': ('inventory', Inventory.objects.all(), SyncInventorySerializer),
+        'site': ('sites', Site.objects.all(), SiteSerializer),
+        'customer': ('customers', Customer.objects.all(), CustomerSerializer),
+    }
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            since = -1
+        if since < 0:
+            return Response({"error": "since must be a change sequence."}, status=status.HTTP_400_BAD_REQUEST)
+
+        branch_id = None if request.user.role == 'CEO' else request.user.branch_id
+        latest, sequence, more = change_feed.read(since, branch_id)
+
+        data = {"since": since, "next": sequence, "more": more, "deleted": {}}
+        for entity, (key, queryset, serializer_class) in self.mirrored.items():
+            rows = queryset.in_bulk([object_id for object_id, deleted in latest[entity].items() if not deleted])
+            data[key] = serializer_class([rows[object_id] for object_id in sorted(rows)], many=True).data
+            # Deleted after the change was written: its tombstone is further on
+            data["deleted"][key] = sorted(object_id for object_id in latest[entity] if object_id not in rows)
+        return Response(data)
+
+
 class CustomerListCreateAPIView(generics.ListCreateAPIView):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+
+class CustomerSearchAPIView(APIView):
+    """Customers matching ``?q=`` by name or phone number, best first (top 20)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = customer_search.matches(query, limit=20)
+        customers = Customer.objects.in_bulk([customer_id for customer_id, _ in found])
+        results = [
+            {**CustomerSerializer(customers[customer_id]).data, "relevance": round(relevance, 3)}
+            for customer_id, relevance in found
+            if customer_id in customers
+        ]
+        return Response({"query": query, "results": results})
     
     
 
@@ -450,19 +702,16 @@ class GenerateReceiptAPIView(APIView):
 
     def get(self, request, sale_id):
         try:
-            sale = Sale.objects.get(id=sale_id)
-            items = SaleItem.objects.filter(sale=sale)
+            sale = Sale.objects.select_related('branch', 'customer', 'processed_by').get(id=sale_id)
+            items = SaleItem.objects.filter(sale=sale).select_related('product')
 
             context = {
                 'sale': sale,
                 'items': items,
             }
 
-            # Generate PDF
-            response = generate_pdf('receipt_template.html', context)
-            if response:
-                return response
-            return Response({"detail": "Error generating receipt."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Served from the PDF store, or queued for a render worker (202)
+            return request_pdf('receipt_template.html', context, f'receipt_{sale_id}.pdf')
 
         except Sale.DoesNotExist:
             return Response({"detail": "Sale not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -471,30 +720,13 @@ class SendReceiptEmailAPIView(APIView):
 
     def post(self, request, sale_id):
         try:
-            sale = Sale.objects.get(id=sale_id)
-            items = SaleItem.objects.filter(sale=sale)
-            customer_email = sale.customer.email
+            sale = Sale.objects.select_related('branch', 'customer').get(id=sale_id)
 
-            if not customer_email:
+            # Delivered by the send_receipts worker; the till doesn't wait on SMTP
+            if not queue_receipt(sale, 'EMAIL'):
                 return Response({"detail": "Customer email not available."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Render HTML receipt template
-            context = {'sale': sale, 'items': items}
-            html_message = render_to_string('receipt_template.html', context)
-            
-            # Send email
-            send_email(
-                subject=f"Receipt for Your Purchase at {sale.branch.name}",
-                message="Here is your receipt",
-                recipient_list=[customer_email],
-                html_message=html_message
-            )
-            
-            # Mark the sale as receipt sent
-            sale.receipt_sent = True
-            sale.save()
-
-            return Response({"detail": "Receipt sent successfully via email."}, status=status.HTTP_200_OK)
+            return Response({"detail": "Receipt queued for email."}, status=status.HTTP_202_ACCEPTED)
         
         except Sale.DoesNotExist:
             return Response({"detail": "Sale not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -505,29 +737,12 @@ class SendReceiptSMSAPIView(APIView):
 
     def post(self, request, sale_id):
         try:
-            sale = Sale.objects.get(id=sale_id)
-            customer = sale.customer
+            sale = Sale.objects.select_related('branch', 'customer').get(id=sale_id)
 
-            if not customer or not customer.phone_number:
+            if not queue_receipt(sale, 'SMS'):
                 return Response({"detail": "Customer phone number not available."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Create the SMS message content
-            message = (
-                f"Thank you for your purchase at {sale.branch.name}!\n"
-                f"Amount Paid: GHC{sale.total_amount}\n"
-                f"Payment Method: {sale.payment_method}\n"
-                f"Date: {sale.date}\n"
-            )
-
-            # Send SMS
-            sms_sid = send_sms(customer.phone_number, message)
-
-            if sms_sid:
-                sale.receipt_sent = True
-                sale.save()
-                return Response({"detail": "Receipt sent successfully via SMS."}, status=status.HTTP_200_OK)
-            else:
-                return Response({"detail": "Failed to send SMS."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({"detail": "Receipt queued for SMS."}, status=status.HTTP_202_ACCEPTED)
 
         except Sale.DoesNotExist:
             return Response({"detail": "Sale not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -537,23 +752,18 @@ class RetryReceiptAPIView(APIView):
 
     def post(self, request, sale_id):
         try:
-            sale = Sale.objects.get(id=sale_id)
-            errors = []
-
-            if sale.email_status == 'FAILED':
-                # Retry sending email (using existing email-sending function)
-                if not send_email(sale):  # Assume send_email_receipt() exists
-                    errors.append("Failed to send email.")
-
-            if sale.sms_status == 'FAILED':
-                # Retry sending SMS (using existing SMS function)
-                if not send_sms(sale):  # Assume send_sms_receipt() exists
-                    errors.append("Failed to send SMS.")
-            
-            if errors:
-                return Response({"errors": errors}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            sale = Sale.objects.select_related('branch', 'customer').get(id=sale_id)
+
+            # Re-queue whichever channels the outbox gave up on
+            queued = [
+                channel for channel, field in RECEIPT_STATUS_FIELDS.items()
+                if getattr(sale, field) == 'FAILED' and queue_receipt(sale, channel)
+            ]
+
+            if not queued:
+                return Response({"message": "No failed receipts to resend."}, status=status.HTTP_200_OK)
             
-            return Response({"message": "Receipts resent successfully."}, status=status.HTTP_200_OK)
+            return Response({"message": "Receipts queued for resending.", "channels": queued}, status=status.HTTP_202_ACCEPTED)
 
         except Sale.DoesNotExist:
             return Response({"message": "Sale not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -563,8 +773,20 @@ class RetryReceiptAPIView(APIView):
 
 class SalesReportAPIView(APIView):
     permission_classes = [IsCEOOrBranchAdmin]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, PDFRenderer]
+    cursor_ordering = ('-date', '-id')
+    csv_columns = [
+        ('ID', 'id'),
+        ('Date', 'date'),
+        ('Branch', 'branch__name'),
+        ('Customer', 'customer_name', str.strip),  # ' ' for walk-in sales
+        ('Payment Method', 'payment_method', display(Sale.PAYMENT_METHOD_CHOICES)),
+        ('Total Amount', 'total_amount'),
+        ('Processed By', 'processed_by__email'),
+    ]
 
     def get(self, request, format=None):
+        format = format or request.accepted_renderer.format
         user = request.user
         sales = Sale.objects.all() if user.role == 'CEO' else Sale.objects.filter(branch=user.branch)
         
@@ -575,57 +797,143 @@ class SalesReportAPIView(APIView):
         if start_date and end_date:
             sales = sales.filter(date__range=[start_date, end_date])
 
+        if format == 'csv':
+            sales = sales.annotate(customer_name=Concat('customer__first_name', Value(' '), 'customer__last_name'))
+            return stream_csv(sales.order_by(*self.cursor_ordering), self.csv_columns, 'sales_report.csv')
+
         # Pagination
-        paginator = Paginator(sales, 10)  # Show 10 sales per page
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        paginator = KeysetPagination()
 
         # Export to PDF
         if format == 'pdf':
-            context = {'sales': page_obj}
-            response = generate_pdf('sales_report_template.html', context)
-            if response:
-                return response
-            return Response({"detail": "Error generating PDF report."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            context = {'sales': paginator.paginate_queryset(sales.select_related('branch', 'customer'), request, view=self)}
+            return request_pdf('sales_report_template.html', context, 'sales_report.pdf')
         
         # JSON Response
-        serializer = SaleSerializer(page_obj, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def fetch_page():
+            page = paginator.paginate_queryset(
+                sales.select_related(*SaleListCreateAPIView.select_related)
+                .prefetch_related(*SaleListCreateAPIView.prefetch_related),
+                request, view=self,
+            )
+            return paginator.get_paginated_response(SaleSerializer(page, many=True).data).data
+
+        data = versioned_cache.get_or_set(
+            'sales_report', ('sale',), None if user.role == 'CEO' else user.branch_id, fetch_page,
+            start_date, end_date, request.GET.get('cursor'), request.GET.get('page_size'),
+        )
+        return Response(data, status=status.HTTP_200_OK)
     
 
 class LowStockAlertAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
     def get(self, request, branch_id):
-        try:
-            branch = Site.objects.get(id=branch_id)
-            low_stock_items = check_low_stock(branch)
-            
-            if low_stock_items.exists():
-                return Response({"low_stock_items": [item.product.name for item in low_stock_items]}, status=status.HTTP_200_OK)
-            return Response({"message": "No low stock items found."}, status=status.HTTP_200_OK)
-        
-        except Site.DoesNotExist:
+        if request.user.role != 'CEO' and request.user.branch_id != branch_id:
+            return Response({"message": "Branch not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        low_stock_items = [
+            {
+                "inventory_id": item.id,
+                "product": item.product_id,
+                "product_name": item.product.name,
+                "batch_number": item.batch_number,
+                "quantity": item.quantity,
+                "threshold_quantity": item.threshold_quantity,
+            }
+            for item in check_low_stock(branch_id)
+        ]
+        if low_stock_items:
+            return Response({"low_stock_items": low_stock_items}, status=status.HTTP_200_OK)
+        return Response({"message": "No low stock items found."}, status=status.HTTP_200_OK)
+
+
+class StockAtAPIView(APIView):
+    """
+    A branch's stock, and its value at current unit prices, as it stood
+    at ``?at=`` (an ISO datetime, or a date meaning the end of that day;
+    defaults to now). Read from the nearest stock snapshot plus the
+    ledger entries since, never a full replay.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, branch_id):
+        if request.user.role != 'CEO' and request.user.branch_id != branch_id:
             return Response({"message": "Branch not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        at = request.query_params.get('at')
+        if at:
+            try:
+                moment = parse_datetime(at)
+                day = None if moment else parse_date(at)
+            except ValueError:
+                moment = day = None
+            if day:
+                moment = datetime.combine(day, datetime.max.time())
+            if not moment:
+                return Response({"error": "at must be an ISO date or datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            at = moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+        else:
+            at = timezone.now()
+
+        quantities, checkpoint = ledger.stock_at(branch_id, at)
+        batches = Inventory.objects.filter(pk__in=quantities).select_related('product').order_by('product__name', 'pk')
+        items = [
+            {
+                "inventory_id": batch.id,
+                "product": batch.product_id,
+                "product_name": batch.product.name,
+                "batch_number": batch.batch_number,
+                "quantity": quantities[batch.id],
+                "value": quantities[batch.id] * batch.product.unit_price,
+            }
+            for batch in batches
+        ]
+        return Response({
+            "branch": branch_id,
+            "at": at,
+            "checkpoint": checkpoint,
+            "total_quantity": sum(item["quantity"] for item in items),
+            "total_value": sum((item["value"] for item in items), Decimal("0")),
+            "items": items,
+        })
         
 
-class NotificationListCreateAPIView(generics.ListCreateAPIView):
+class NotificationListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    select_related = ('sender', 'recipient', 'related_branch')
 
     def get_queryset(self):
         # Only show notifications for the current user
-        return Notification.objects.filter(recipient=self.request.user, is_archived=False).order_by('-created_at')
+        return Notification.objects.filter(recipient=self.request.user, is_archived=False)
 
     def perform_create(self, serializer):
         serializer.save(recipient=self.request.user)
 
-class NotificationDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class NotificationDetailAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    select_related = ('sender', 'recipient', 'related_branch')
 
     def get_queryset(self):
         # Only allow access to notifications for the current user
         return Notification.objects.filter(recipient=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Re-read the row under a lock, so concurrent updates never count the same change twice
+            current = Notification.objects.select_for_update().get(pk=serializer.instance.pk)
+            notification = serializer.save()
+            unread.adjust(notification.recipient_id, unread.is_unread(notification) - unread.is_unread(current))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Only the request that actually deletes the unread row adjusts the count
+            deleted, _ = unread.unread_queryset(instance.recipient_id).filter(pk=instance.pk).delete()
+            unread.adjust(instance.recipient_id, -deleted)
+            Notification.objects.filter(pk=instance.pk).delete()
     
 
 class ClearAllNotificationsAPIView(generics.DestroyAPIView):
@@ -636,7 +944,12 @@ class ClearAllNotificationsAPIView(generics.DestroyAPIView):
 
     def delete(self, request, *args, **kwargs):
         # Delete all notifications for the current user
-        count, _ = self.get_queryset().delete()
+        with transaction.atomic():
+            # Count the unread rows from their own delete, so nothing arriving in between is missed
+            unread_count, _ = unread.unread_queryset(request.user.id).delete()
+            rest, _ = self.get_queryset().delete()
+            unread.adjust(request.user.id, -unread_count)
+        count = unread_count + rest
         return Response(
             {"message": f"Successfully deleted {count} notifications"},
             status=status.HTTP_204_NO_CONTENT
@@ -650,21 +963,26 @@ def archive_notification(request, pk):
     except Notification.DoesNotExist:
         return Response({'error': 'Notification not found'}, status=404)
 
-    notification.is_archived = True
-    notification.save()
+    with transaction.atomic():
+        archived = unread.unread_queryset(request.user.id).filter(pk=notification.pk).update(is_archived=True)
+        unread.adjust(request.user.id, -archived)
+        Notification.objects.filter(pk=notification.pk).update(is_archived=True)
     return Response({'message': 'Notification archived'}, status=200)
 
-class MarkAsReadAPIView(generics.UpdateAPIView):
+class MarkAsReadAPIView(QueryPlanMixin, generics.UpdateAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    select_related = ('sender', 'recipient', 'related_branch')
 
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user)
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
+        updated = unread.unread_queryset(request.user.id).filter(pk=instance.pk).update(is_read=True)
+        unread.adjust(request.user.id, -updated)
+        Notification.objects.filter(pk=instance.pk).update(is_read=True)  # Archived rows too
         instance.is_read = True
-        instance.save()
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -672,10 +990,9 @@ class MarkAllAsReadAPIView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        updated = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).update(is_read=True)
+        # Archived notifications are out of the inbox and out of the count
+        updated = unread.unread_queryset(request.user.id).update(is_read=True)
+        unread.adjust(request.user.id, -updated)
         
         return Response({
             'status': 'success',
@@ -686,12 +1003,7 @@ class UnreadCountAPIView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        count = Notification.objects.filter(
-            recipient=request.user,
-            is_read=False
-        ).count()
-        
-        return Response({'unread_count': count})
+        return Response({'unread_count': unread.get_count(request.user.id)})
     
 
 class WarehouseReceivingAPIView(APIView):
@@ -702,57 +1014,64 @@ class WarehouseReceivingAPIView(APIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        product = data['product_id']
-        quantity = data['quantity']
-        batch_number = data.get('batch_number', '')
-        expiration_date = data.get('expiration_date')
-
         warehouse = Site.objects.filter(is_warehouse=True).first()
         if not warehouse:
             return Response({"error": "Warehouse site not configured."}, status=500)
 
-        inventory, created = Inventory.objects.get_or_create(
-            product=product,
-            branch=warehouse,
-            batch_number=batch_number,
-            defaults={
-                "quantity": 0,
-                "expiration_date": expiration_date,
-                "received_by": request.user,
-            }
-        )
-
-        prev_qty = inventory.quantity
-        inventory.quantity += quantity
-        if expiration_date:
-            inventory.expiration_date = expiration_date
-        inventory.received_by = request.user
-        inventory.save()
-
-        # Stock movement log
-        sm = StockMovement.objects.create(
-            product=product,
-            branch=warehouse,
-            movement_type='ADD',
-            quantity=quantity,
-            details=f"Warehouse received new stock. Batch: {batch_number or 'N/A'}"
-        )
-
-        # Inventory version log
-        InventoryVersion.objects.create(
-            inventory=inventory,
-            previous_quantity=prev_qty,
-            new_quantity=inventory.quantity,
-            modified_by=request.user,
-            stock_movement=sm
-        )
+        product = data['product_id']
+        quantity = data['quantity']
+        inventory, = receive_lines(warehouse, [{**data, 'product': product}], request.user)
 
         return Response({
             "message": f"{quantity} units of {product.name} received into warehouse.",
             "inventory_id": inventory.id,
             "current_quantity": inventory.quantity
         }, status=200)
-        
+
+
+class WarehouseBulkReceivingAPIView(APIView):
+    """
+    Receive a whole supplier delivery at once, as a JSON list of lines
+    (or {"lines": [...]}) or a CSV upload in ``file`` with the columns
+    product_id, quantity, batch_number, expiration_date. Every line is
+    validated before anything is written; the delivery lands in one
+    transaction.
+    """
+    permission_classes = [IsAuthenticated, IsCEO]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+
+    def post(self, request):
+        if 'file' in request.FILES:
+            try:
+                rows = csv.DictReader(io.TextIOWrapper(request.FILES['file'], encoding='utf-8-sig'))
+                lines = [
+                    {field: value.strip() for field, value in row.items() if field and value and value.strip()}
+                    for row in rows
+                ]
+            except (UnicodeDecodeError, csv.Error) as e:
+                return Response({"error": f"Unreadable CSV: {e}"}, status=400)
+        else:
+            lines = request.data if isinstance(request.data, list) else request.data.get('lines')
+
+        serializer = BulkReceivingSerializer(data={'lines': lines})
+        serializer.is_valid(raise_exception=True)
+        lines = serializer.validated_data['lines']
+
+        warehouse = Site.objects.filter(is_warehouse=True).first()
+        if not warehouse:
+            return Response({"error": "Warehouse site not configured."}, status=500)
+
+        inventories = receive_lines(warehouse, lines, request.user)
+        return Response({
+            "message": f"{sum(line['quantity'] for line in lines)} units across {len(lines)} lines received into warehouse.",
+            "lines": len(lines),
+            "batches": [
+                {"inventory_id": inventory.id, "product": inventory.product_id,
+                 "batch_number": inventory.batch_number, "current_quantity": inventory.quantity}
+                for inventory in inventories
+            ],
+        }, status=200)
+
 class WarehouseReceivingDocumentPDFView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -829,94 +1148,110 @@ class GenerateTransferReceiptAPIView(APIView):
         p.save()
         return response
     
-class ReceiveTransferAPIView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request, transfer_id):
-        try:
-            transfer = StockTransfer.objects.get(id=transfer_id, to_branch=request.user.branch)
-        except StockTransfer.DoesNotExist:
-            return Response({"error": "Transfer not found"}, status=404)
-
-        if transfer.transfer_status != 'IN_TRANSIT':
-            return Response({"error": "Already received or invalid state"}, status=400)
-
-        # Decrease warehouse inventory
-        from_inventory = Inventory.objects.filter(
+def take_transfer_stock(transfer, allocations, user, status=None):
+    """
+    Take FEFO-allocated batches out of the transfer's source branch and log
+    one movement and inventory version per batch. Returns False, without
+    writing anything, if the stock is no longer there.
+    """
+    if not Inventory.objects.reserve({batch.id: units for batch, units in allocations}):
+        return False
+    versioned_cache.bump('inventory', transfer.from_branch_id)
+    stock_summary.touch(transfer.product_id)
+
+    movements = StockMovement.objects.bulk_create([
+        StockMovement(
             product=transfer.product,
-            branch=transfer.from_branch
-        ).order_by('-updated_at').first()
-
-        if not from_inventory:
-            return Response({"error": "Source inventory not found"}, status=404)
-
-        prev_from_qty = from_inventory.quantity
-        if prev_from_qty < transfer.quantity:
-            return Response({"error": "Source branch has insufficient stock"}, status=400)
-
-        # Decrease stock via logic, but record positive quantity
-        from_inventory.adjust_quantity(-transfer.quantity)
-
-        sm_out = StockMovement.objects.create(
-            product=transfer.product,
-            branch=from_inventory.branch,
+            branch=transfer.from_branch,
             movement_type='TRANSFER',
-            quantity=transfer.quantity,  # ✅ now POSITIVE
-            details=f"Dispatched to {transfer.to_branch.name}",
+            quantity=units,
+            details=f"Dispatched to {transfer.to_branch.name}. Batch: {batch.batch_number or 'N/A'}",
+            status=status,
             linked_transfer=transfer
         )
-
-        InventoryVersion.objects.create(
-            inventory=from_inventory,
-            previous_quantity=prev_from_qty,
-            new_quantity=from_inventory.quantity,
-            modified_by=request.user,
-            stock_movement=sm_out
+        for batch, units in allocations
+    ])
+    InventoryVersion.objects.bulk_create([
+        InventoryVersion(
+            inventory=batch,
+            previous_quantity=batch.quantity,
+            new_quantity=batch.quantity - units,
+            modified_by=user,
+            stock_movement=movement
         )
+        for (batch, units), movement in zip(allocations, movements)
+    ])
+    ledger.record((batch, -units, movement) for (batch, units), movement in zip(allocations, movements))
+    return True
 
-        # Increase inventory at destination
-        to_inventory, _ = Inventory.objects.get_or_create(
-            product=transfer.product,
-            branch=transfer.to_branch,
-            defaults={"quantity": 0}
-        )
-        prev_qty = to_inventory.quantity
-        to_inventory.adjust_quantity(transfer.quantity)
 
-        sm_in = StockMovement.objects.create(
-            product=transfer.product,
-            branch=to_inventory.branch,
-            movement_type='TRANSFER',
-            quantity=transfer.quantity,
-            details=f"Received from {transfer.from_branch.name}",
-            linked_transfer=transfer
-        )
+class ReceiveTransferAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        InventoryVersion.objects.create(
-            inventory=to_inventory,
-            previous_quantity=prev_qty,
-            new_quantity=to_inventory.quantity,
-            modified_by=request.user,
-            stock_movement=sm_in
-        )
+    def post(self, request, transfer_id):
+        with transaction.atomic():
+            try:
+                transfer = StockTransfer.objects.select_for_update().get(id=transfer_id, to_branch=request.user.branch)
+            except StockTransfer.DoesNotExist:
+                return Response({"error": "Transfer not found"}, status=404)
+
+            if transfer.transfer_status != 'IN_TRANSIT':
+                return Response({"error": "Already received or invalid state"}, status=400)
+
+            # Warehouse dispatches take their batches out up front; approved
+            # requests are allocated from the source branch on receipt
+            dispatched = list(
+                InventoryVersion.objects.select_related('inventory', 'stock_movement')
+                .filter(stock_movement__linked_transfer=transfer, stock_movement__status='IN_TRANSIT')
+            )
+            if dispatched:
+                allocations = [(version.inventory, version.stock_movement.quantity) for version in dispatched]
+                StockMovement.objects.filter(
+                    id__in=[version.stock_movement_id for version in dispatched]
+                ).update(status='CONFIRMED')
+            else:
+                try:
+                    allocations = Inventory.objects.allocate(
+                        transfer.from_branch, {transfer.product_id: transfer.quantity}
+                    )[transfer.product_id]
+                except InsufficientStock:
+                    return Response({"error": "Source branch has insufficient stock"}, status=400)
+
+                if not take_transfer_stock(transfer, allocations, request.user):
+                    return Response({"error": "Source branch has insufficient stock"}, status=400)
+
+            # Increase inventory at destination, keeping batch numbers and expiry
+            receive_lines(
+                transfer.to_branch,
+                [
+                    {
+                        'product': transfer.product,
+                        'quantity': units,
+                        'batch_number': from_inventory.batch_number,
+                        'expiration_date': from_inventory.expiration_date,
+                    }
+                    for from_inventory, units in allocations
+                ],
+                request.user,
+                details=f"Received from {transfer.from_branch.name}.",
+                movement_type='TRANSFER',
+                linked_transfer=transfer,
+            )
 
-        transfer.transfer_status = 'RECEIVED'
-        transfer.received_by = request.user
-        transfer.received_at = timezone.now()
-        transfer.save()
+            transfer.transfer_status = 'RECEIVED'
+            transfer.received_by = request.user
+            transfer.received_at = timezone.now()
+            transfer.save()
 
-        # Notify sender admin
-        try:
-            admin_user = User.objects.get(branch=transfer.from_branch, role='Admin')
-            Notification.objects.create(
-                recipient=admin_user,
-                sender=request.user,
-                related_object_id=transfer.id,
-                notification_type='SYSTEM',
-                title="Dispatch Received",
-                message=f"{transfer.product.name} was received at {transfer.to_branch.name}."
-            )
-        except User.DoesNotExist:
+        # Notify the sending branch's admins
+        if not notify_roles(
+            ['Admin'], [transfer.from_branch],
+            sender=request.user,
+            related_object_id=transfer.id,
+            notification_type='SYSTEM',
+            title="Dispatch Received",
+            message=f"{transfer.product.name} was received at {transfer.to_branch.name}."
+        ):
             logger.warning(f"No Admin user found at branch {transfer.from_branch.name} to notify about transfer {transfer.id}")
 
         return Response({"message": "Transfer received successfully"})
@@ -939,43 +1274,62 @@ class WarehouseDispatchAPIView(APIView):
         try:
             product = Product.objects.get(id=product_id)
             destination = Site.objects.get(id=destination_id)
-            warehouse = request.user.branch
-            from_inventory = Inventory.objects.filter(product=product, branch=warehouse).order_by('-updated_at').first()
-            if not from_inventory:
-                return Response({"error": "No inventory record found"}, status=404)
         except (Product.DoesNotExist, Site.DoesNotExist):
             return Response({"error": "Invalid product or destination"}, status=404)
+        warehouse = request.user.branch
+
+        with transaction.atomic():
+            try:
+                allocations = Inventory.objects.allocate(warehouse, {product.id: quantity})[product.id]
+            except InsufficientStock as e:
+                if not e.available:
+                    return Response({"error": "No inventory record found"}, status=404)
+                return Response({"error": "Insufficient stock"}, status=400)
+
+            # Create transfer record
+            transfer = StockTransfer.objects.create(
+                from_branch=warehouse,
+                to_branch=destination,
+                product=product,
+                quantity=quantity,
+                transfer_status='IN_TRANSIT',
+                is_warehouse_initiated=True,
+                approved=True,
+                processed_by=request.user,
+                processed_at=timezone.now(),
+                details=notes
+            )
 
-        if from_inventory.quantity < quantity:
-            return Response({"error": "Insufficient stock"}, status=400)
-
-        # Create transfer record
-        transfer = StockTransfer.objects.create(
-            from_branch=warehouse,
-            to_branch=destination,
-            product=product,
-            quantity=quantity,
-            transfer_status='IN_TRANSIT',
-            is_warehouse_initiated=True,
-            approved=True,
-            processed_by=request.user,
-            processed_at=timezone.now(),
-            details=notes
+            # The allocated batches leave the warehouse now and stay in
+            # transit until the branch confirms receipt
+            if not take_transfer_stock(transfer, allocations, request.user, status='IN_TRANSIT'):
+                transaction.set_rollback(True)
+                return Response({"error": "Insufficient stock"}, status=400)
+
+        # Notify the receiving branch's admins
+        notify_roles(
+            ['Admin'], [destination],
+            sender=request.user,
+            notification_type='TRANSFER_APPROVAL',
+            related_branch=warehouse,
+            related_object_id=transfer.id,
+            title=f"Dispatch Incoming: {product.name}",
+            message=f"{quantity}x {product.name} has been dispatched to your branch.",
         )
 
-        # Send notification to receiving branch admin
-        if hasattr(destination, 'admin_user'):
-            Notification.objects.create(
-                recipient=destination.admin_user,
-                sender=request.user,
-                notification_type='TRANSFER_APPROVAL',
-                related_branch=warehouse,
-                related_object_id=transfer.id,
-                title=f"Dispatch Incoming: {product.name}",
-                message=f"{quantity}x {product.name} has been dispatched to your branch.",
-            )
-
-        return Response({"message": "Dispatch successful", "transfer_id": transfer.id})
+        return Response({
+            "message": "Dispatch successful",
+            "transfer_id": transfer.id,
+            "allocations": [
+                {
+                    "inventory_id": batch.id,
+                    "batch_number": batch.batch_number,
+                    "expiration_date": batch.expiration_date,
+                    "quantity": units,
+                }
+                for batch, units in allocations
+            ],
+        })
 
 class DispatchDocumentAPIView(APIView):
     permission_classes = [IsCEO]
@@ -1010,6 +1364,87 @@ class InTransitTransfersAPIView(APIView):
         transfers = StockTransfer.objects.filter(
             to_branch=request.user.branch,
             transfer_status='IN_TRANSIT'
-        )
+        ).select_related(*TRANSFER_RELATED)
         serializer = StockTransferSerializer(transfers, many=True)
         return Response(serializer.data)
+
+
+DOCUMENT_RELATED = ('from_branch', 'to_branch', 'dispatched_by', 'received_by')
+
+
+class TransferDocumentDispatchAPIView(APIView):
+    """
+    Dispatch many products from the CEO's site to another in one
+    document: {"destination_id", "notes", "lines": [{"product_id",
+    "quantity"}, ...]}. All lines are allocated and taken out together,
+    or none are.
+    """
+    permission_classes = [IsAuthenticated, IsCEO]
+
+    def post(self, request):
+        serializer = TransferDocumentDispatchSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            dispatched = transfers.dispatch(
+                request.user.branch, data['destination_id'], data['lines'], request.user, notes=data['notes'],
+            )
+        except InsufficientStock as e:
+            return Response({
+                "error": "Insufficient stock",
+                "product_id": e.product_id,
+                "requested": e.requested,
+                "available": e.available,
+            }, status=400)
+        if dispatched is None:
+            return Response({"error": "Insufficient stock"}, status=400)
+
+        document, allocations = dispatched
+        return Response({
+            "message": "Dispatch successful",
+            "document_id": document.id,
+            "allocations": [
+                {
+                    "inventory_id": batch.id,
+                    "product": batch.product_id,
+                    "batch_number": batch.batch_number,
+                    "expiration_date": batch.expiration_date,
+                    "quantity": units,
+                }
+                for batch, units in allocations
+            ],
+        }, status=201)
+
+
+class TransferDocumentDetailAPIView(generics.RetrieveAPIView):
+    serializer_class = TransferDocumentSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        documents = TransferDocument.objects.select_related(*DOCUMENT_RELATED).prefetch_related('lines__product')
+        user = self.request.user
+        if user.role == 'CEO':
+            return documents
+        return documents.filter(Q(from_branch=user.branch) | Q(to_branch=user.branch))
+
+
+class TransferDocumentReceiveAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, document_id):
+        with transaction.atomic():
+            try:
+                document = TransferDocument.objects.select_for_update().get(id=document_id, to_branch=request.user.branch)
+            except TransferDocument.DoesNotExist:
+                return Response({"error": "Transfer document not found"}, status=404)
+
+            if document.status != 'IN_TRANSIT':
+                return Response({"error": "Already received or invalid state"}, status=400)
+
+            inventories = transfers.receive(document, request.user)
+
+        return Response({
+            "message": "Transfer document received successfully",
+            "batches": len(inventories),
+        })
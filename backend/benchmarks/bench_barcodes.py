@@ -0,0 +1,79 @@
+"""
+Barcode lookups per second: cold (database) vs hot (per-process LRU) for
+products.barcodes.lookup, and through the by-code endpoint.
+
+    python manage.py test benchmarks.bench_barcodes
+"""
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from tabulate import tabulate
+from accounts.models import User
+from inventory.models import Inventory
+from products import barcodes
+from products.models import Product, ProductCode
+from sites.models import Site
+
+CODES = 5_000
+
+
+class BarcodeBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Site.objects.create(name="Branch")
+        cls.user = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=cls.branch,
+        )
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50")) for i in range(CODES)
+        ])
+        ProductCode.objects.bulk_create([
+            ProductCode(code=f"{6_000_000_000_000 + product.id:014d}", product=product) for product in products
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=cls.branch, quantity=100) for product in products
+        ])
+        cls.codes = list(ProductCode.objects.values_list('code', flat=True))
+
+    def measure(self, scan):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            for code in self.codes:
+                scan(code)
+            elapsed = time.perf_counter() - start
+        return [f"{len(self.codes) / elapsed:,.0f}", f"{queries / len(self.codes):.1f}"]
+
+    def test_lookups_per_second(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        def lookup(code):
+            barcodes.lookup(code, self.branch.id)
+
+        def endpoint(code):
+            client.get(f'/api/v1/products/by-code/{code}/')
+
+        rows = [
+            ['lookup(), cold', *self.measure(lookup)],
+            ['lookup(), hot', *self.measure(lookup)],
+        ]
+        cache.clear()  # New versions: every entry goes stale
+        rows += [
+            ['GET by-code, cold', *self.measure(endpoint)],
+            ['GET by-code, hot', *self.measure(endpoint)],
+        ]
+
+        print()
+        print(tabulate(rows, headers=['path', 'lookups/s', 'queries/lookup'], tablefmt="github"))
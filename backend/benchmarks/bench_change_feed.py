@@ -0,0 +1,82 @@
+"""
+Keeping a client mirror fresh: bytes and queries for the first full pull
+through the change feed vs a refresh after a few sales and edits.
+
+    python manage.py test benchmarks.bench_change_feed
+"""
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from tabulate import tabulate
+from accounts.models import Customer, User
+from inventory.models import Inventory
+from products.models import Product
+from sites.models import Site
+
+PRODUCTS = 10_000
+CUSTOMERS = 5_000
+SALES = 20
+
+
+@override_settings(CHANGE_FEED_PAGE_SIZE=5000)
+class ChangeFeedBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sites = [Site.objects.create(name=f"Branch {i}") for i in range(20)]
+        cls.branch = sites[0]
+        cls.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=cls.branch,
+        )
+        for i in range(CUSTOMERS):
+            Customer.objects.create(first_name=f"Customer {i}", last_name="Mensah", phone_number=f"024{i:07d}")
+        for i in range(PRODUCTS):
+            product = Product.objects.create(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50"))
+            if i % 2 == 0:
+                Inventory.objects.create(product=product, branch=cls.branch, quantity=1000, threshold_quantity=0)
+        cls.products = list(Product.objects.order_by('pk')[:SALES])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def pull(self, since):
+        """Follow the feed from ``since`` to its end: (next, pages, bytes, queries, seconds)."""
+        queries = pages = size = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            while True:
+                res = self.client.get('/api/v1/sync/changes/', {"since": since})
+                pages, size, since = pages + 1, size + len(res.content), res.data["next"]
+                if not res.data["more"]:
+                    break
+            elapsed = time.perf_counter() - start
+        return since, pages, size, queries, elapsed
+
+    def test_full_pull_vs_refresh(self):
+        since, *full = self.pull(0)
+        for product in self.products:
+            self.client.post('/api/v1/sales/', {
+                "branch": self.branch.id, "payment_method": "CASH", "total_amount": "2.50",
+                "items": [{"product": product.id, "quantity": 1, "price_at_sale": "2.50"}],
+            }, format='json')
+        self.products[0].unit_price = Decimal("2.75")
+        self.products[0].save()
+        _, *refresh = self.pull(since)
+
+        rows = [
+            [label, pages, f"{size / 1024:,.1f}", queries, f"{elapsed * 1000:.0f}"]
+            for label, (pages, size, queries, elapsed) in (("full pull", full), (f"refresh after {SALES} sales", refresh))
+        ]
+        print()
+        print(tabulate(rows, headers=['pull', 'pages', 'KiB', 'queries', 'ms'], tablefmt="github"))
@@ -0,0 +1,67 @@
+"""
+Round trips per checkout, legacy per-line loop vs the batched checkout engine.
+
+    python manage.py test benchmarks.bench_checkout
+"""
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from tabulate import tabulate
+from inventory.models import Inventory, StockMovement
+from products.models import Product
+from sales.checkout import checkout_items
+from sales.models import Sale, SaleItem
+from sites.models import Site
+
+BASKET_SIZES = [1, 5, 10, 20, 40]
+
+
+def legacy_checkout_items(sale, items_data):
+    # The per-line loop SaleSerializer.create used before the batched engine
+    for item_data in items_data:
+        product = item_data['product']
+        quantity = item_data['quantity']
+        inventory_item = Inventory.objects.filter(product=product, branch=sale.branch).first()
+        inventory_item.quantity -= quantity
+        inventory_item.save()
+        StockMovement.objects.create(
+            product=product,
+            branch=sale.branch,
+            movement_type='REMOVE',
+            quantity=quantity,
+            details=f"Sold via {sale.payment_method}"
+        )
+        SaleItem.objects.create(sale=sale, product=product, quantity=quantity, price_at_sale=item_data['price_at_sale'])
+
+
+class CheckoutBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Site.objects.create(name="Branch")
+        cls.products = [
+            Product.objects.create(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50"))
+            for i in range(max(BASKET_SIZES))
+        ]
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=cls.branch, quantity=10_000) for product in cls.products
+        ])
+
+    def round_trips(self, engine, size):
+        items_data = [
+            {'product': product, 'quantity': 1, 'price_at_sale': product.unit_price}
+            for product in self.products[:size]
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                sale = Sale.objects.create(branch=self.branch, payment_method='CASH', total_amount=Decimal(size))
+                engine(sale, items_data)
+        return len(ctx.captured_queries)
+
+    def test_round_trips_per_basket_size(self):
+        rows = [
+            [size, self.round_trips(legacy_checkout_items, size), self.round_trips(checkout_items, size)]
+            for size in BASKET_SIZES
+        ]
+        print()
+        print(tabulate(rows, headers=['basket lines', 'legacy queries', 'batched queries'], tablefmt="github"))
@@ -0,0 +1,79 @@
+"""
+Polling read-heavy endpoints that have not changed: a full 200 response
+vs a 304 answered from the ETag. Queries, bytes and time per poll.
+
+    python manage.py test benchmarks.bench_conditional_get
+"""
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from tabulate import tabulate
+from accounts.models import User
+from inventory.models import Inventory
+from products.models import Product
+from sites.models import Site
+
+POLLS = 50
+ENDPOINTS = [
+    '/api/v1/products/',
+    '/api/v1/inventory/',
+    '/api/v1/sites/',
+    '/api/v1/dashboard/statistics/',
+    '/api/v1/dashboard/expiry-list/',
+]
+
+
+class ConditionalGetBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Site.objects.create(name="Branch")
+        cls.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=cls.branch,
+        )
+        products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50")) for i in range(2000)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=cls.branch, quantity=100) for product in products
+        ])
+
+    def poll(self, client, url, headers):
+        queries = size = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            for _ in range(POLLS):
+                res = client.get(url, **headers)
+                size += len(res.content)
+            elapsed = time.perf_counter() - start
+        return res.status_code, queries / POLLS, size / POLLS, elapsed / POLLS * 1000
+
+    def test_unchanged_polls(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+
+        rows = []
+        for url in ENDPOINTS:
+            etag = client.get(url)["ETag"]
+            full = self.poll(client, url, {})
+            conditional = self.poll(client, url, {"HTTP_IF_NONE_MATCH": etag})
+            rows.append([
+                url,
+                full[0], f"{full[1]:.1f}", f"{full[2]:,.0f}", f"{full[3]:.2f}",
+                conditional[0], f"{conditional[1]:.1f}", f"{conditional[2]:,.0f}", f"{conditional[3]:.2f}",
+            ])
+
+        print()
+        print(tabulate(rows, headers=[
+            'endpoint', 'status', 'queries', 'bytes', 'ms', 'status', 'queries', 'bytes', 'ms',
+        ], tablefmt="github"))
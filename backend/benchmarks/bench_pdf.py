@@ -0,0 +1,82 @@
+"""
+Receipt throughput, rendering inside the request (the old GenerateReceiptAPIView)
+vs the render queue: what a request thread pays for a first and a repeat
+receipt, and how many receipts one render worker turns out per second.
+
+    python manage.py test benchmarks.bench_pdf
+"""
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from tabulate import tabulate
+from apis.utils import generate_pdf
+from products.models import Product
+from sales.models import Sale, SaleItem
+from sites.models import Site
+
+RECEIPTS = 40
+LINES_PER_RECEIPT = 8
+
+STORE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PDF_STORE_DIR=STORE_DIR)
+class ReceiptRenderBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        branch = Site.objects.create(name="Branch")
+        products = [
+            Product.objects.create(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50"))
+            for i in range(LINES_PER_RECEIPT)
+        ]
+        cls.sales = []
+        for _ in range(RECEIPTS):
+            sale = Sale.objects.create(branch=branch, payment_method='CASH', total_amount=Decimal("20.00"))
+            SaleItem.objects.bulk_create([
+                SaleItem(sale=sale, product=product, quantity=1, price_at_sale=product.unit_price) for product in products
+            ])
+            cls.sales.append(sale)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STORE_DIR, ignore_errors=True)
+
+    def timed(self, fn):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    def sync_receipts(self):
+        for sale in self.sales:
+            items = SaleItem.objects.filter(sale=sale).select_related('product')
+            generate_pdf('receipt_template.html', {'sale': sale, 'items': items})
+
+    def queued_receipts(self, expect):
+        client = APIClient()
+        for sale in self.sales:
+            res = client.get(f'/api/v1/receipts/{sale.id}/')
+            self.assertEqual(res.status_code, expect)
+
+    def test_receipt_throughput(self):
+        sync_first = self.timed(self.sync_receipts)
+        sync_repeat = self.timed(self.sync_receipts)
+
+        queued_first = self.timed(lambda: self.queued_receipts(202))
+        worker = self.timed(lambda: call_command('render_pdfs', '--once', '--batch-size', '20', stdout=StringIO()))
+        queued_repeat = self.timed(lambda: self.queued_receipts(200))
+
+        ms = lambda seconds: round(seconds * 1000 / RECEIPTS, 2)
+        rows = [
+            ['sync (render in request)', ms(sync_first), ms(sync_repeat), round(RECEIPTS / sync_first, 1)],
+            ['queued + store', ms(queued_first), ms(queued_repeat), round(RECEIPTS / worker, 1)],
+        ]
+        print()
+        print(tabulate(rows, headers=[
+            'path', 'request ms (first)', 'request ms (repeat)', 'receipts/s per worker',
+        ], tablefmt="github"))
@@ -0,0 +1,108 @@
+"""
+Flushing N sales a terminal queued while offline: N POSTs to /sales/ vs
+one /sales/sync/ upload, and the same upload retried (every sale a
+duplicate). Queries and wall time for each.
+
+    python manage.py test benchmarks.bench_pos_sync
+"""
+import random
+import time
+import uuid
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from tabulate import tabulate
+from accounts.models import Customer, User
+from inventory.models import Inventory
+from products.models import Product
+from sites.models import Site
+
+QUEUE_SIZES = [10, 100, 500]
+BASKET_SIZE = 3
+
+
+class PosSyncBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Site.objects.create(name="Branch")
+        cls.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=cls.branch,
+        )
+        cls.customers = Customer.objects.bulk_create([
+            Customer(first_name=f"Customer {i}", phone_number=f"024{i:07d}") for i in range(50)
+        ])
+        cls.products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50")) for i in range(200)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=cls.branch, batch_number=batch, quantity=100_000, threshold_quantity=0)
+            for product in cls.products
+            for batch in ("A", "B")
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def queue(self, size, rng):
+        sales = []
+        for _ in range(size):
+            products = rng.sample(self.products, BASKET_SIZE)
+            sales.append({
+                "client_id": str(uuid.uuid4()),
+                "payment_method": "CASH",
+                "total_amount": "7.50",
+                "customer_id": rng.choice(self.customers).id,
+                "items": [{"product_id": product.id, "quantity": 1, "price_at_sale": "2.50"} for product in products],
+            })
+        return sales
+
+    def one_by_one(self, sales):
+        for sale in sales:
+            self.client.post('/api/v1/sales/', {
+                "branch": self.branch.id,
+                "customer": sale["customer_id"],
+                "payment_method": sale["payment_method"],
+                "total_amount": sale["total_amount"],
+                "items": [
+                    {"product": item["product_id"], "quantity": item["quantity"], "price_at_sale": item["price_at_sale"]}
+                    for item in sale["items"]
+                ],
+            }, format='json')
+
+    def upload(self, sales):
+        self.client.post('/api/v1/sales/sync/', {"branch": self.branch.id, "sales": sales}, format='json')
+
+    def measure(self, flush, sales):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            flush(sales)
+            elapsed = time.perf_counter() - start
+        return queries, f"{elapsed:.2f}"
+
+    def test_queue_sizes(self):
+        rng = random.Random(3)
+        self.upload([])  # First sync: the full catalog, outside the measurements
+        rows = []
+        for size in QUEUE_SIZES:
+            single = self.measure(self.one_by_one, self.queue(size, rng))
+            sales = self.queue(size, rng)
+            batch = self.measure(self.upload, sales)
+            retry = self.measure(self.upload, sales)
+            rows.append([size, *single, *batch, *retry])
+
+        print()
+        print(tabulate(rows, headers=[
+            'sales', 'POST /sales/ queries', 'seconds', 'sync queries', 'seconds', 'retry queries', 'seconds',
+        ], tablefmt="github"))
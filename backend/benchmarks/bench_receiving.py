@@ -0,0 +1,92 @@
+"""
+Receiving a supplier delivery, one request per line through the old
+WarehouseReceivingAPIView code vs one bulk receive_lines call: round trips
+and wall time for 1k- and 10k-line deliveries.
+
+    python manage.py test benchmarks.bench_receiving
+"""
+import time
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test import TestCase
+from tabulate import tabulate
+from accounts.models import User
+from inventory.models import Inventory, InventoryVersion, StockMovement
+from inventory.receiving import receive_lines
+from products.models import Product
+from sites.models import Site
+
+DELIVERY_SIZES = [1_000, 10_000]
+
+
+def legacy_receive(warehouse, line, user):
+    # The per-line body WarehouseReceivingAPIView ran before bulk receiving
+    with transaction.atomic():
+        inventory, _ = Inventory.objects.select_for_update().get_or_create(
+            product=line['product'],
+            branch=warehouse,
+            batch_number=line['batch_number'],
+            defaults={"quantity": 0, "expiration_date": line['expiration_date'], "received_by": user},
+        )
+        prev_qty = inventory.quantity
+        inventory.adjust_quantity(line['quantity'], expiration_date=line['expiration_date'], received_by=user)
+        sm = StockMovement.objects.create(
+            product=line['product'], branch=warehouse, movement_type='ADD', quantity=line['quantity'],
+            details=f"Warehouse received new stock. Batch: {line['batch_number']}",
+        )
+        InventoryVersion.objects.create(
+            inventory=inventory, previous_quantity=prev_qty, new_quantity=inventory.quantity,
+            modified_by=user, stock_movement=sm,
+        )
+
+
+class ReceivingBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        cls.user = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=cls.warehouse,
+        )
+        cls.products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50")) for i in range(1_000)
+        ])
+
+    def delivery(self, size, tag):
+        return [
+            {'product': self.products[i % len(self.products)], 'quantity': 12,
+             'batch_number': f"{tag}-{i // len(self.products)}", 'expiration_date': None}
+            for i in range(size)
+        ]
+
+    def measure(self, receive):
+        # CaptureQueriesContext caps its log at 9000 entries, so count directly
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            receive()
+            elapsed = time.perf_counter() - start
+        return queries, elapsed
+
+    def test_delivery_sizes(self):
+        rows = []
+        for size in DELIVERY_SIZES:
+            legacy_lines = self.delivery(size, f"L{size}")
+            legacy_queries, legacy_time = self.measure(
+                lambda: [legacy_receive(self.warehouse, line, self.user) for line in legacy_lines]
+            )
+            bulk_queries, bulk_time = self.measure(
+                lambda: receive_lines(self.warehouse, self.delivery(size, f"B{size}"), self.user)
+            )
+            rows.append([size, legacy_queries, f"{legacy_time:.2f}", bulk_queries, f"{bulk_time:.2f}"])
+
+        print()
+        print(tabulate(rows, headers=[
+            'delivery lines', 'per-line queries', 'per-line seconds', 'bulk queries', 'bulk seconds',
+        ], tablefmt="github"))
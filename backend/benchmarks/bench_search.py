@@ -0,0 +1,75 @@
+"""
+POS product lookup against a 100k-SKU catalog: the in-process search
+index (the non-PostgreSQL backend of core.search) vs the LIKE '%q%' scan
+it replaces. Index build time, then per-query latency for the top 20
+ranked by relevance and branch stock.
+
+    python manage.py test benchmarks.bench_search
+"""
+import random
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from tabulate import tabulate
+from inventory.models import Inventory
+from products.models import Product
+from products.search import search_products
+from sites.models import Site
+
+CATALOG_SIZE = 100_000
+RUNS = 20
+STEMS = [
+    "amoxicillin", "paracetamol", "ibuprofen", "metformin", "amlodipine", "ciprofloxacin", "omeprazole",
+    "artemether", "lumefantrine", "diclofenac", "azithromycin", "loratadine", "cetirizine", "salbutamol",
+    "prednisolone", "doxycycline", "metronidazole", "fluconazole", "losartan", "atorvastatin",
+]
+FORMS = ["tablets", "capsules", "syrup", "suspension", "injection", "cream", "drops"]
+BRANDS = ["GSK", "Pfizer", "Ernest Chemists", "Kinapharma", "Tobinco", "Danadams", "Letap", "M&G"]
+QUERIES = ["amox", "paracetamol 500", "ibuprofin", "metformin 850 tab", "gsk cipro", "zzz"]
+
+
+class SearchBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        cls.branch = Site.objects.create(name="Branch")
+        products = Product.objects.bulk_create([
+            Product(
+                name=f"{rng.choice(STEMS).title()} {rng.choice([5, 50, 100, 250, 400, 500, 850, 1000])}mg "
+                     f"{rng.choice(FORMS)} x{rng.randint(1, 100)} #{i}",
+                brand=rng.choice(BRANDS), category="Drugs", unit_price=Decimal("1.00"),
+            )
+            for i in range(CATALOG_SIZE)
+        ], batch_size=5000)
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=cls.branch, quantity=rng.randint(1, 200))
+            for product in rng.sample(products, CATALOG_SIZE // 4)
+        ], batch_size=5000)
+
+    def timed(self, run):
+        timings = []
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return result, timings[len(timings) // 2], timings[-1]
+
+    def test_lookup_latency(self):
+        cache.clear()
+        start = time.perf_counter()
+        search_products("warm up", self.branch.id)  # Builds this process's index
+        build = time.perf_counter() - start
+
+        rows = []
+        for query in QUERIES:
+            results, median, worst = self.timed(lambda: search_products(query, self.branch.id))
+            _, scan_median, _ = self.timed(lambda: list(Product.objects.filter(name__icontains=query)[:20]))
+            rows.append([query, len(results), f"{median:.1f}", f"{worst:.1f}", f"{scan_median:.1f}"])
+
+        print()
+        print(f"Index built over {CATALOG_SIZE} products in {build:.2f}s")
+        print(tabulate(rows, headers=[
+            'query', 'results', 'index p50 ms', 'index max ms', 'icontains p50 ms',
+        ], tablefmt="github"))
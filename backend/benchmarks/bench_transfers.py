@@ -0,0 +1,101 @@
+"""
+Restocking a branch with N products: N single-product warehouse
+dispatches and receipts vs one transfer document of N lines, through the
+API. Round trips, wall time and notifications for each.
+
+    python manage.py test benchmarks.bench_transfers
+"""
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from tabulate import tabulate
+from accounts.models import User
+from inventory.models import Inventory, Notification
+from products.models import Product
+from sites.models import Site
+
+DOCUMENT_SIZES = [1, 10, 80, 250]
+
+
+class TransferBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        cls.branch = Site.objects.create(name="Branch")
+        cls.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=cls.warehouse,
+        )
+        cls.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=cls.branch,
+        )
+        User.objects.create(
+            email="admin@warehouse.com", first_name="Warehouse", last_name="Admin",
+            phone_number="0200000002", role="Admin", branch=cls.warehouse,
+        )
+        cls.products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("2.50"))
+            for i in range(max(DOCUMENT_SIZES))
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=cls.warehouse, batch_number="W1", quantity=10_000, threshold_quantity=0)
+            for product in cls.products
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.ceo_client = APIClient()
+        self.ceo_client.force_authenticate(user=self.ceo)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(user=self.admin)
+
+    def single_transfers(self, products):
+        for product in products:
+            res = self.ceo_client.post('/api/v1/warehouse/dispatch/', {
+                "product_id": product.id, "quantity": 20, "destination_id": self.branch.id,
+            }, format='json')
+            self.admin_client.post(f'/api/v1/warehouse/receive-transfer/{res.data["transfer_id"]}/')
+
+    def one_document(self, products):
+        res = self.ceo_client.post('/api/v1/transfer-documents/', {
+            "destination_id": self.branch.id,
+            "lines": [{"product_id": product.id, "quantity": 20} for product in products],
+        }, format='json')
+        self.admin_client.post(f'/api/v1/transfer-documents/{res.data["document_id"]}/receive/')
+
+    def measure(self, restock, products):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        notified = Notification.objects.count()
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            restock(products)
+            elapsed = time.perf_counter() - start
+        return queries, elapsed, Notification.objects.count() - notified
+
+    def test_document_sizes(self):
+        rows = []
+        for size in DOCUMENT_SIZES:
+            products = self.products[:size]
+            single = self.measure(self.single_transfers, products)
+            document = self.measure(self.one_document, products)
+            rows.append([
+                size,
+                single[0], f"{single[1]:.2f}", single[2],
+                document[0], f"{document[1]:.2f}", document[2],
+            ])
+
+        print()
+        print(tabulate(rows, headers=[
+            'products', 'single queries', 'single seconds', 'single notifications',
+            'document queries', 'document seconds', 'document notifications',
+        ], tablefmt="github"))
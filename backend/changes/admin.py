@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Change
+
+
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    list_display = ['sequence', 'entity', 'object_id', 'branch_id', 'deleted', 'created_at']
+    list_filter = ['entity', 'deleted']
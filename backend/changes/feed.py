@@ -0,0 +1,94 @@
+"""
+Change feed for client-side mirrors of products, branch stock, sites and
+customers.
+
+Every write to a mirrored row appends a Change: plain saves and deletes
+through signals, and stock writes made with UPDATE or bulk_create
+(checkout, transfers, receiving) through inventory.ledger.record, which
+sees each of them already. ``read`` returns the latest change per row
+after a sequence, tombstones included, and the sequence to ask from next.
+
+Clients sync from ``Change.sequence``, not the id: ids are handed out at
+insert but become visible at commit, so a slow transaction could commit a
+lower id after a higher one was served. Sequences are handed out only to
+changes that have already committed (``number``, run before each read),
+in order and under a lock held until they are visible, so nothing can
+ever appear beneath a sequence that was served.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from .models import Change, ChangeSequence
+
+ENTITIES = [entity for entity, _ in Change.ENTITY_CHOICES]
+NUMBER_BATCH_SIZE = 1000
+
+
+def record(entity, rows, deleted=False):
+    """Append a change for each (object_id, branch_id) in ``rows``."""
+    now = timezone.now()
+    return Change.objects.bulk_create([
+        Change(entity=entity, object_id=object_id, branch_id=branch_id, deleted=deleted, created_at=now)
+        for object_id, branch_id in rows
+    ])
+
+
+def number():
+    """
+    Give the committed changes without a sequence the next ones, in id
+    order. Returns how many were numbered.
+    """
+    if not Change.objects.filter(sequence__isnull=True).exists():
+        return 0
+    with transaction.atomic():
+        counter, _ = ChangeSequence.objects.select_for_update().get_or_create(pk=1)
+        pending = list(Change.objects.filter(sequence__isnull=True).order_by('id').only('id'))
+        for position, change in enumerate(pending, start=1):
+            change.sequence = counter.last + position
+        Change.objects.bulk_update(pending, ['sequence'], batch_size=NUMBER_BATCH_SIZE)
+        counter.last += len(pending)
+        counter.save(update_fields=['last'])
+    return len(pending)
+
+
+def read(since, branch_id=None, limit=None):
+    """
+    The changes after sequence ``since``, at most ``limit`` of them
+    (CHANGE_FEED_PAGE_SIZE), with stock changes limited to ``branch_id``
+    when given. Returns ({entity: {object_id: deleted}}, next sequence,
+    whether more changes are waiting).
+    """
+    limit = limit or settings.CHANGE_FEED_PAGE_SIZE
+    number()
+    changes = Change.objects.filter(sequence__gt=since)
+    if branch_id is not None:
+        changes = changes.filter(Q(branch_id__isnull=True) | Q(branch_id=branch_id))
+    page = list(changes.order_by('sequence').values_list('sequence', 'entity', 'object_id', 'deleted')[:limit + 1])
+
+    latest = {entity: {} for entity in ENTITIES}
+    sequence = since
+    for position, (change_sequence, entity, object_id, deleted) in enumerate(page):
+        if position == limit:
+            return latest, sequence, True
+        latest[entity][object_id] = deleted
+        sequence = change_sequence
+    return latest, sequence, False
+
+
+def compact(before=None):
+    """
+    Delete the numbered changes superseded by a later one for the same
+    row, up to ``before`` (default: all of them). Readers lose nothing:
+    they still get the latest change of every row. Returns the number
+    deleted.
+    """
+    numbered = Change.objects.filter(sequence__isnull=False)
+    if before is not None:
+        numbered = numbered.filter(created_at__lte=before)
+    deleted = 0
+    for entity in ENTITIES:
+        latest = numbered.filter(entity=entity).values('object_id').annotate(latest=Max('sequence')).values('latest')
+        superseded = numbered.filter(entity=entity).exclude(sequence__in=latest)
+        deleted += superseded.delete()[0]
+    return deleted
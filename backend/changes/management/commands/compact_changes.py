@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from changes.feed import compact
+
+
+class Command(BaseCommand):
+    help = "Delete change feed entries superseded by a later change to the same row. Run nightly."
+
+    def handle(self, *args, **options):
+        deleted = compact()
+        self.stdout.write(self.style.SUCCESS(f"Compacted the change feed: {deleted} superseded changes deleted."))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 21:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('product', 'Product'), ('inventory', 'Inventory'), ('site', 'Site'), ('customer', 'Customer')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('branch_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['entity', 'object_id', 'id'], name='changes_cha_entity_e45470_idx'),
+        ),
+    ]
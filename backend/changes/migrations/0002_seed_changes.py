@@ -0,0 +1,43 @@
+from itertools import islice
+from django.db import migrations
+
+# One change per existing row, so a client mirroring from sequence 0 gets
+# everything that was written before the feed existed.
+MIRRORED = [
+    ('product', 'products', 'Product'),
+    ('inventory', 'inventory', 'Inventory'),
+    ('site', 'sites', 'Site'),
+    ('customer', 'accounts', 'Customer'),
+]
+BATCH_SIZE = 5000
+
+
+def seed(apps, schema_editor):
+    Change = apps.get_model('changes', 'Change')
+    for entity, app_label, model_name in MIRRORED:
+        model = apps.get_model(app_label, model_name)
+        fields = ['pk', 'branch_id'] if entity == 'inventory' else ['pk']
+        rows = model.objects.order_by('pk').values_list(*fields).iterator(chunk_size=BATCH_SIZE)
+        while batch := list(islice(rows, BATCH_SIZE)):
+            Change.objects.bulk_create([
+                Change(entity=entity, object_id=row[0], branch_id=row[1] if len(row) > 1 else None) for row in batch
+            ])
+
+
+def unseed(apps, schema_editor):
+    apps.get_model('changes', 'Change').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0001_initial'),
+        ('products', '0005_product_updated_at'),
+        ('inventory', '0017_inventory_branch_updated_idx'),
+        ('sites', '0001_initial'),
+        ('accounts', '0004_customer_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, unseed),
+    ]
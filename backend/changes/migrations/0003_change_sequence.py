@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-18 21:45
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+# Existing changes keep their id as their sequence, so cursors clients
+# already hold stay valid
+def number_existing(apps, schema_editor):
+    Change = apps.get_model('changes', 'Change')
+    Change.objects.update(sequence=F('id'))
+    last = Change.objects.aggregate(last=Max('id'))['last'] or 0
+    apps.get_model('changes', 'ChangeSequence').objects.create(last=last)
+
+
+def unnumber(apps, schema_editor):
+    apps.get_model('changes', 'ChangeSequence').objects.all().delete()
+    apps.get_model('changes', 'Change').objects.update(sequence=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('changes', '0002_seed_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='change',
+            name='changes_cha_entity_e45470_idx',
+        ),
+        migrations.AddField(
+            model_name='change',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing, unnumber),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['entity', 'object_id', 'sequence'], name='changes_cha_entity_ff2d3f_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Change(models.Model):
+    """
+    One write to a row that clients mirror; ``deleted`` makes the entry a
+    tombstone. Entries are appended in the writing transaction, so they
+    vanish if it rolls back. ``sequence``, which clients sync from, is
+    given once the entry has committed (see changes.feed).
+    """
+    ENTITY_CHOICES = [
+        ('product', 'Product'),
+        ('inventory', 'Inventory'),
+        ('site', 'Site'),
+        ('customer', 'Customer'),
+    ]
+
+    entity = models.CharField(max_length=10, choices=ENTITY_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    branch_id = models.PositiveBigIntegerField(null=True, blank=True)  # Inventory only; no FK so tombstones outlive the site
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    sequence = models.PositiveBigIntegerField(null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entity', 'object_id', 'sequence']),
+        ]
+
+    def __str__(self):
+        return f"#{self.sequence or '-'} {self.entity} {self.object_id}{' (deleted)' if self.deleted else ''}"
+
+
+class ChangeSequence(models.Model):
+    """The last sequence handed out. A single row, locked while handing out more."""
+    last = models.PositiveBigIntegerField(default=0)
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import Customer
+from inventory.models import Inventory
+from products.models import Product
+from sites.models import Site
+from . import feed
+
+MIRRORED = {Product: 'product', Inventory: 'inventory', Site: 'site', Customer: 'customer'}
+
+
+# Inventory saves are put on the feed by inventory.ledger.record_save
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Site)
+@receiver(post_save, sender=Customer)
+def record_change(sender, instance, **kwargs):
+    feed.record(MIRRORED[sender], [(instance.pk, getattr(instance, 'branch_id', None))])
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Inventory)
+@receiver(post_delete, sender=Site)
+@receiver(post_delete, sender=Customer)
+def record_tombstone(sender, instance, **kwargs):
+    feed.record(MIRRORED[sender], [(instance.pk, getattr(instance, 'branch_id', None))], deleted=True)
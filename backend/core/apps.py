@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.db.models import CharField, TextField
+
+        # Registered by django.contrib.postgres when installed; harmless elsewhere
+        CharField.register_lookup(TrigramWordSimilar)
+        TextField.register_lookup(TrigramWordSimilar)
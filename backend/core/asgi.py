@@ -2,6 +2,10 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Besides the Django app it serves the notification event stream
+(core.streams), which needs an ASGI server such as uvicorn:
+
+    uvicorn core.asgi:application --host 0.0.0.0 --port 8000
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +17,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+from core.streams import NotificationStreamRouter  # noqa: E402
+
+if settings.DEBUG:
+    # What runserver would do for the admin's static files
+    django_application = ASGIStaticFilesHandler(django_application)
+
+application = NotificationStreamRouter(django_application)
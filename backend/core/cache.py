@@ -0,0 +1,117 @@
+"""
+Generation-based cache invalidation.
+
+Every cached view declares which entity types it is derived from. Each
+(entity, branch) pair has a version counter that is folded into the cache
+key, so a write only has to bump a counter; every derived key of that
+branch goes stale at once and nothing else is touched. Network-wide ("all")
+views read the "all" counter, which every branch write bumps as well.
+
+The same counters validate HTTP conditional requests (see
+apis.mixins.ConditionalGetMixin): ``get_validators`` also returns when
+they were last bumped, for Last-Modified.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ENTITIES = ('sale', 'inventory', 'transfer', 'product', 'product_search', 'customer', 'site')
+
+# Bumped without a branch, so always read network-wide, whatever branch a view is for
+NETWORK_WIDE = ('product', 'product_search', 'customer')
+
+ALL_BRANCHES = 'all'
+
+
+def _version_key(entity, scope):
+    return f"cache_version:{entity}:{scope}"
+
+
+def _modified_key(entity, scope):
+    return f"cache_modified:{entity}:{scope}"
+
+
+def _initial_version():
+    # Never restart at a value a previous (evicted) counter may have used
+    return int(time.time() * 1000)
+
+
+def _scope(entity, branch_id):
+    return ALL_BRANCHES if entity in NETWORK_WIDE else branch_id or ALL_BRANCHES
+
+
+def get_versions(entities, branch_id=None):
+    """Current version of each entity for a branch (or network-wide)."""
+    keys = [_version_key(entity, _scope(entity, branch_id)) for entity in entities]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_validators(entities, branch_id=None):
+    """
+    The versions of ``entities`` for a branch, as get_versions, and the
+    latest time, in epoch seconds, any of them was bumped. One cache
+    round trip once the counters exist.
+    """
+    scopes = [_scope(entity, branch_id) for entity in entities]
+    version_keys = [_version_key(entity, scope) for entity, scope in zip(entities, scopes)]
+    modified_keys = [_modified_key(entity, scope) for entity, scope in zip(entities, scopes)]
+    found = cache.get_many(version_keys + modified_keys)
+    now = time.time()
+    for key in version_keys + modified_keys:
+        if key not in found:
+            # An unknown (or evicted) modification time is taken to be now
+            cache.add(key, _initial_version() if key in version_keys else now, timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in version_keys], max(found[key] for key in modified_keys)
+
+
+def _bump_now(entity, branch_ids):
+    scopes = {*branch_ids, ALL_BRANCHES}
+    for scope in scopes:
+        key = _version_key(entity, scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+    cache.set_many({_modified_key(entity, scope): time.time() for scope in scopes}, timeout=None)
+
+
+def bump(entity, *branch_ids):
+    """
+    Invalidate every cached view of ``entity`` for the given branches and
+    the network-wide views. Runs once the surrounding transaction commits,
+    so readers never cache pre-commit data under the new version.
+    """
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown cache entity: {entity}")
+    branch_ids = [branch_id for branch_id in branch_ids if branch_id]
+    transaction.on_commit(lambda: _bump_now(entity, branch_ids))
+
+
+def make_key(name, entities, branch_id=None, *parts):
+    versions = get_versions(entities, branch_id)
+    key = ":".join([name, str(branch_id or ALL_BRANCHES), *map(str, versions)])
+    if parts:
+        key += ":" + hashlib.md5(repr(parts).encode()).hexdigest()
+    return key
+
+
+def get_or_set(name, entities, branch_id, fetch, *parts, timeout=None):
+    """
+    Return the cached result of ``fetch`` for this view, recomputing it when
+    any of ``entities`` changed at the branch. ``parts`` distinguish
+    parameterised variants (filters, pages) of the same view.
+    """
+    key = make_key(name, entities, branch_id, *parts)
+    data = cache.get(key)
+    if data is None:
+        data = fetch()
+        cache.set(key, data, timeout or settings.STATISTICS_CACHE_TIMEOUT)
+    return data
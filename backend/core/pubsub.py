@@ -0,0 +1,94 @@
+"""
+Minimal publish/subscribe used to push events to connected clients.
+
+``publish`` is called from ordinary (sync) request code; ``subscribe`` is
+used by async consumers such as the notification stream in core.asgi. The
+default broker is in-process, which is enough for a single ASGI worker and
+for tests. Set ``PUBSUB_REDIS_URL`` to fan events out across processes.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from django.conf import settings
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            # Publishers run in worker threads; hand over to the subscriber's loop
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+class RedisBroker:
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message))
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+        queue = asyncio.Queue()
+
+        async def pump():
+            async for item in pubsub.listen():
+                if item['type'] == 'message':
+                    queue.put_nowait(json.loads(item['data']))
+
+        task = asyncio.create_task(pump())
+        try:
+            yield queue
+        finally:
+            task.cancel()
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+            await client.close()
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        url = getattr(settings, 'PUBSUB_REDIS_URL', None)
+        _broker = RedisBroker(url) if url else InProcessBroker()
+    return _broker
+
+
+def publish(channel, message):
+    get_broker().publish(channel, message)
+
+
+def subscribe(channel):
+    """Async context manager yielding an asyncio.Queue of messages on ``channel``."""
+    return get_broker().subscribe(channel)
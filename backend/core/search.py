@@ -0,0 +1,144 @@
+"""
+Prefix and fuzzy search over a handful of text fields.
+
+A query is split into tokens and every token must match one of a
+document's words, exactly, as a prefix, or fuzzily: at least
+MIN_SIMILARITY of the token's trigrams (padded the way pg_trgm pads
+them) occur in the word. A document's relevance is the mean over the
+tokens of its best match (1.0 exact, PREFIX_SCORE prefix, else the
+trigram share).
+
+On PostgreSQL this runs in the database, using pg_trgm's word
+similarity operator against GIN trigram indexes. Anywhere else (SQLite
+in development and tests) each process keeps an in-memory SearchIndex of
+the documents, rebuilt whenever the entity's cache version is bumped.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.functions import Greatest
+from . import cache as versioned_cache
+
+MIN_SIMILARITY = 0.6  # pg_trgm's default word_similarity_threshold
+PREFIX_SCORE = 0.9
+
+
+def tokens(text):
+    """Lower-cased, accent-stripped alphanumeric words of ``text``."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return re.findall(r'[a-z0-9]+', text)
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """In-memory index of (id, text) documents for ``search``."""
+
+    def __init__(self, documents):
+        word_docs = defaultdict(list)
+        for doc_id, text in documents:
+            for word in set(tokens(text)):
+                word_docs[word].append(doc_id)
+        self.words = sorted(word_docs)
+        self.word_docs = [word_docs[word] for word in self.words]
+        gram_words = defaultdict(list)
+        for position, word in enumerate(self.words):
+            for gram in trigrams(word):
+                gram_words[gram].append(position)
+        self.gram_words = dict(gram_words)
+
+    def _word_scores(self, token):
+        """{word position: score} of every word the token matches."""
+        scores = {}
+        grams = trigrams(token)
+        needed = MIN_SIMILARITY * len(grams)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.gram_words.get(gram, ()))
+        for position, count in shared.items():
+            if count >= needed:
+                scores[position] = count / len(grams)
+
+        position = bisect_left(self.words, token)
+        while position < len(self.words) and self.words[position].startswith(token):
+            score = 1.0 if self.words[position] == token else PREFIX_SCORE
+            scores[position] = max(score, scores.get(position, 0))
+            position += 1
+        return scores
+
+    def search(self, query, limit=None):
+        """[(id, relevance)] of the documents matching every token, best first."""
+        query_tokens = list(dict.fromkeys(tokens(query)))
+        if not query_tokens:
+            return []
+
+        total = None
+        for token in query_tokens:
+            best = {}
+            for position, score in self._word_scores(token).items():
+                for doc_id in self.word_docs[position]:
+                    if score > best.get(doc_id, 0):
+                        best[doc_id] = score
+            if total is None:
+                total = best
+            else:
+                total = {doc_id: score + best[doc_id] for doc_id, score in total.items() if doc_id in best}
+            if not total:
+                return []
+
+        ranked = sorted(total.items(), key=lambda item: (-item[1], item[0]))
+        if limit:
+            ranked = ranked[:limit]
+        return [(doc_id, score / len(query_tokens)) for doc_id, score in ranked]
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def local_index(entity, documents):
+    """
+    This process's SearchIndex for ``entity``, built from ``documents()``
+    and rebuilt once the entity's cache version has been bumped.
+    """
+    version, = versioned_cache.get_versions([entity])
+    cached = _indexes.get(entity)
+    if cached is None or cached[0] != version:
+        with _lock:
+            cached = _indexes.get(entity)
+            if cached is None or cached[0] != version:
+                cached = _indexes[entity] = (version, SearchIndex(documents()))
+    return cached[1]
+
+
+def in_database():
+    return connection.vendor == 'postgresql'
+
+
+def database_search(queryset, fields, query):
+    """
+    ``queryset`` narrowed to the rows matching every token of ``query``
+    in one of ``fields`` and annotated with ``relevance``, best first.
+    PostgreSQL only.
+    """
+    query_tokens = list(dict.fromkeys(tokens(query)))
+    if not query_tokens:
+        return queryset.none()
+
+    scores = []
+    for token in query_tokens:
+        match = Q()
+        for field in fields:
+            match |= Q(**{f'{field}__trigram_word_similar': token}) | Q(**{f'{field}__istartswith': token})
+        queryset = queryset.filter(match)
+        similarities = [TrigramWordSimilarity(token, field) for field in fields]
+        scores.append(Greatest(*similarities, output_field=FloatField()) if len(similarities) > 1 else similarities[0])
+    return queryset.annotate(relevance=sum(scores[1:], scores[0]) / float(len(scores))).order_by('-relevance', 'pk')
@@ -40,6 +40,8 @@ INSTALLED_APPS = [
     "inventory",
     "sales",
     "dashboard",
+    "documents",
+    "changes",
     "rest_framework",
     "django_filters",
     "corsheaders",
@@ -80,7 +82,7 @@ ROOT_URLCONF = "core.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -124,6 +126,55 @@ CACHES = {
 
 STATISTICS_CACHE_TIMEOUT = 600
 
+# Batches expiring within this many days count as expiring soon in the stock summary
+STOCK_EXPIRING_SOON_DAYS = 90
+
+# Upper bound on how long a cached unread counter may drift (see inventory.unread)
+UNREAD_COUNT_TIMEOUT = 24 * 60 * 60
+
+# Days a notification stays in the live inbox before archive_notifications moves
+# it to NotificationArchive; archived (dismissed) ones move on the next run
+NOTIFICATION_TTL_DAYS = {
+    'TRANSFER_REQUEST': 90,
+    'TRANSFER_APPROVAL': 30,
+    'TRANSFER_REJECTION': 30,
+    'STOCK_ALERT': 14,
+    'SYSTEM': 30,
+}
+NOTIFICATION_DEFAULT_TTL_DAYS = 30
+
+# Backstop expiry for the cached role/branch recipient directory (dropped on any user change)
+NOTIFICATION_RECIPIENTS_TIMEOUT = 60 * 60
+
+# Fan notification stream events out across processes; in-process when unset
+PUBSUB_REDIS_URL = env("PUBSUB_REDIS_URL", default=None)
+
+# Rows fetched (and flushed to the client) per round trip by report CSV exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Largest supplier delivery accepted by the bulk receiving endpoint in one request
+RECEIVING_MAX_LINES = 20000
+
+# Most products one multi-line transfer document may carry
+TRANSFER_DOCUMENT_MAX_LINES = 2000
+
+# Barcode lookups each process keeps in memory for scan-to-sell (see products.barcodes)
+BARCODE_CACHE_SIZE = 10000
+
+# Offline POS sync (see sales.sync): most queued sales one upload may carry, and how far
+# before the client's sync token the next delta starts, to catch late-committing writes
+POS_SYNC_MAX_SALES = 1000
+POS_SYNC_OVERLAP_SECONDS = 60
+
+# Change feed for client mirrors (see changes.feed): most changes per page
+CHANGE_FEED_PAGE_SIZE = 2000
+
+# Rendered receipts and report PDFs, stored by content hash (see documents app)
+PDF_STORE_DIR = env("PDF_STORE_DIR", default=str(BASE_DIR / "pdf_store"))
+PDF_RENDER_MAX_ATTEMPTS = 3
+PDF_RENDER_RETRY_DELAY = 30  # Seconds, multiplied by the attempts made so far
+PDF_RENDER_TIMEOUT = 300  # Seconds before a job a worker claimed is considered abandoned
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -210,6 +261,12 @@ SIMPLE_JWT = {
 TWILIO_ACCOUNT_SID = env("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = env("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = env("TWILIO_PHONE_NUMBER")
+SMS_BACKEND = "sales.sms.TwilioSMSBackend"
+
+# Receipt outbox (sales.receipts / manage.py send_receipts)
+RECEIPT_SEND_MAX_ATTEMPTS = 5
+RECEIPT_RETRY_DELAY = 60  # Seconds before the first retry, doubled after each failure
+RECEIPT_SEND_TIMEOUT = 300  # Seconds before a message a worker claimed is considered abandoned
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Pharmacy Management API',
@@ -0,0 +1,132 @@
+"""
+Server-sent events stream of a user's notifications, served straight from
+the ASGI application (see core.asgi) so an idle connection costs no worker
+thread and one small query per keepalive.
+
+    GET /api/v1/notifications/stream/?token=<access token>
+
+EventSource can't send an Authorization header, so the JWT access token
+comes in the query string. The stream opens with the current unread count
+(``event: unread`` / ``{"count": n}``), then relays the ``notification`` and
+``unread`` (``{"delta": n}``) events published by inventory.realtime.
+
+The token is only presented once, so the stream ends when it expires, and
+each keepalive re-checks that the user is still active; the client then
+reconnects with a fresh token.
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import User
+from core import pubsub
+from inventory import unread
+from inventory.realtime import channel_for
+
+STREAM_PATH = '/api/v1/notifications/stream/'
+
+KEEPALIVE_SECONDS = 15
+
+
+@sync_to_async
+def _authenticate(token):
+    """(user id, expiry timestamp) for a valid token of an active user, else None."""
+    if not token:
+        return None
+    try:
+        access = AccessToken(token)
+    except TokenError:
+        return None
+    user_id = access.get(jwt_settings.USER_ID_CLAIM)
+    return (user_id, access['exp']) if _is_active(user_id) else None
+
+
+def _is_active(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).exists()
+
+
+def _cors_headers(scope):
+    origin = dict(scope['headers']).get(b'origin')
+    if origin and (settings.CORS_ALLOW_ALL_ORIGINS or origin.decode() in settings.CORS_ALLOWED_ORIGINS):
+        return [(b'access-control-allow-origin', origin)]
+    return []
+
+
+def _event(name, data):
+    return {'type': 'http.response.body', 'body': f"event: {name}\ndata: {json.dumps(data)}\n\n".encode(), 'more_body': True}
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def notification_stream(scope, receive, send):
+    token = parse_qs(scope['query_string'].decode()).get('token', [None])[0]
+    auth = await _authenticate(token)
+    if auth is None:
+        await send({
+            'type': 'http.response.start', 'status': 401,
+            'headers': [(b'content-type', b'application/json'), *_cors_headers(scope)],
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail": "Invalid or expired token."}'})
+        return
+    user_id, expires_at = auth
+
+    await send({
+        'type': 'http.response.start', 'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),  # Don't let nginx buffer the stream
+            *_cors_headers(scope),
+        ],
+    })
+
+    # Subscribe before reading the count so nothing published in between is lost
+    async with pubsub.subscribe(channel_for(user_id)) as queue:
+        await send(_event('unread', {'count': await sync_to_async(unread.get_count)(user_id)}))
+
+        disconnect = asyncio.ensure_future(_disconnected(receive))
+        message = asyncio.ensure_future(queue.get())
+        try:
+            while True:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(
+                    {disconnect, message}, timeout=min(KEEPALIVE_SECONDS, remaining),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnect in done:
+                    return
+                if message in done:
+                    event = message.result()
+                    await send(_event(event['event'], event['data']))
+                    message = asyncio.ensure_future(queue.get())
+                elif expires_at > time.time():
+                    if not await sync_to_async(_is_active)(user_id):
+                        break
+                    await send({'type': 'http.response.body', 'body': b": keepalive\n\n", 'more_body': True})
+        finally:
+            disconnect.cancel()
+            message.cancel()
+    # Expired token or deactivated user: end the response
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+class NotificationStreamRouter:
+    """Serve the notification stream; hand every other request to Django."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+            return await notification_stream(scope, receive, send)
+        return await self.application(scope, receive, send)
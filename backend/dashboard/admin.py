@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import DailyBranchSales
 
 # Register your models here.
+@admin.register(DailyBranchSales)
+class DailyBranchSalesAdmin(admin.ModelAdmin):
+    list_display = ['branch', 'date', 'sales_count', 'revenue', 'customer_count', 'new_customer_count']
+    list_filter = ['branch']
+    date_hierarchy = 'date'
+    list_per_page = 31
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncDate
+from dashboard.models import DailyBranchSales
+from sales.models import Sale
+
+FIELDS = ['sales_count', 'revenue', 'customer_count', 'new_customer_count']
+
+
+class Command(BaseCommand):
+    help = "Backfill DailyBranchSales from the Sale table and verify the rollup matches it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help="Report drift between the rollup and the Sale table without rewriting it.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            self.rebuild()
+
+        drift = self.verify()
+        if drift:
+            for (branch_id, day), expected, actual in drift:
+                self.stdout.write(self.style.WARNING(
+                    f"Branch {branch_id} on {day}: expected {expected}, found {actual}"
+                ))
+            self.stdout.write(self.style.ERROR(f"{len(drift)} rollup rows out of step with sales."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Sales rollup matches the Sale table."))
+
+    def expected_rollups(self):
+        """Recompute every (branch, day) rollup with grouped queries over Sale."""
+        rollups = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+
+        daily = (
+            Sale.objects.annotate(day=TruncDate('date'))
+            .values('branch_id', 'day')
+            .annotate(
+                sales_count=Count('id'),
+                revenue=Sum('total_amount'),
+                customer_count=Count('customer', distinct=True),
+            )
+        )
+        for row in daily:
+            rollup = rollups[(row['branch_id'], row['day'])]
+            rollup['sales_count'] = row['sales_count']
+            rollup['revenue'] = row['revenue'] or Decimal('0')
+            rollup['customer_count'] = row['customer_count']
+
+        first_purchases = (
+            Sale.objects.filter(customer__isnull=False)
+            .values('branch_id', 'customer_id')
+            .annotate(first_day=Min(TruncDate('date')))
+        )
+        for row in first_purchases:
+            rollups[(row['branch_id'], row['first_day'])]['new_customer_count'] += 1
+
+        return rollups
+
+    @transaction.atomic
+    def rebuild(self):
+        rollups = self.expected_rollups()
+        DailyBranchSales.objects.all().delete()
+        DailyBranchSales.objects.bulk_create(
+            [
+                DailyBranchSales(branch_id=branch_id, date=day, **values)
+                for (branch_id, day), values in rollups.items()
+            ],
+            batch_size=1000,
+        )
+        self.stdout.write(f"Rebuilt {len(rollups)} daily rollup rows.")
+
+    def verify(self):
+        expected = self.expected_rollups()
+        actual = {
+            (row['branch_id'], row['date']): {field: row[field] for field in FIELDS}
+            for row in DailyBranchSales.objects.values('branch_id', 'date', *FIELDS).iterator()
+        }
+
+        drift = []
+        for key in sorted(set(expected) | set(actual), key=str):
+            # Rows with no sales at all are equivalent to missing rows
+            want = expected.get(key, dict.fromkeys(FIELDS, 0))
+            have = actual.get(key, dict.fromkeys(FIELDS, 0))
+            if any(want[field] != have[field] for field in FIELDS):
+                drift.append((key, want, have))
+        return drift
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 20:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('sites', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBranchSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sales_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('customer_count', models.PositiveIntegerField(default=0)),
+                ('new_customer_count', models.PositiveIntegerField(default=0)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sites.site')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dailybranchsales',
+            index=models.Index(fields=['date'], name='dashboard_d_date_3b1944_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailybranchsales',
+            unique_together={('branch', 'date')},
+        ),
+    ]
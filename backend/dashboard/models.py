@@ -1,3 +1,108 @@
+from collections import defaultdict
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from sites.models import Site
 
-# Create your models here.
+
+class DailyBranchSalesManager(models.Manager):
+    def record_sale(self, sale):
+        """
+        Fold a newly written sale into its branch's rollup for the day.
+        Must run in the sale's transaction, after the sale row exists.
+        """
+        self.record_sales([sale])
+
+    def record_sales(self, sales):
+        """
+        Fold newly written ``sales`` into their branches' rollups, with one
+        get_or_create and update per branch and day whatever the number of
+        sales. Must run in the sales' transaction, after the rows exist.
+        """
+        from sales.models import Sale
+
+        rollups = defaultdict(lambda: {'sales_count': 0, 'revenue': 0, 'customers': set(), 'new_customers': 0})
+        for sale in sales:
+            totals = rollups[sale.branch_id, timezone.localdate(sale.date)]
+            totals['sales_count'] += 1
+            totals['revenue'] += sale.total_amount
+
+        buyers = [sale for sale in sales if sale.customer_id]
+        if buyers:
+            earlier = Sale.objects.filter(
+                branch_id__in={sale.branch_id for sale in buyers},
+                customer_id__in={sale.customer_id for sale in buyers},
+            ).exclude(pk__in=[sale.pk for sale in sales])
+            returning = set(earlier.values_list('branch_id', 'customer_id').distinct())
+            seen = set(
+                earlier.filter(date__date__in={key[1] for key in rollups})
+                .values_list('branch_id', 'customer_id', 'date__date').distinct()
+            )
+            for sale in sorted(buyers, key=lambda sale: sale.date):
+                day = timezone.localdate(sale.date)
+                if (sale.branch_id, sale.customer_id, day) not in seen:
+                    rollups[sale.branch_id, day]['customers'].add(sale.customer_id)
+                if (sale.branch_id, sale.customer_id) not in returning:
+                    returning.add((sale.branch_id, sale.customer_id))
+                    rollups[sale.branch_id, day]['new_customers'] += 1
+
+        for (branch_id, day), totals in rollups.items():
+            rollup, _ = self.get_or_create(branch_id=branch_id, date=day)
+            changes = {
+                'sales_count': F('sales_count') + totals['sales_count'],
+                'revenue': F('revenue') + totals['revenue'],
+            }
+            if totals['customers']:
+                changes['customer_count'] = F('customer_count') + len(totals['customers'])
+            if totals['new_customers']:
+                changes['new_customer_count'] = F('new_customer_count') + totals['new_customers']
+            self.filter(pk=rollup.pk).update(**changes)
+
+    def remove_sale(self, sale):
+        """
+        Take a deleted sale back out of its branch's rollup for the day, the
+        reverse of ``record_sale``. Must run in the deleting transaction,
+        after the sale row is gone.
+        """
+        from sales.models import Sale
+
+        day = timezone.localdate(sale.date)
+        changes = {'sales_count': F('sales_count') - 1, 'revenue': F('revenue') - sale.total_amount}
+        if sale.customer_id:
+            others = Sale.objects.filter(branch_id=sale.branch_id, customer_id=sale.customer_id)
+            if not others.filter(date__date=day).exists():
+                changes['customer_count'] = F('customer_count') - 1
+            first = others.order_by('date').values_list('date', flat=True).first()
+            if first is None or timezone.localdate(first) > day:
+                # It was the customer's first purchase here; the next one is now
+                changes['new_customer_count'] = F('new_customer_count') - 1
+                if first is not None:
+                    self.filter(branch_id=sale.branch_id, date=timezone.localdate(first)).update(
+                        new_customer_count=F('new_customer_count') + 1,
+                    )
+        # No get_or_create: when the branch itself is being deleted its rollups go too
+        self.filter(branch_id=sale.branch_id, date=day).update(**changes)
+
+
+class DailyBranchSales(models.Model):
+    """
+    Per-branch, per-day sales totals maintained as sales are written, so
+    the dashboard never has to scan the Sale table.
+    """
+    branch = models.ForeignKey(Site, on_delete=models.CASCADE)
+    date = models.DateField()
+    sales_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    customer_count = models.PositiveIntegerField(default=0)  # Distinct customers that day
+    new_customer_count = models.PositiveIntegerField(default=0)  # Customers buying at the branch for the first time
+
+    objects = DailyBranchSalesManager()
+
+    class Meta:
+        unique_together = ('branch', 'date')
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.branch.name} - {self.date}: {self.revenue}"
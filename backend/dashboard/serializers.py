@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from sales.models import Sale
-from inventory.models import Inventory
+from inventory.models import ExpiringBatch, Inventory
 from accounts.models import Customer
 from django.db.models import Sum
 
@@ -15,3 +15,15 @@ class MonthlySalesSerializer(serializers.Serializer):
     total = serializers.DecimalField(max_digits=10, decimal_places=2)
     
 
+
+
+class ExpiringBatchSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    quarantined = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExpiringBatch
+        fields = ['inventory', 'product', 'product_name', 'branch', 'batch_number', 'expiration_date', 'quantity', 'quarantined']
+
+    def get_quarantined(self, obj):
+        return obj.quarantined_at is not None
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import SalesStatisticsAPIView, MonthlySalesAPIView, SalesTableAPIView, ExpiryListAPIView
+from .views import SalesStatisticsAPIView, MonthlySalesAPIView, SalesTableAPIView, ExpiryListAPIView, ExpiryBucketsAPIView
 
 
 
@@ -8,4 +8,5 @@ urlpatterns = [
     path('dashboard/monthly-sales/', MonthlySalesAPIView.as_view(), name='monthly-sales'),
     path('dashboard/sales-table/', SalesTableAPIView.as_view(), name='sales-table'),
     path('dashboard/expiry-list/', ExpiryListAPIView.as_view(), name='expiry-list'),
+    path('dashboard/expiry-buckets/', ExpiryBucketsAPIView.as_view(), name='expiry-buckets'),
 ]
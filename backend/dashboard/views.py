@@ -10,14 +10,20 @@ from rest_framework import generics
 from sales.models import Sale
 from apis.serializers import SaleSerializer, InventorySerializer
 from django.db.models import Q
-from inventory.models import Inventory
-from apis.utils import get_or_set_cache
-from django.core.cache import cache
-from dashboard.serializers import StatisticsSerializer, MonthlySalesSerializer
+from inventory.models import ExpiringBatch, Inventory
+from core import cache as versioned_cache
+from apis.mixins import ConditionalGetMixin
+from accounts import search as customer_search
+from products import search as product_search
+from dashboard.serializers import StatisticsSerializer, MonthlySalesSerializer, ExpiringBatchSerializer
+from dashboard.models import DailyBranchSales
 from sites.models import Site
 from django.shortcuts import get_object_or_404
 
-class SalesStatisticsAPIView(APIView):
+class SalesStatisticsAPIView(ConditionalGetMixin, APIView):
+    validator_entities = ('sale', 'inventory', 'customer')
+    branch_query_param = 'branch'
+
     def get(self, request):
         user = request.user
         branch_id = request.query_params.get('branch')
@@ -28,17 +34,19 @@ class SalesStatisticsAPIView(APIView):
         elif user.role != 'CEO':
             branch = user.branch
 
-        cache_key = f"statistics_{user.role}_{branch.id if branch else 'all'}"
-
         def fetch_statistics():
+            # Sales figures come from the daily rollup, never the Sale table
             if user.role == 'CEO' and not branch_id:
-                total_sales = Sale.objects.aggregate(total=Sum('total_amount'))['total'] or 0
+                total_sales = DailyBranchSales.objects.aggregate(total=Sum('revenue'))['total'] or 0
                 total_customers = Customer.objects.count()
                 total_profits = total_sales
                 out_of_stock = Inventory.objects.filter(quantity=0).count()
             else:
-                total_sales = Sale.objects.filter(branch=branch).aggregate(total=Sum('total_amount'))['total'] or 0
-                total_customers = Customer.objects.filter(sale__branch=branch).distinct().count()
+                rollup = DailyBranchSales.objects.filter(branch=branch).aggregate(
+                    total=Sum('revenue'), customers=Sum('new_customer_count')
+                )
+                total_sales = rollup['total'] or 0
+                total_customers = rollup['customers'] or 0
                 total_profits = total_sales
                 out_of_stock = Inventory.objects.filter(branch=branch, quantity=0).count()
 
@@ -50,16 +58,19 @@ class SalesStatisticsAPIView(APIView):
             ]
             return statistics
 
-        data = cache.get(cache_key)
-        if not data:
-            data = fetch_statistics()
-            cache.set(cache_key, data, timeout=600)
-
+        data = versioned_cache.get_or_set(
+            'statistics', ('sale', 'inventory', 'customer'), branch.id if branch else None, fetch_statistics, user.role
+        )
         return Response({"statistics": data}, status=status.HTTP_200_OK)
 
 
-class MonthlySalesAPIView(APIView):
+class MonthlySalesAPIView(ConditionalGetMixin, APIView):
     serializer_class = MonthlySalesSerializer
+    validator_entities = ('sale',)
+    branch_query_param = 'branch'
+
+    def get_validator_parts(self, request):
+        return (timezone.now().year,)
 
     def get(self, request):
         user = request.user
@@ -71,34 +82,34 @@ class MonthlySalesAPIView(APIView):
         elif user.role != 'CEO':
             branch = user.branch
 
-        cache_key = f"monthly_sales_{user.role}_{branch.id if branch else 'all'}"
-        data = cache.get(cache_key)
-        if data:
-            return Response(data, status=status.HTTP_200_OK)
-
-        today = timezone.now().date()
-        start_of_year = today.replace(month=1, day=1)
-
-        sales = Sale.objects.filter(date__gte=start_of_year)
-        if branch:
-            sales = sales.filter(branch=branch)
-
-        monthly_sales = (
-            sales.annotate(month=ExtractMonth('date'))
-                 .values('month')
-                 .annotate(total=Sum('total_amount'))
-                 .order_by('month')
+        def fetch_monthly_sales():
+            today = timezone.now().date()
+            start_of_year = today.replace(month=1, day=1)
+
+            rollups = DailyBranchSales.objects.filter(date__gte=start_of_year)
+            if branch:
+                rollups = rollups.filter(branch=branch)
+
+            monthly_sales = (
+                rollups.annotate(month=ExtractMonth('date'))
+                       .values('month')
+                       .annotate(total=Sum('revenue'))
+                       .order_by('month')
+            )
+            return self.serializer_class(monthly_sales, many=True).data
+
+        data = versioned_cache.get_or_set(
+            'monthly_sales', ('sale',), branch.id if branch else None, fetch_monthly_sales,
+            timezone.now().year,
         )
-
-        serializer = self.serializer_class(monthly_sales, many=True)
-        data = serializer.data
-        cache.set(cache_key, data, timeout=600)
         return Response(data, status=status.HTTP_200_OK)
 
 
 
-class SalesTableAPIView(generics.ListAPIView):
+class SalesTableAPIView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = SaleSerializer
+    validator_entities = ('sale', 'product', 'customer')
+    branch_query_param = 'branch'
 
     def get_queryset(self):
         user = self.request.user
@@ -125,11 +136,11 @@ class SalesTableAPIView(generics.ListAPIView):
         if product_id:
             queryset = queryset.filter(items__product__id=product_id)
         if product_name:
-            queryset = queryset.filter(items__product__name__icontains=product_name)
+            queryset = queryset.filter(items__product_id__in=product_search.matching_ids(product_name))
         if customer_id:
             queryset = queryset.filter(customer_id=customer_id)
         if customer_name:
-            queryset = queryset.filter(customer__name__icontains=customer_name)
+            queryset = queryset.filter(customer_id__in=customer_search.matching_ids(customer_name))
         if start_date and end_date:
             queryset = queryset.filter(date__range=[start_date, end_date])
 
@@ -147,54 +158,83 @@ class SalesTableAPIView(generics.ListAPIView):
         start_date = params.get('start_date')
         end_date = params.get('end_date')
 
-        cache_key = f"sales_table_{user.role}_{branch_id or user.branch_id or 'all'}"
-        if product_id:
-            cache_key += f"_product_{product_id}"
-        if product_name:
-            cache_key += f"_product_name_{product_name}"
-        if customer_id:
-            cache_key += f"_customer_{customer_id}"
-        if customer_name:
-            cache_key += f"_customer_name_{customer_name}"
-        if start_date and end_date:
-            cache_key += f"_date_{start_date}_{end_date}"
-
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
+        branch = None
+        if user.role == 'CEO' and branch_id:
+            branch = branch_id
+        elif user.role != 'CEO':
+            branch = user.branch_id
 
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
+        def fetch_sales_table():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(queryset, many=True).data
 
-        cache.set(cache_key, data, timeout=600)
+        data = versioned_cache.get_or_set(
+            'sales_table', ('sale', 'product', 'customer'), branch, fetch_sales_table,
+            product_id, product_name, customer_id, customer_name, start_date, end_date,
+        )
         return Response(data)
 
 
 
-class ExpiryListAPIView(generics.ListAPIView):
+class ExpiryListAPIView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = InventorySerializer
+    validator_entities = ('inventory', 'product')
+    branch_query_param = 'branch'
 
-    def get_queryset(self):
+    def get_validator_parts(self, request):
+        return (timezone.now().date(),)
+
+    def get_branch(self):
         user = self.request.user
         branch_id = self.request.query_params.get('branch')
 
-        branch = None
         if user.role == 'CEO' and branch_id:
-            branch = Site.objects.filter(id=branch_id).first()
+            return Site.objects.filter(id=branch_id).first()
         elif user.role != 'CEO':
-            branch = user.branch
+            return user.branch
+        return None
 
-        cache_key = f"expiry_list_{user.role}_{branch.id if branch else 'all'}"
-        data = cache.get(cache_key)
-        if data:
-            return Inventory.objects.none()
-
-        queryset = Inventory.objects.filter(expiration_date__lte=timezone.now().date())
+    def get_queryset(self):
+        branch = self.get_branch()
+        queryset = Inventory.objects.filter(expiration_date__lte=timezone.now().date()).select_related('product')
         if branch:
             queryset = queryset.filter(branch=branch)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        branch = self.get_branch()
 
-        serializer = self.serializer_class(queryset, many=True)
-        cache.set(cache_key, serializer.data, timeout=600)
+        def fetch_expiry_list():
+            return self.get_serializer(self.get_queryset(), many=True).data
+
+        data = versioned_cache.get_or_set(
+            'expiry_list', ('inventory',), branch.id if branch else None, fetch_expiry_list,
+            timezone.now().date(),
+        )
+        return Response(data)
+
+
+class ExpiryBucketsAPIView(ExpiryListAPIView):
+    """
+    Batches grouped into expired / 30 / 60 / 90-day buckets, read from the
+    table the nightly sweep_expiry command fills.
+    """
+    serializer_class = ExpiringBatchSerializer
+
+    def get_queryset(self):
+        branch = self.get_branch()
+        queryset = ExpiringBatch.objects.select_related('product')
+        if branch:
+            queryset = queryset.filter(branch=branch)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        batches = list(self.get_queryset())
+        buckets = {bucket: {'bucket': bucket, 'label': label, 'quantity': 0, 'batches': []}
+                   for bucket, label in ExpiringBatch.BUCKET_CHOICES}
+        for batch, data in zip(batches, self.get_serializer(batches, many=True).data):
+            buckets[batch.bucket]['quantity'] += batch.quantity
+            buckets[batch.bucket]['batches'].append(data)
+
+        swept_on = max((batch.swept_on for batch in batches), default=None)
+        return Response({'as_of': swept_on, 'buckets': list(buckets.values())})
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import PdfRender
+
+
+@admin.register(PdfRender)
+class PdfRenderAdmin(admin.ModelAdmin):
+    list_display = ['key', 'template', 'status', 'attempts', 'created_at', 'rendered_at']
+    list_filter = ['status', 'template']
+    exclude = ['html']
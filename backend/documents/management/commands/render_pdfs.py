@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from documents.rendering import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Worker that renders queued receipt and report PDFs into the PDF store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty instead of polling.")
+        parser.add_argument('--batch-size', type=int, default=10, help="Jobs claimed per round trip.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        rendered = failed = 0
+        while True:
+            jobs = claim_jobs(options['batch_size'])
+            if not jobs:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            for job in jobs:
+                if run_job(job):
+                    rendered += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(f"Rendered {rendered} PDFs, {failed} failed.")
@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class PdfRender(models.Model):
+    """
+    A queued PDF render. The rendered file lives in the PDF store under
+    ``key``; the row only tracks the job, so the HTML is dropped once done.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RENDERING', 'Rendering'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    key = models.CharField(max_length=64, unique=True)  # sha256 of template name + rendered HTML
+    template = models.CharField(max_length=255)
+    html = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    retry_at = models.DateTimeField(null=True, blank=True)  # Set after a failed attempt
+    rendered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.template} ({self.get_status_display()})"
@@ -0,0 +1,97 @@
+"""
+Queued PDF rendering for receipts and reports.
+
+A request renders its template to HTML (milliseconds) and hashes it. If
+the store already holds the PDF for that hash it is served straight away;
+otherwise a job is queued and the client gets a 202 to retry. The
+WeasyPrint work happens in ``manage.py render_pdfs`` workers, which use
+the database as their queue, so no broker is involved.
+
+Keying on the rendered HTML means any change to the sale, the report rows
+or the template itself produces a new key, and a stored PDF is never stale.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import FileResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from weasyprint import HTML
+from . import store
+from .models import PdfRender
+
+logger = logging.getLogger(__name__)
+
+
+def render_pdf(html):
+    return HTML(string=html).write_pdf()
+
+
+def pdf_key(template, html):
+    return hashlib.sha256(f"{template}\0{html}".encode()).hexdigest()
+
+
+def request_pdf(template, context, filename):
+    """
+    Serve the PDF for ``template`` rendered with ``context`` from the store,
+    or queue it and answer 202 (with Retry-After) until a worker has run.
+    """
+    html = render_to_string(template, context)
+    key = pdf_key(template, html)
+    if store.exists(key):
+        return FileResponse(store.open_pdf(key), content_type='application/pdf', filename=filename)
+
+    job, _ = PdfRender.objects.get_or_create(key=key, defaults={'template': template, 'html': html})
+    if job.status == 'FAILED':
+        return JsonResponse({"detail": "Error generating PDF."}, status=500)
+    if job.status == 'DONE':
+        # Rendered once but gone from the store (cleared, or another host's disk)
+        PdfRender.objects.filter(pk=job.pk).update(status='PENDING', html=html, attempts=0, retry_at=None)
+
+    response = JsonResponse({"status": "PENDING", "detail": "PDF is being generated, retry shortly."}, status=202)
+    response['Retry-After'] = '1'
+    return response
+
+
+def claim_jobs(limit):
+    """
+    Take up to ``limit`` waiting jobs whose retry delay has passed, plus any
+    a dead worker left in RENDERING, marking them as started. Locked rows are skipped, so several
+    workers can drain the queue side by side.
+    """
+    now = timezone.now()
+    abandoned = now - timedelta(seconds=settings.PDF_RENDER_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            PdfRender.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='PENDING') | Q(status='RENDERING', started_at__lt=abandoned))
+            .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+            .order_by('created_at')[:limit]
+        )
+        PdfRender.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='RENDERING', started_at=now, attempts=F('attempts') + 1,
+        )
+    return jobs
+
+
+def run_job(job):
+    """Render a claimed job into the store. Returns False if it failed."""
+    try:
+        store.save(job.key, render_pdf(job.html))
+    except Exception as e:
+        logger.exception("Rendering %s (%s) failed", job.template, job.key)
+        attempts = job.attempts + 1
+        PdfRender.objects.filter(pk=job.pk).update(
+            status='FAILED' if attempts >= settings.PDF_RENDER_MAX_ATTEMPTS else 'PENDING',
+            retry_at=timezone.now() + timedelta(seconds=settings.PDF_RENDER_RETRY_DELAY * attempts),
+            error=str(e),
+        )
+        return False
+
+    PdfRender.objects.filter(pk=job.pk).update(
+        status='DONE', html='', error='', retry_at=None, rendered_at=timezone.now(),
+    )
+    return True
@@ -0,0 +1,34 @@
+"""
+On-disk store of rendered PDFs, addressed by content hash. Files are
+written to a temporary name and renamed into place, so a reader never sees
+a half-written PDF.
+"""
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+
+
+def path_for(key):
+    return Path(settings.PDF_STORE_DIR) / key[:2] / f"{key}.pdf"
+
+
+def exists(key):
+    return path_for(key).exists()
+
+
+def open_pdf(key):
+    return path_for(key).open('rb')
+
+
+def save(key, data):
+    path = path_for(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,70 @@
+"""
+Nightly expiry sweep.
+
+For each branch, one query classifies every batch with stock that has
+expired or expires within 90 days into a bucket (the CASE runs in the
+database), and the result replaces the branch's ExpiringBatch rows.
+Batches found expired for the first time get a QUARANTINE stock movement,
+written in bulk; allocation already refuses expired batches, the movement
+records that they were pulled from sale.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from core import cache as versioned_cache
+from .models import ExpiringBatch, Inventory, StockMovement
+
+BUCKET_DAYS = [('DAYS_30', 30), ('DAYS_60', 60), ('DAYS_90', 90)]
+
+UPDATE_FIELDS = ['branch', 'product', 'batch_number', 'expiration_date', 'quantity', 'bucket', 'swept_on']
+
+
+def classify(today):
+    return Case(
+        When(expiration_date__lt=today, then=Value('EXPIRED')),
+        *[When(expiration_date__lte=today + timedelta(days=days), then=Value(bucket)) for bucket, days in BUCKET_DAYS],
+    )
+
+
+def sweep_branch(branch_id, today=None):
+    """Reclassify one branch's batches; returns (batches classified, batches quarantined)."""
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=BUCKET_DAYS[-1][1])
+    with transaction.atomic():
+        batches = (
+            Inventory.objects.filter(branch_id=branch_id, quantity__gt=0, expiration_date__lte=horizon)
+            .annotate(bucket=classify(today))
+            .values('id', 'product_id', 'batch_number', 'expiration_date', 'quantity', 'bucket')
+        )
+        rows = ExpiringBatch.objects.bulk_create(
+            [
+                ExpiringBatch(
+                    inventory_id=batch['id'], branch_id=branch_id, product_id=batch['product_id'],
+                    batch_number=batch['batch_number'], expiration_date=batch['expiration_date'],
+                    quantity=batch['quantity'], bucket=batch['bucket'], swept_on=today,
+                )
+                for batch in batches
+            ],
+            update_conflicts=True, unique_fields=['inventory'], update_fields=UPDATE_FIELDS,
+        )
+        # Sold out, restocked with a later date or deleted since the last sweep
+        ExpiringBatch.objects.filter(branch_id=branch_id).exclude(inventory_id__in=[row.inventory_id for row in rows]).delete()
+
+        newly_expired = list(
+            ExpiringBatch.objects.filter(branch_id=branch_id, bucket='EXPIRED', quarantined_at__isnull=True)
+        )
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=batch.product_id,
+                branch_id=branch_id,
+                movement_type='QUARANTINE',
+                quantity=batch.quantity,
+                status='CONFIRMED',
+                details=f"Expired on {batch.expiration_date}. Batch: {batch.batch_number or 'N/A'}",
+            )
+            for batch in newly_expired
+        ])
+        ExpiringBatch.objects.filter(pk__in=[batch.pk for batch in newly_expired]).update(quarantined_at=timezone.now())
+        versioned_cache.bump('inventory', branch_id)  # The buckets were rewritten
+    return len(rows), len(newly_expired)
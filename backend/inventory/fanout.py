@@ -0,0 +1,83 @@
+"""
+Notification fan-out: one event, many recipients, one INSERT.
+
+Recipients are resolved by role and branch from a cached directory of
+active users (a single query on a miss, dropped whenever a user changes).
+Rows are written with one ``bulk_create``, which fires no post_save, so the
+stream push and unread counters are updated here rather than by the
+signal handlers.
+"""
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from accounts.models import User
+from . import unread
+from .models import Notification
+from .realtime import publish_notifications
+
+DIRECTORY_KEY = 'notification_recipients'
+
+
+def _directory():
+    """Active user ids keyed by (role, branch_id)."""
+    directory = cache.get(DIRECTORY_KEY)
+    if directory is None:
+        directory = defaultdict(list)
+        for user_id, role, branch_id in User.objects.filter(is_active=True).values_list('id', 'role', 'branch_id'):
+            directory[(role, branch_id)].append(user_id)
+        directory = dict(directory)
+        cache.set(DIRECTORY_KEY, directory, settings.NOTIFICATION_RECIPIENTS_TIMEOUT)
+    return directory
+
+
+def forget_recipients():
+    transaction.on_commit(lambda: cache.delete(DIRECTORY_KEY))
+
+
+def recipient_ids(roles, branches=None):
+    """Ids of active users holding any of ``roles`` at any of ``branches`` (every branch when None)."""
+    branch_ids = None if branches is None else {getattr(branch, 'pk', branch) for branch in branches}
+    return [
+        user_id
+        for (role, branch_id), user_ids in _directory().items()
+        if role in roles and (branch_ids is None or branch_id in branch_ids)
+        for user_id in user_ids
+    ]
+
+
+def notify(recipients, notification_type, title, message, sender=None, related_branch=None, related_object_id=None):
+    """
+    Create the same notification for every recipient (users or user ids)
+    with a single INSERT and push it to their streams on commit.
+    """
+    recipients = list(recipients)
+    user_ids = [recipient for recipient in recipients if not isinstance(recipient, User)]
+    if user_ids:
+        users = User.objects.in_bulk(user_ids)
+        recipients = [recipient for recipient in recipients if isinstance(recipient, User)]
+        recipients += [users[user_id] for user_id in dict.fromkeys(user_ids) if user_id in users]
+    if not recipients:
+        return []
+
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            recipient=recipient,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            sender=sender,
+            related_branch=related_branch,
+            related_object_id=related_object_id,
+        )
+        for recipient in recipients
+    ])
+    publish_notifications(notifications)
+    for recipient_id, count in Counter(notification.recipient_id for notification in notifications).items():
+        unread.adjust(recipient_id, count)
+    return notifications
+
+
+def notify_roles(roles, branches=None, **notification):
+    """Notify every active user holding one of ``roles`` at ``branches`` (every branch when None)."""
+    return notify(recipient_ids(roles, branches), **notification)
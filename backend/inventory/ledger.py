@@ -0,0 +1,117 @@
+"""
+Append-only stock ledger with snapshot checkpoints.
+
+Every path that changes a batch's quantity appends a signed
+StockLedgerEntry per (inventory, movement) right after its UPDATE, in
+the same transaction: checkout and transfers through ``record``,
+Inventory.adjust_quantity itself, and plain Inventory saves through the
+post_save signal. ``snapshot`` periodically writes each branch's
+quantities as a checkpoint, so ``stock_at`` answers "what did branch X
+hold at time T" from the nearest checkpoint at or before T plus the
+entries since, or, before the first checkpoint, from the live quantities
+minus the entries after T.
+
+A checkpoint must see each write whole. Writes to existing batches are
+ordered against it by their row locks; writes that insert batches, which
+it cannot lock, first take the branch lock (``lock_branch``) that
+``snapshot`` holds while it reads.
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+from changes import feed
+from sites.models import Site
+from .models import Inventory, StockLedgerEntry, StockSnapshot
+
+
+def record(changes):
+    """
+    Append an entry for each (inventory, delta, movement); zero deltas are
+    skipped. The rows also go on the change feed for client mirrors.
+    """
+    entries = StockLedgerEntry.objects.bulk_create([
+        StockLedgerEntry(
+            inventory_id=inventory.id,
+            branch_id=inventory.branch_id,
+            product_id=inventory.product_id,
+            movement=movement,
+            delta=delta,
+        )
+        for inventory, delta, movement in changes
+        if delta
+    ])
+    feed.record('inventory', {(entry.inventory_id, entry.branch_id): None for entry in entries})
+    return entries
+
+
+def record_save(instance, created, update_fields=None):
+    """
+    Log what a plain save() did to ``instance.quantity`` (see
+    Inventory.from_db). A save that leaves the quantity alone still puts
+    the row on the change feed.
+    """
+    previous = 0 if created else instance.__dict__.get('_saved_quantity')
+    if (update_fields is not None and 'quantity' not in update_fields) or previous in (None, instance.quantity):
+        feed.record('inventory', [(instance.pk, instance.branch_id)])
+        return
+    record([(instance, instance.quantity - previous, None)])
+    instance._saved_quantity = instance.quantity
+
+
+def lock_branch(branch_id):
+    """
+    Take ``branch_id``'s stock lock until the transaction ends. Held by
+    ``snapshot`` and by every write that inserts batches at the branch.
+    NO KEY UPDATE, so rows referencing the branch can still be inserted.
+    """
+    list(Site.objects.select_for_update(no_key=True).filter(pk=branch_id).values_list('pk'))
+
+
+def snapshot(branch_id):
+    """
+    Checkpoint every batch at ``branch_id`` holding stock. The branch lock
+    and then the branch's rows are locked first, so writes in flight,
+    including ones inserting new batches, land wholly before or wholly
+    after ``taken_at``. Returns the number of batches written.
+    """
+    with transaction.atomic():
+        lock_branch(branch_id)
+        batches = list(
+            Inventory.objects.select_for_update().filter(branch_id=branch_id).order_by('pk')
+            .values_list('id', 'product_id', 'quantity')
+        )
+        taken_at = timezone.now()
+        return len(StockSnapshot.objects.bulk_create([
+            StockSnapshot(
+                inventory_id=inventory_id, branch_id=branch_id, product_id=product_id,
+                quantity=quantity, taken_at=taken_at,
+            )
+            for inventory_id, product_id, quantity in batches
+            if quantity
+        ]))
+
+
+def stock_at(branch_id, at):
+    """
+    Quantities held at ``branch_id`` at ``at``: returns ({inventory_id:
+    quantity} for the batches holding stock, the checkpoint used or None
+    when walked back from the live quantities).
+    """
+    checkpoint = (
+        StockSnapshot.objects.filter(branch_id=branch_id, taken_at__lte=at)
+        .aggregate(taken_at=Max('taken_at'))['taken_at']
+    )
+    entries = StockLedgerEntry.objects.filter(branch_id=branch_id)
+    if checkpoint is not None:
+        quantities = Counter(dict(
+            StockSnapshot.objects.filter(branch_id=branch_id, taken_at=checkpoint).values_list('inventory_id', 'quantity')
+        ))
+        entries, sign = entries.filter(created_at__gt=checkpoint, created_at__lte=at), 1
+    else:
+        quantities = Counter(dict(Inventory.objects.filter(branch_id=branch_id).values_list('id', 'quantity')))
+        entries, sign = entries.filter(created_at__gt=at), -1
+
+    for inventory_id, delta in entries.values('inventory_id').annotate(total=Sum('delta')).values_list('inventory_id', 'total'):
+        quantities[inventory_id] += sign * delta
+    return {inventory_id: quantity for inventory_id, quantity in quantities.items() if quantity}, checkpoint
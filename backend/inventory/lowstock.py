@@ -0,0 +1,66 @@
+"""
+Low-stock threshold crossings.
+
+Every path that changes a batch's quantity calls ``check`` with the rows
+it touched, inside its transaction and after its UPDATE, so the rows are
+already locked. A batch below threshold without an open LowStockAlert
+gets one, and its branch's admins get one STOCK_ALERT covering every
+batch that crossed in the same check; a batch back at or above
+threshold has its open alert resolved, arming it for the next crossing.
+"""
+from collections import defaultdict
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from .fanout import notify_roles
+from .models import Inventory, LowStockAlert
+
+
+def check(inventory_ids):
+    """Raise or resolve alerts for the given inventory rows; returns the new alerts."""
+    inventory_ids = list(inventory_ids)
+    if not inventory_ids:
+        return []
+
+    LowStockAlert.objects.filter(
+        inventory__in=Inventory.objects.filter(pk__in=inventory_ids, quantity__gte=F('threshold_quantity')),
+        resolved_at__isnull=True,
+    ).update(resolved_at=timezone.now())
+
+    crossed = list(
+        Inventory.objects.filter(pk__in=inventory_ids, quantity__lt=F('threshold_quantity'))
+        .filter(~Exists(LowStockAlert.objects.filter(inventory=OuterRef('pk'), resolved_at__isnull=True)))
+        .select_related('product', 'branch')
+    )
+    alerts = LowStockAlert.objects.bulk_create([
+        LowStockAlert(
+            inventory=inventory, product=inventory.product, branch=inventory.branch,
+            quantity=inventory.quantity, threshold_quantity=inventory.threshold_quantity,
+        )
+        for inventory in crossed
+    ])
+    by_branch = defaultdict(list)
+    for inventory in crossed:
+        by_branch[inventory.branch].append(inventory)
+    # One STOCK_ALERT per branch, however many batches crossed together
+    for branch, batches in by_branch.items():
+        if len(batches) == 1:
+            inventory, = batches
+            title = f"Low stock: {inventory.product.name}"
+            message = (
+                f"{inventory.product.name} (batch {inventory.batch_number or 'N/A'}) at {branch.name} "
+                f"is down to {inventory.quantity} units, below its threshold of {inventory.threshold_quantity}."
+            )
+        else:
+            names = ", ".join(f"{inventory.product.name} ({inventory.quantity})" for inventory in batches[:10])
+            more = f" and {len(batches) - 10} more" if len(batches) > 10 else ""
+            title = f"Low stock: {len(batches)} batches"
+            message = f"{len(batches)} batches at {branch.name} are below their threshold: {names}{more}."
+        notify_roles(
+            ['Admin'], [branch],
+            notification_type='STOCK_ALERT',
+            title=title,
+            message=message,
+            related_branch=branch,
+            related_object_id=batches[0].id if len(batches) == 1 else None,
+        )
+    return alerts
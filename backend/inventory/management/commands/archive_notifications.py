@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.retention import archive_batch
+
+
+class Command(BaseCommand):
+    help = "Move expired and archived notifications into NotificationArchive, one batch per transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Notifications moved per transaction.")
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        moved = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            count = archive_batch(options['batch_size'], now)
+            if not count:
+                break
+            moved += count
+            batches += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} notifications in {batches} batches."))
@@ -0,0 +1,43 @@
+from itertools import islice
+from django.core.management.base import BaseCommand
+from inventory import summary
+from inventory.models import ProductStockSummary
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Rebuild ProductStockSummary from the Inventory table and report products whose summary had drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help="Report drift between the summaries and the Inventory table without rewriting them.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Products recomputed per query.")
+
+    def handle(self, *args, **options):
+        product_ids = Product.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=options['batch_size'])
+        drift = []
+        while batch := list(islice(product_ids, options['batch_size'])):
+            drift += self.compare(batch)
+            if not options['verify_only']:
+                summary.refresh(batch)
+
+        for product_id, expected, actual in drift:
+            self.stdout.write(self.style.WARNING(f"Product {product_id}: expected {expected}, found {actual}"))
+        if drift:
+            self.stdout.write(self.style.ERROR(f"{len(drift)} stock summaries out of step with inventory."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Stock summaries match the Inventory table."))
+
+    def compare(self, product_ids):
+        stored = ProductStockSummary.objects.in_bulk(product_ids)
+        drift = []
+        for expected in summary.compute(product_ids):
+            expected_fields = {field: getattr(expected, field) for field in summary.FIELDS}
+            actual = stored.get(expected.product_id)
+            actual_fields = actual and {field: getattr(actual, field) for field in summary.FIELDS}
+            if actual_fields != expected_fields:
+                drift.append((expected.product_id, expected_fields, actual_fields))
+        return drift
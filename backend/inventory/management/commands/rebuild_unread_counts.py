@@ -0,0 +1,21 @@
+from itertools import islice
+from django.core.management.base import BaseCommand
+from accounts.models import User
+from inventory import unread
+
+
+class Command(BaseCommand):
+    help = "Recount every user's cached unread notification counter from the Notification table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Users recounted per query.")
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=options['batch_size'])
+        users = drifted = 0
+        while batch := list(islice(user_ids, options['batch_size'])):
+            drifted += unread.rebuild(batch)
+            users += len(batch)
+
+        message = f"Rebuilt unread counters for {users} users, {drifted} were out of step."
+        self.stdout.write(self.style.WARNING(message) if drifted else self.style.SUCCESS(message))
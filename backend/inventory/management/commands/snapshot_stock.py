@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from inventory.ledger import snapshot
+from sites.models import Site
+
+
+class Command(BaseCommand):
+    help = "Checkpoint every branch's batch quantities for point-in-time stock queries. Run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, action='append', help="Only snapshot this branch (repeatable).")
+
+    def handle(self, *args, **options):
+        branch_ids = options['branch'] or Site.objects.order_by('pk').values_list('pk', flat=True)
+        batches = branches = 0
+        for branch_id in branch_ids:
+            batches += snapshot(branch_id)
+            branches += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted {branches} branches: {batches} batches."))
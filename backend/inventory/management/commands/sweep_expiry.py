@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.expiry import sweep_branch
+from sites.models import Site
+
+
+class Command(BaseCommand):
+    help = "Classify every branch's batches into expiry buckets and quarantine newly expired ones. Run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, action='append', help="Only sweep this branch (repeatable).")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        branch_ids = options['branch'] or Site.objects.order_by('pk').values_list('pk', flat=True)
+        classified = quarantined = branches = 0
+        for branch_id in branch_ids:
+            batches, expired = sweep_branch(branch_id, today)
+            classified += batches
+            quarantined += expired
+            branches += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Swept {branches} branches: {classified} batches classified, {quarantined} quarantined."
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_notification_is_archived'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['branch', 'product', 'expiration_date'], name='inventory_i_branch__720ec9_idx'),
+        ),
+    ]
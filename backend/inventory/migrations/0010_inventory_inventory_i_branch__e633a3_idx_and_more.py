@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_inventory_fefo_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['branch', 'created_at', 'id'], name='inventory_i_branch__e633a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'created_at', 'id'], name='inventory_n_recipie_bc398c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['branch', 'date', 'id'], name='inventory_s_branch__61033b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['date', 'id'], name='inventory_s_date_5bc9ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['from_branch', 'transfer_date', 'id'], name='inventory_s_from_br_aebc8e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['transfer_date', 'id'], name='inventory_s_transfe_89feef_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2 on 2026-10-18 20:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0010_inventory_inventory_i_branch__e633a3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField()),
+                ('sender_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('related_branch_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('notification_type', models.CharField(max_length=20)),
+                ('title', models.CharField(max_length=100, null=True)),
+                ('message', models.TextField()),
+                ('is_read', models.BooleanField(default=False)),
+                ('related_object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='inventory_n_recipie_1f67b8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='inventory_n_recipie_bc398c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['recipient', '-created_at', '-id'], name='notification_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_archived', False), ('is_read', False)), fields=['recipient'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['notification_type', 'created_at'], name='notification_retention_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationarchive',
+            name='recipient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['recipient', 'created_at'], name='inventory_n_recipie_c6bc84_idx'),
+        ),
+    ]
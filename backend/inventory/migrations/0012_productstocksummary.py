@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 20:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_products_pr_created_3be21c_idx'),
+        ('inventory', '0011_notification_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStockSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_summary', serialize=False, to='products.product')),
+                ('total_quantity', models.PositiveIntegerField(default=0)),
+                ('expiring_soon_quantity', models.PositiveIntegerField(default=0)),
+                ('expired_quantity', models.PositiveIntegerField(default=0)),
+                ('branches', models.JSONField(default=dict)),
+                ('as_of', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
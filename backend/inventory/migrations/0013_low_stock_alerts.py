@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-18 20:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sites', '0001_initial'),
+        ('products', '0002_product_products_pr_created_3be21c_idx'),
+        ('inventory', '0012_productstocksummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('threshold_quantity', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('threshold_quantity'))), fields=['branch', 'product'], name='inventory_low_stock_idx'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sites.site'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='inventory',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alerts', to='inventory.inventory'),
+        ),
+        migrations.AddField(
+            model_name='lowstockalert',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product'),
+        ),
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('inventory',), name='one_open_low_stock_alert'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-18 20:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_products_pr_created_3be21c_idx'),
+        ('sites', '0001_initial'),
+        ('inventory', '0013_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiringBatch',
+            fields=[
+                ('inventory', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='expiry', serialize=False, to='inventory.inventory')),
+                ('batch_number', models.CharField(blank=True, max_length=50)),
+                ('expiration_date', models.DateField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('bucket', models.CharField(choices=[('EXPIRED', 'Expired'), ('DAYS_30', 'Within 30 days'), ('DAYS_60', 'Within 60 days'), ('DAYS_90', 'Within 90 days')], max_length=10)),
+                ('swept_on', models.DateField()),
+                ('quarantined_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['expiration_date'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='movement_type',
+            field=models.CharField(choices=[('ADD', 'Addition'), ('REMOVE', 'Removal'), ('TRANSFER', 'Transfer'), ('QUARANTINE', 'Quarantine')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['branch', 'expiration_date'], name='inventory_i_branch__0580a5_idx'),
+        ),
+        migrations.AddField(
+            model_name='expiringbatch',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sites.site'),
+        ),
+        migrations.AddField(
+            model_name='expiringbatch',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product'),
+        ),
+        migrations.AddIndex(
+            model_name='expiringbatch',
+            index=models.Index(fields=['branch', 'bucket', 'expiration_date'], name='inventory_e_branch__95db01_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-18 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_products_pr_created_3be21c_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sites', '0001_initial'),
+        ('inventory', '0014_expiring_batches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('IN_TRANSIT', 'In Transit'), ('RECEIVED', 'Received')], default='IN_TRANSIT', max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('dispatched_at', models.DateTimeField(auto_now_add=True)),
+                ('received_at', models.DateTimeField(blank=True, null=True)),
+                ('dispatched_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dispatched_documents', to=settings.AUTH_USER_MODEL)),
+                ('from_branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_documents', to='sites.site')),
+                ('received_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='received_documents', to=settings.AUTH_USER_MODEL)),
+                ('to_branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_documents', to='sites.site')),
+            ],
+            options={
+                'ordering': ['-dispatched_at', '-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='linked_document',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='inventory.transferdocument'),
+        ),
+        migrations.CreateModel(
+            name='TransferLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.transferdocument')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+            ],
+            options={
+                'unique_together': {('document', 'product')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transferdocument',
+            index=models.Index(fields=['to_branch', 'status'], name='inventory_t_to_bran_b6503f_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2 on 2026-10-18 21:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_products_pr_created_3be21c_idx'),
+        ('sites', '0001_initial'),
+        ('inventory', '0015_transfer_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sites.site')),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventory')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sites.site')),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='inventory.inventory')),
+                ('movement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.stockmovement')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['branch', 'taken_at'], name='inventory_s_branch__3bdcc6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockledgerentry',
+            index=models.Index(fields=['branch', 'created_at'], name='inventory_s_branch__40ac5f_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['branch', 'updated_at'], name='inventory_i_branch__659846_idx'),
+        ),
+    ]
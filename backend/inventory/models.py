@@ -1,8 +1,89 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, When
 from accounts.models import User
 from products.models import Product
 from sites.models import Site
 from django.utils import timezone
+from core import cache as versioned_cache
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, requested, available):
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Insufficient stock for product {product_id}: {available} of {requested} available")
+
+
+class InventoryQuerySet(models.QuerySet):
+    def sellable(self, branch, product_ids):
+        """
+        The unexpired batches of ``product_ids`` holding stock at
+        ``branch``, locked, in first-expiry-first-out order per product
+        (batches without an expiry date last).
+        """
+        today = timezone.now().date()
+        return (
+            self.select_for_update()
+            .filter(branch=branch, product_id__in=product_ids, quantity__gt=0)
+            .filter(Q(expiration_date__isnull=True) | Q(expiration_date__gte=today))
+            .order_by('product_id', F('expiration_date').asc(nulls_last=True), 'id')
+        )
+
+    def allocate(self, branch, quantities):
+        """
+        First-expiry-first-out allocation of ``quantities`` ({product_id:
+        units}) across the batches held at ``branch``.
+
+        Candidate batches are locked and ordered by expiry in one query;
+        expired batches are never allocated and batches without an expiry
+        date go last. Returns {product_id: [(inventory, units), ...]} and
+        raises InsufficientStock if a product cannot be covered. Nothing is
+        written; pass the allocations to ``reserve`` to take the stock.
+        """
+        batches = self.sellable(branch, quantities.keys())
+        remaining = dict(quantities)
+        allocations = {product_id: [] for product_id in quantities}
+        for batch in batches:
+            wanted = remaining[batch.product_id]
+            if wanted:
+                units = min(wanted, batch.quantity)
+                allocations[batch.product_id].append((batch, units))
+                remaining[batch.product_id] -= units
+
+        for product_id, wanted in remaining.items():
+            if wanted:
+                raise InsufficientStock(product_id, quantities[product_id], quantities[product_id] - wanted)
+        return allocations
+
+    def reserve(self, quantities):
+        """
+        Atomically take stock out of several rows at once.
+
+        ``quantities`` maps inventory ids to the number of units to remove.
+        A single conditional UPDATE decrements only the rows that still hold
+        enough stock, so concurrent sales can never oversell or lose a
+        decrement. Rows pushed below their threshold raise a low-stock
+        alert. Returns True when every row was decremented; otherwise
+        nothing is changed and False is returned. Callers bump the
+        inventory cache version of the branches involved and touch the
+        stock summaries of the products.
+        """
+        if not quantities:
+            return True
+        wanted = Case(*[When(pk=pk, then=quantity) for pk, quantity in quantities.items()])
+        with transaction.atomic():
+            updated = self.filter(pk__in=quantities.keys(), quantity__gte=wanted).update(
+                quantity=F('quantity') - wanted,
+                updated_at=timezone.now(),
+            )
+            if updated != len(quantities):
+                transaction.set_rollback(True)
+                return False
+            from . import lowstock
+
+            lowstock.check(quantities.keys())
+        return True
+
 
 class Inventory(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, db_index=True)
@@ -16,18 +97,156 @@ class Inventory(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InventoryQuerySet.as_manager()
+
     class Meta:
         unique_together = ('product', 'branch', 'batch_number')
+        indexes = [
+            models.Index(fields=['branch', 'product', 'expiration_date']),
+            models.Index(fields=['branch', 'expiration_date']),
+            models.Index(fields=['branch', 'created_at', 'id']),
+            models.Index(fields=['branch', 'updated_at']),
+            # Only the few rows below threshold are indexed
+            models.Index(
+                fields=['branch', 'product'], condition=Q(quantity__lt=F('threshold_quantity')),
+                name='inventory_low_stock_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.name} at {self.branch.name}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        from . import ledger
+
+        # A new batch is logged to the ledger by post_save; keep both on the
+        # same side of any stock snapshot (see inventory.ledger)
+        with transaction.atomic():
+            ledger.lock_branch(self.branch_id)
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored quantity, so the ledger can log what a later save() changes
+        instance._saved_quantity = instance.__dict__.get('quantity')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._saved_quantity = self.__dict__.get('quantity')
+
     def is_expired(self):
         return self.expiration_date and self.expiration_date < timezone.now().date()
 
-    def adjust_quantity(self, quantity):
+    def adjust_quantity(self, quantity, **fields):
+        """
+        Atomically add ``quantity`` (negative to remove) to this row, along
+        with any other ``fields`` to set. Removals only apply while enough
+        stock remains; returns False instead of going below zero.
+        """
+        from . import ledger, lowstock, summary
+
+        now = timezone.now()
+        # update() skips auto_now, so set what save() would have
+        fields = {'last_checked': now, 'updated_at': now, **fields}
+        rows = Inventory.objects.filter(pk=self.pk)
+        if quantity < 0:
+            rows = rows.filter(quantity__gte=-quantity)
+        # Keep the row locked until the low-stock check has run
+        with transaction.atomic():
+            updated = rows.update(quantity=F('quantity') + quantity, **fields)
+            if not updated:
+                return False
+            ledger.record([(self, quantity, None)])
+            lowstock.check([self.pk])
+        versioned_cache.bump('inventory', self.branch_id)
+        summary.touch(self.product_id)
         self.quantity += quantity
-        self.save()
+        if getattr(self, '_saved_quantity', None) is not None:
+            self._saved_quantity += quantity
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+
+class LowStockAlert(models.Model):
+    """
+    A batch crossing below its threshold_quantity. The alert stays open
+    until the batch is restocked to its threshold, so each crossing raises
+    exactly one STOCK_ALERT (see inventory.lowstock).
+    """
+    inventory = models.ForeignKey(Inventory, related_name='low_stock_alerts', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    branch = models.ForeignKey(Site, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()  # Stock left when the threshold was crossed
+    threshold_quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['inventory'], condition=Q(resolved_at__isnull=True), name='one_open_low_stock_alert',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} at {self.branch.name}: {self.quantity}/{self.threshold_quantity}"
+
+
+class ExpiringBatch(models.Model):
+    """
+    A batch that has expired or expires within 90 days, classified by the
+    nightly ``sweep_expiry`` command so the expiry dashboard reads a small
+    precomputed table instead of scanning Inventory.
+    """
+    BUCKET_CHOICES = [
+        ('EXPIRED', 'Expired'),
+        ('DAYS_30', 'Within 30 days'),
+        ('DAYS_60', 'Within 60 days'),
+        ('DAYS_90', 'Within 90 days'),
+    ]
+
+    inventory = models.OneToOneField(Inventory, primary_key=True, related_name='expiry', on_delete=models.CASCADE)
+    branch = models.ForeignKey(Site, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    batch_number = models.CharField(max_length=50, blank=True)
+    expiration_date = models.DateField()
+    quantity = models.PositiveIntegerField()
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES)
+    swept_on = models.DateField()
+    quarantined_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['expiration_date']
+        indexes = [models.Index(fields=['branch', 'bucket', 'expiration_date'])]
+
+    def __str__(self):
+        return f"{self.product.name} ({self.batch_number or 'N/A'}) at {self.branch.name}: {self.get_bucket_display()}"
+
+
+class ProductStockSummary(models.Model):
+    """
+    Network-wide stock of one product, kept in step with Inventory by
+    inventory.summary so "how much of X do we hold, and where?" is a
+    single-row read. ``branches`` maps branch ids to that branch's
+    quantity, expiring_soon and expired units; the expiry buckets are
+    evaluated for the ``as_of`` day.
+    """
+    product = models.OneToOneField(Product, primary_key=True, related_name='stock_summary', on_delete=models.CASCADE)
+    total_quantity = models.PositiveIntegerField(default=0)
+    expiring_soon_quantity = models.PositiveIntegerField(default=0)  # Within STOCK_EXPIRING_SOON_DAYS
+    expired_quantity = models.PositiveIntegerField(default=0)
+    branches = models.JSONField(default=dict)
+    as_of = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product.name}: {self.total_quantity}"
 
 
 class StockTransfer(models.Model):
@@ -70,18 +289,64 @@ class StockTransfer(models.Model):
     received_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='received_transfers')
     received_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['from_branch', 'transfer_date', 'id']),
+            models.Index(fields=['transfer_date', 'id']),
+        ]
     
 
     def __str__(self):
         return f"Transfer from {self.from_branch.name} to {self.to_branch.name} - {self.product.name}"
 
 
+class TransferDocument(models.Model):
+    """
+    One dispatch of many products from one site to another: a header
+    plus a TransferLine per product, dispatched and received as a unit by
+    inventory.transfers instead of one StockTransfer per product.
+    """
+    STATUS_CHOICES = [
+        ('IN_TRANSIT', 'In Transit'),
+        ('RECEIVED', 'Received'),
+    ]
+
+    from_branch = models.ForeignKey(Site, related_name='outgoing_documents', on_delete=models.CASCADE)
+    to_branch = models.ForeignKey(Site, related_name='incoming_documents', on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='IN_TRANSIT')
+    notes = models.TextField(blank=True)
+    dispatched_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='dispatched_documents')
+    dispatched_at = models.DateTimeField(auto_now_add=True)
+    received_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='received_documents')
+    received_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-dispatched_at', '-id']
+        indexes = [models.Index(fields=['to_branch', 'status'])]
+
+    def __str__(self):
+        return f"Transfer document {self.id}: {self.from_branch.name} to {self.to_branch.name}"
+
+
+class TransferLine(models.Model):
+    document = models.ForeignKey(TransferDocument, related_name='lines', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('document', 'product')
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product.name}"
+
+
 
 class StockMovement(models.Model):
     MOVEMENT_TYPE_CHOICES = [
         ('ADD', 'Addition'),
         ('REMOVE', 'Removal'),
         ('TRANSFER', 'Transfer'),
+        ('QUARANTINE', 'Quarantine'),  # Expired batch pulled from sale by sweep_expiry
     ]
     
     MOVEMENT_STATUS_CHOICES = [
@@ -98,13 +363,58 @@ class StockMovement(models.Model):
     details = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=MOVEMENT_STATUS_CHOICES, null=True, blank=True)
     linked_transfer = models.ForeignKey('StockTransfer', null=True, blank=True, on_delete=models.CASCADE)
+    linked_document = models.ForeignKey('TransferDocument', null=True, blank=True, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'date', 'id']),
+            models.Index(fields=['date', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.get_movement_type_display()} - {self.product.name} at {self.branch.name}"
 
 
 
+class StockLedgerEntry(models.Model):
+    """
+    One signed change to a batch's quantity, appended by every path that
+    changes it (see inventory.ledger). Together with StockSnapshot this
+    answers "what did branch X hold at time T" without a full replay.
+    """
+    inventory = models.ForeignKey(Inventory, related_name='ledger_entries', on_delete=models.CASCADE)
+    branch = models.ForeignKey(Site, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    movement = models.ForeignKey(StockMovement, null=True, blank=True, on_delete=models.SET_NULL)
+    delta = models.IntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['branch', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.delta:+d} {self.product.name} at {self.branch.name}"
+
+
+class StockSnapshot(models.Model):
+    """
+    A batch's quantity at a checkpoint, written for every batch holding
+    stock when ``snapshot_stock`` runs; batches absent from a checkpoint
+    held nothing.
+    """
+    inventory = models.ForeignKey(Inventory, related_name='snapshots', on_delete=models.CASCADE)
+    branch = models.ForeignKey(Site, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['branch', 'taken_at'])]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product.name} at {self.branch.name} ({self.taken_at})"
+
+
 class InventoryVersion(models.Model):
     inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE)
     previous_quantity = models.PositiveIntegerField()
@@ -141,8 +451,43 @@ class Notification(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['recipient', 'is_read']),
+            # Partial indexes over the live inbox only, so archived history never slows it down
+            models.Index(
+                fields=['recipient', '-created_at', '-id'], condition=models.Q(is_archived=False),
+                name='notification_inbox_idx',
+            ),
+            models.Index(
+                fields=['recipient'], condition=models.Q(is_read=False, is_archived=False),
+                name='notification_unread_idx',
+            ),
+            models.Index(fields=['notification_type', 'created_at'], name='notification_retention_idx'),
         ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.title}"
+
+
+class NotificationArchive(models.Model):
+    """
+    Notifications moved out of the live table by ``archive_notifications``.
+    Append-only with no foreign keys besides the recipient, so the table can
+    be range-partitioned on created_at without touching the application.
+    """
+    original_id = models.PositiveIntegerField()
+    recipient = models.ForeignKey(User, related_name='archived_notifications', on_delete=models.CASCADE, db_index=False)
+    sender_id = models.PositiveIntegerField(null=True, blank=True)
+    related_branch_id = models.PositiveIntegerField(null=True, blank=True)
+    notification_type = models.CharField(max_length=20)
+    title = models.CharField(max_length=100, null=True)
+    message = models.TextField()
+    is_read = models.BooleanField(default=False)
+    related_object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['recipient', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.notification_type} - {self.title} (archived)"
@@ -0,0 +1,50 @@
+"""
+Push notification events to the recipient's stream (served by core.asgi).
+
+Events are published once the surrounding transaction commits, so a client
+never hears about a row it can't read yet. Each stream receives
+``notification`` events carrying the serialized row and ``unread`` events
+carrying a change to the unread count (sent by inventory.unread).
+"""
+import logging
+from django.db import transaction
+from core import pubsub
+
+logger = logging.getLogger(__name__)
+
+
+def channel_for(user_id):
+    return f"notifications:{user_id}"
+
+
+def _publish(user_id, event, data):
+    try:
+        pubsub.publish(channel_for(user_id), {'event': event, 'data': data})
+    except Exception:
+        # Clients resync on reconnect; never fail the write over a push
+        logger.exception("Publishing %s event for user %s failed", event, user_id)
+
+
+def publish_notifications(notifications):
+    """Push newly created notifications to their recipients."""
+    notifications = list(notifications)
+    if not notifications:
+        return
+
+    def send():
+        from apis.serializers import NotificationSerializer
+
+        try:
+            payloads = NotificationSerializer(notifications, many=True).data
+        except Exception:
+            logger.exception("Serializing notifications for the stream failed")
+            return
+        for notification, data in zip(notifications, payloads):
+            _publish(notification.recipient_id, 'notification', data)
+
+    transaction.on_commit(send)
+
+
+def publish_unread_delta(user_id, delta):
+    if delta:
+        transaction.on_commit(lambda: _publish(user_id, 'unread', {'delta': delta}))
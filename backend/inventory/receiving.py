@@ -0,0 +1,122 @@
+"""
+Receiving stock into a site in bulk.
+
+A delivery of any size costs a fixed handful of statements: insert any
+missing (product, branch, batch_number) rows empty with one INSERT ...
+ON CONFLICT DO NOTHING, lock every batch of the delivery, add each
+line's units with one UPDATE, read back the rows, then write one stock
+movement and one inventory version per line with bulk_create.
+Everything runs in one transaction, and since the quantities are only
+ever added to locked rows, concurrent deliveries of the same new batch
+both count.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from core import cache as versioned_cache
+from . import ledger, lowstock, summary
+from .models import Inventory, InventoryVersion, StockMovement
+
+
+def _merge(lines):
+    """Fold repeated (product, batch) lines into one, keeping the latest expiry given."""
+    merged = {}
+    for line in lines:
+        key = (line['product'].id, line.get('batch_number') or '')
+        if key in merged:
+            merged[key]['quantity'] += line['quantity']
+            merged[key]['expiration_date'] = line.get('expiration_date') or merged[key]['expiration_date']
+        else:
+            merged[key] = {
+                'product': line['product'],
+                'quantity': line['quantity'],
+                'batch_number': key[1],
+                'expiration_date': line.get('expiration_date'),
+            }
+    return merged
+
+
+def _batches(site, keys, lock=False):
+    rows = Inventory.objects.filter(
+        branch=site,
+        product_id__in={product_id for product_id, _ in keys},
+        batch_number__in={batch_number for _, batch_number in keys},
+    )
+    if lock:
+        # Lock in primary-key order so concurrent deliveries cannot deadlock
+        rows = rows.select_for_update().order_by('pk')
+    return {(row.product_id, row.batch_number): row for row in rows if (row.product_id, row.batch_number) in keys}
+
+
+def receive_lines(site, lines, user, details="Warehouse received new stock.", **movement):
+    """
+    Add every line ({product, quantity, batch_number, expiration_date}) to
+    ``site``'s stock. Extra keyword arguments are set on each stock
+    movement (e.g. movement_type, linked_document). Returns the resulting
+    Inventory rows, one per distinct (product, batch_number), in the order
+    first given.
+    """
+    movement.setdefault('movement_type', 'ADD')
+    lines = _merge(lines)
+    with transaction.atomic():
+        # New batches are invisible to a concurrent snapshot's row locks
+        ledger.lock_branch(site.id)
+        Inventory.objects.bulk_create(
+            [
+                Inventory(
+                    product=line['product'],
+                    branch=site,
+                    batch_number=line['batch_number'],
+                    quantity=0,
+                    expiration_date=line['expiration_date'],
+                    received_by=user,
+                )
+                for line in lines.values()
+            ],
+            ignore_conflicts=True,
+        )
+        locked = _batches(site, lines.keys(), lock=True)
+        previous = {key: row.quantity for key, row in locked.items()}
+        ids = {key: row.pk for key, row in locked.items()}
+        now = timezone.now()
+        Inventory.objects.filter(pk__in=ids.values()).update(
+            quantity=F('quantity') + Case(*[When(pk=ids[key], then=Value(line['quantity'])) for key, line in lines.items()]),
+            expiration_date=Case(
+                *[When(pk=ids[key], then=Value(line['expiration_date'])) for key, line in lines.items() if line['expiration_date']],
+                default=F('expiration_date'),
+            ),
+            received_by=user,
+            updated_at=now,
+            last_checked=now,
+        )
+        inventories = _batches(site, lines.keys())
+
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(
+                product=line['product'],
+                branch=site,
+                quantity=line['quantity'],
+                details=f"{details} Batch: {line['batch_number'] or 'N/A'}",
+                **movement,
+            )
+            for line in lines.values()
+        ])
+        InventoryVersion.objects.bulk_create([
+            InventoryVersion(
+                inventory=inventories[key],
+                previous_quantity=previous[key],
+                new_quantity=inventories[key].quantity,
+                modified_by=user,
+                stock_movement=movement,
+            )
+            for key, movement in zip(lines, movements)
+        ])
+        ledger.record(
+            (inventories[key], line['quantity'], movement) for (key, line), movement in zip(lines.items(), movements)
+        )
+
+        # bulk_create skips the post_save hooks
+        lowstock.check(inventory.id for inventory in inventories.values())
+        versioned_cache.bump('inventory', site.id)
+        summary.touch(*{product_id for product_id, _ in lines})
+    return [inventories[key] for key in lines]
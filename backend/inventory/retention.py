@@ -0,0 +1,59 @@
+"""
+Notification retention: move expired or archived notifications out of the
+live table into NotificationArchive, one batch per transaction.
+
+A notification expires ``NOTIFICATION_TTL_DAYS[type]`` days after it was
+created (``NOTIFICATION_DEFAULT_TTL_DAYS`` for types not listed). Archived
+notifications move regardless of age.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from . import unread
+from .models import Notification, NotificationArchive
+
+ARCHIVED_FIELDS = [
+    'id', 'recipient_id', 'sender_id', 'related_branch_id', 'notification_type', 'title', 'message',
+    'is_read', 'is_archived', 'related_object_id', 'created_at',
+]
+
+
+def expired_filter(now=None):
+    now = now or timezone.now()
+    ttls = settings.NOTIFICATION_TTL_DAYS
+    expired = Q(is_archived=True) | Q(
+        created_at__lt=now - timedelta(days=settings.NOTIFICATION_DEFAULT_TTL_DAYS),
+    ) & ~Q(notification_type__in=list(ttls))
+    for notification_type, days in ttls.items():
+        expired |= Q(notification_type=notification_type, created_at__lt=now - timedelta(days=days))
+    return expired
+
+
+def archive_batch(batch_size, now=None):
+    """Move up to ``batch_size`` expired notifications; returns how many moved."""
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.filter(expired_filter(now))
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        NotificationArchive.objects.bulk_create([
+            NotificationArchive(
+                original_id=row['id'],
+                **{field: row[field] for field in ARCHIVED_FIELDS if field not in ('id', 'is_archived')},
+            )
+            for row in rows
+        ])
+        Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+        still_unread = Counter(row['recipient_id'] for row in rows if not row['is_read'] and not row['is_archived'])
+        for recipient_id, count in still_unread.items():
+            unread.adjust(recipient_id, -count)
+    return len(rows)
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import User
+from core import cache as versioned_cache
+from . import fanout, ledger, lowstock, summary, unread
+from .models import Inventory, Notification, StockTransfer
+from .realtime import publish_notifications
+
+
+@receiver([post_save, post_delete], sender=Inventory)
+def invalidate_inventory_views(sender, instance, **kwargs):
+    versioned_cache.bump('inventory', instance.branch_id)
+    summary.touch(instance.product_id)
+
+
+@receiver(post_save, sender=Inventory)
+def record_quantity_change(sender, instance, created, update_fields=None, **kwargs):
+    ledger.record_save(instance, created, update_fields)
+
+
+@receiver(post_save, sender=Inventory)
+def check_low_stock(sender, instance, **kwargs):
+    lowstock.check([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=StockTransfer)
+def invalidate_transfer_views(sender, instance, **kwargs):
+    versioned_cache.bump('transfer', instance.from_branch_id, instance.to_branch_id)
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    if created:
+        publish_notifications([instance])
+        if unread.is_unread(instance):
+            unread.adjust(instance.recipient_id, 1)
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_notification_recipients(sender, instance, **kwargs):
+    fanout.forget_recipients()
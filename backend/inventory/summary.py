@@ -0,0 +1,80 @@
+"""
+Incremental maintenance of ProductStockSummary.
+
+Every inventory write names the products it touched; once the transaction
+commits, those products' summaries are recomputed from their Inventory
+rows (a handful of batches each) and upserted in one statement. Running
+after commit means the last refresh always sees every committed change,
+so concurrent writers can't leave a summary behind. Expiry buckets move
+with the calendar, so summaries computed on an earlier day are refreshed
+when read (see ``refresh_stale``) or by ``rebuild_stock_summary``.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Inventory, ProductStockSummary
+
+FIELDS = ['total_quantity', 'expiring_soon_quantity', 'expired_quantity', 'branches', 'as_of']
+
+
+def compute(product_ids):
+    """Summaries for ``product_ids`` as unsaved ProductStockSummary rows."""
+    today = timezone.localdate()
+    soon = today + timedelta(days=settings.STOCK_EXPIRING_SOON_DAYS)
+    rows = (
+        Inventory.objects.filter(product_id__in=product_ids)
+        .values('product_id', 'branch_id')
+        .annotate(
+            units=Coalesce(Sum('quantity'), 0),
+            expiring_soon=Coalesce(Sum('quantity', filter=Q(expiration_date__gte=today, expiration_date__lte=soon)), 0),
+            expired=Coalesce(Sum('quantity', filter=Q(expiration_date__lt=today)), 0),
+        )
+        .order_by()
+    )
+    branches = defaultdict(dict)
+    for row in rows:
+        branches[row['product_id']][str(row['branch_id'])] = {
+            'quantity': row['units'], 'expiring_soon': row['expiring_soon'], 'expired': row['expired'],
+        }
+
+    return [
+        ProductStockSummary(
+            product_id=product_id,
+            total_quantity=sum(branch['quantity'] for branch in branches[product_id].values()),
+            expiring_soon_quantity=sum(branch['expiring_soon'] for branch in branches[product_id].values()),
+            expired_quantity=sum(branch['expired'] for branch in branches[product_id].values()),
+            branches=branches[product_id],
+            as_of=today,
+        )
+        for product_id in product_ids
+    ]
+
+
+def refresh(product_ids):
+    product_ids = sorted(set(product_ids))
+    if product_ids:
+        ProductStockSummary.objects.bulk_create(
+            compute(product_ids), update_conflicts=True, unique_fields=['product'], update_fields=[*FIELDS, 'updated_at'],
+        )
+
+
+def touch(*product_ids):
+    """Refresh the summaries of ``product_ids`` once the current transaction commits."""
+    product_ids = [product_id for product_id in product_ids if product_id]
+    if product_ids:
+        transaction.on_commit(lambda: refresh(product_ids))
+
+
+def refresh_stale(summaries):
+    """Re-evaluate the expiry buckets of summaries computed before today; returns fresh rows."""
+    today = timezone.localdate()
+    stale = [summary.product_id for summary in summaries if summary.as_of < today]
+    if not stale:
+        return list(summaries)
+    refresh(stale)
+    fresh = ProductStockSummary.objects.select_related('product').in_bulk(stale)
+    return [fresh.get(summary.product_id, summary) for summary in summaries]
@@ -0,0 +1,134 @@
+"""
+Multi-line transfer documents.
+
+``dispatch`` allocates every line first-expiry-first-out from the source
+site (one locking query, in product/expiry/id order), takes all of the
+batches out with one conditional UPDATE, and logs the movements and
+versions with bulk_create; the stock then sits in transit on the
+document. ``receive`` confirms those movements and lands the same batches
+at the destination through receiving.receive_lines, which locks the
+destination rows it already has in primary-key order and upserts the
+rest. Each side sends one notification for the whole document.
+"""
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from core import cache as versioned_cache
+from . import ledger, summary
+from .fanout import notify_roles
+from .models import Inventory, InventoryVersion, StockMovement, TransferDocument, TransferLine
+from .receiving import receive_lines
+
+
+def dispatch(from_branch, to_branch, lines, user, notes=''):
+    """
+    Create a document for ``lines`` ({product, quantity}) and take the
+    stock out of ``from_branch``. Raises InsufficientStock, writing
+    nothing, if a product cannot be covered; returns None if a batch was
+    drained concurrently. Otherwise returns (document, allocations).
+    """
+    products = {line['product'].id: line['product'] for line in lines}
+    quantities = Counter()
+    for line in lines:
+        quantities[line['product'].id] += line['quantity']
+
+    with transaction.atomic():
+        allocations = [
+            (batch, units)
+            for batches in Inventory.objects.allocate(from_branch, quantities).values()
+            for batch, units in batches
+        ]
+        if not Inventory.objects.reserve({batch.id: units for batch, units in allocations}):
+            return None
+
+        document = TransferDocument.objects.create(
+            from_branch=from_branch, to_branch=to_branch, notes=notes, dispatched_by=user,
+        )
+        TransferLine.objects.bulk_create([
+            TransferLine(document=document, product=products[product_id], quantity=quantity)
+            for product_id, quantity in quantities.items()
+        ])
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(
+                product=products[batch.product_id],
+                branch=from_branch,
+                movement_type='TRANSFER',
+                quantity=units,
+                details=f"Dispatched to {to_branch.name}. Batch: {batch.batch_number or 'N/A'}",
+                status='IN_TRANSIT',
+                linked_document=document,
+            )
+            for batch, units in allocations
+        ])
+        InventoryVersion.objects.bulk_create([
+            InventoryVersion(
+                inventory=batch,
+                previous_quantity=batch.quantity,
+                new_quantity=batch.quantity - units,
+                modified_by=user,
+                stock_movement=movement,
+            )
+            for (batch, units), movement in zip(allocations, movements)
+        ])
+        ledger.record((batch, -units, movement) for (batch, units), movement in zip(allocations, movements))
+        versioned_cache.bump('inventory', from_branch.id)
+        summary.touch(*quantities)
+
+    notify_roles(
+        ['Admin'], [to_branch],
+        sender=user,
+        notification_type='TRANSFER_APPROVAL',
+        related_branch=from_branch,
+        related_object_id=document.id,
+        title=f"Dispatch Incoming: {len(quantities)} products",
+        message=f"{sum(quantities.values())} units across {len(quantities)} products have been dispatched to your branch.",
+    )
+    return document, allocations
+
+
+def receive(document, user):
+    """
+    Land an IN_TRANSIT ``document`` at its destination. The caller locks
+    the document row and checks its status. Returns the destination
+    Inventory rows.
+    """
+    dispatched = list(
+        InventoryVersion.objects.select_related('inventory__product', 'stock_movement')
+        .filter(stock_movement__linked_document=document, stock_movement__status='IN_TRANSIT')
+        .order_by('pk')
+    )
+    with transaction.atomic():
+        StockMovement.objects.filter(
+            id__in=[version.stock_movement_id for version in dispatched]
+        ).update(status='CONFIRMED')
+        inventories = receive_lines(
+            document.to_branch,
+            [
+                {
+                    'product': version.inventory.product,
+                    'quantity': version.stock_movement.quantity,
+                    'batch_number': version.inventory.batch_number,
+                    'expiration_date': version.inventory.expiration_date,
+                }
+                for version in dispatched
+            ],
+            user,
+            details=f"Received from {document.from_branch.name}.",
+            movement_type='TRANSFER',
+            linked_document=document,
+        )
+
+        document.status = 'RECEIVED'
+        document.received_by = user
+        document.received_at = timezone.now()
+        document.save(update_fields=['status', 'received_by', 'received_at'])
+
+    notify_roles(
+        ['Admin'], [document.from_branch],
+        sender=user,
+        notification_type='SYSTEM',
+        related_object_id=document.id,
+        title="Dispatch Received",
+        message=f"Transfer document {document.id} was received at {document.to_branch.name}.",
+    )
+    return inventories
@@ -0,0 +1,70 @@
+"""
+Per-user unread notification counters.
+
+A notification counts as unread while it is neither read nor archived. The
+counter lives in the cache and is adjusted with an atomic ``incr`` once the
+transaction that changed the rows commits; a missing counter is simply
+recounted from the table on the next read. ``rebuild_unread_counts``
+reconciles every counter with the table.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from .models import Notification
+from .realtime import publish_unread_delta
+
+
+def _key(user_id):
+    return f"unread_count:{user_id}"
+
+
+def is_unread(notification):
+    return not notification.is_read and not notification.is_archived
+
+
+def unread_queryset(user_id):
+    return Notification.objects.filter(recipient_id=user_id, is_read=False, is_archived=False)
+
+
+def get_count(user_id):
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = unread_queryset(user_id).count()
+        # add, not set: never overwrite a counter a concurrent write just adjusted
+        cache.add(_key(user_id), count, settings.UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def _incr(user_id, delta):
+    key = _key(user_id)
+    try:
+        if cache.incr(key, delta) < 0:
+            cache.delete(key)
+    except ValueError:
+        pass  # Not cached; the next read counts from the table
+
+
+def adjust(user_id, delta):
+    """Shift a user's unread count by ``delta`` once the transaction commits."""
+    if not delta:
+        return
+    transaction.on_commit(lambda: _incr(user_id, delta))
+    publish_unread_delta(user_id, delta)
+
+
+def rebuild(user_ids):
+    """Recount the given users from the table; returns how many counters were off."""
+    user_ids = list(user_ids)
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(
+        Notification.objects.filter(recipient_id__in=user_ids, is_read=False, is_archived=False)
+        .values_list('recipient_id').annotate(n=Count('id')).order_by()
+    )
+    cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    drifted = sum(
+        1 for user_id, count in counts.items()
+        if _key(user_id) in cached and cached[_key(user_id)] != count
+    )
+    cache.set_many({_key(user_id): count for user_id, count in counts.items()}, settings.UNREAD_COUNT_TIMEOUT)
+    return drifted
@@ -1,9 +1,15 @@
 from django.contrib import admin
-from .models import Product
+from .models import Product, ProductCode
 
 # Register your models here.
+class ProductCodeInline(admin.TabularInline):
+    model = ProductCode
+    extra = 0
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
+    inlines = [ProductCodeInline]
     list_display = ["id", "name", "category", "unit_price", "manufacturer", "description"]  # Adds these fields to the list display
     list_filter = ["category", "manufacturer"]  # Adds filtering options in the sidebar
     search_fields = ["name", "category", "manufacturer__name"]  # Adds a search box for these fields
@@ -0,0 +1,102 @@
+"""
+Scan-to-sell: resolve a barcode to its product, price and branch stock.
+
+Each process keeps two LRUs of BARCODE_CACHE_SIZE entries. Code → product
+entries are checked against the shared 'product' cache version, bumped
+whenever a Product or ProductCode is saved or deleted (so an edit
+through ProductDetailAPIView reaches every process); stock entries are
+checked against the branch's 'inventory' version. A hit costs one cache
+round trip for the versions and no database queries.
+"""
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models import Q, Sum
+from django.utils import timezone
+from core import cache as versioned_cache
+from inventory.models import Inventory
+from .models import ProductCode, normalize_code
+
+MISSING = object()
+
+
+class LRU:
+    """A bounded, thread-safe map whose entries are only valid for the version stored with them."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                return MISSING
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_codes = LRU(settings.BARCODE_CACHE_SIZE)
+_stock = LRU(settings.BARCODE_CACHE_SIZE)
+
+
+def _product(code):
+    product_code = ProductCode.objects.select_related('product').filter(code=code).first()
+    if product_code is None:
+        return None  # Cached too, so repeated bad scans stay off the database
+    product = product_code.product
+    return {
+        'code': code,
+        'product_id': product.id,
+        'name': product.name,
+        'brand': product.brand,
+        'unit_price': product.unit_price,
+        'pack_size': product_code.pack_size,
+        'label': product_code.label,
+    }
+
+
+def _units_in_stock(product_id, branch_id, today):
+    return Inventory.objects.filter(
+        Q(expiration_date__isnull=True) | Q(expiration_date__gte=today),
+        branch_id=branch_id, product_id=product_id, quantity__gt=0,
+    ).aggregate(units=Sum('quantity'))['units'] or 0
+
+
+def lookup(code, branch_id=None):
+    """
+    The product record for a scanned ``code`` with ``in_stock`` (unexpired
+    units at ``branch_id``, None without a branch), or None if the code
+    is unknown.
+    """
+    code = normalize_code(code)
+    product_version, = versioned_cache.get_versions(['product'])
+    record = _codes.get(code, product_version)
+    if record is MISSING:
+        record = _product(code)
+        _codes.set(code, product_version, record)
+    if record is None:
+        return None
+
+    in_stock = None
+    if branch_id:
+        inventory_version, = versioned_cache.get_versions(['inventory'], branch_id)
+        today = timezone.now().date()
+        key = (record['product_id'], branch_id, today)
+        in_stock = _stock.get(key, inventory_version)
+        if in_stock is MISSING:
+            in_stock = _units_in_stock(record['product_id'], branch_id, today)
+            _stock.set(key, inventory_version, in_stock)
+    return {**record, 'in_stock': in_stock}
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 21:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=64, unique=True)),
+                ('pack_size', models.PositiveIntegerField(default=1)),
+                ('label', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='codes', to='products.product')),
+            ],
+        ),
+    ]
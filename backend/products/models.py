@@ -8,8 +8,62 @@ class Product(models.Model):
     category = models.CharField(max_length=100)
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     manufacturer = models.CharField(max_length=100, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.brand})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored searchable text, so a save() that leaves it alone keeps the search index
+        instance._saved_search_text = instance.search_text()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._saved_search_text = self.search_text()
+
+    def search_text(self):
+        """(name, brand) as loaded, or None if either was deferred."""
+        if 'name' not in self.__dict__ or 'brand' not in self.__dict__:
+            return None
+        return self.name, self.brand
+
+
+def normalize_code(code):
+    """
+    Canonical form of a scanned code: GTIN-8/12/13/14 are zero-padded to
+    14 digits, so a UPC-A and the EAN-13 it is printed as match; other
+    codes (internal SKUs) are only trimmed.
+    """
+    code = (code or '').strip()
+    if code.isdigit() and len(code) in (8, 12, 13, 14):
+        return code.zfill(14)
+    return code
+
+
+class ProductCode(models.Model):
+    """
+    A barcode, GTIN or SKU that identifies a product when scanned. A
+    product may have several, e.g. one per pack size.
+    """
+    code = models.CharField(max_length=64, unique=True)
+    product = models.ForeignKey(Product, related_name='codes', on_delete=models.CASCADE)
+    pack_size = models.PositiveIntegerField(default=1)  # Units of the product one scan sells
+    label = models.CharField(max_length=100, blank=True)  # e.g. "Box of 10"
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        self.code = normalize_code(self.code)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.code} ({self.product.name} x{self.pack_size})"
@@ -0,0 +1,66 @@
+"""
+Product lookup for the dispensing screen (see core.search).
+
+Candidates are matched on name and brand, then re-ranked for a branch:
+a product with unexpired stock there gets IN_STOCK_BOOST on top of its
+relevance, and equal scores go to the larger stock.
+"""
+from django.db.models import Q, Sum
+from django.utils import timezone
+from core import search
+from inventory.models import Inventory
+from .models import Product
+
+FIELDS = ('name', 'brand')
+CANDIDATES = 100
+IN_STOCK_BOOST = 0.1
+
+
+def _documents():
+    for product_id, name, brand in Product.objects.values_list('id', *FIELDS).iterator(chunk_size=5000):
+        yield product_id, f"{name} {brand}"
+
+
+def matches(query, limit=None):
+    """[(product_id, relevance)] best first."""
+    if search.in_database():
+        products = search.database_search(Product.objects.all(), FIELDS, query)
+        if limit:
+            products = products[:limit]
+        return list(products.values_list('id', 'relevance'))
+    return search.local_index('product_search', _documents).search(query, limit)
+
+
+def matching_ids(query):
+    """Every matching product id, as a subquery where the database can search."""
+    if search.in_database():
+        return search.database_search(Product.objects.all(), FIELDS, query).values('id')
+    return [product_id for product_id, _ in matches(query)]
+
+
+def search_products(query, branch_id=None, limit=20):
+    """[(product, relevance, units in stock at the branch)] best first."""
+    candidates = matches(query, CANDIDATES)
+    stock = {}
+    if branch_id and candidates:
+        today = timezone.now().date()
+        stock = dict(
+            Inventory.objects.filter(branch_id=branch_id, product_id__in=[product_id for product_id, _ in candidates], quantity__gt=0)
+            .filter(Q(expiration_date__isnull=True) | Q(expiration_date__gte=today))
+            .values('product_id').annotate(units=Sum('quantity')).values_list('product_id', 'units')
+        )
+
+    ranked = sorted(
+        candidates,
+        key=lambda candidate: (
+            -(candidate[1] + (IN_STOCK_BOOST if stock.get(candidate[0]) else 0)),
+            -stock.get(candidate[0], 0),
+            candidate[0],
+        ),
+    )[:limit]
+    products = Product.objects.in_bulk([product_id for product_id, _ in ranked])
+    return [
+        (products[product_id], relevance, stock.get(product_id, 0))
+        for product_id, relevance in ranked
+        if product_id in products
+    ]
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import cache as versioned_cache
+from .models import Product, ProductCode
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductCode)
+def invalidate_product_caches(sender, instance, **kwargs):
+    versioned_cache.bump('product')
+
+
+@receiver(post_save, sender=Product)
+def invalidate_product_search(sender, instance, created, **kwargs):
+    # Only name and brand are indexed; price and stock edits keep the index
+    saved = instance.__dict__.get('_saved_search_text')
+    if created or saved is None or saved != instance.search_text():
+        versioned_cache.bump('product_search')
+    instance._saved_search_text = instance.search_text()
+
+
+@receiver(post_delete, sender=Product)
+def drop_from_product_search(sender, instance, **kwargs):
+    versioned_cache.bump('product_search')
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from rest_framework import serializers
+from core import cache as versioned_cache
+from inventory import ledger, summary as stock_summary
+from inventory.models import Inventory, InsufficientStock, StockMovement
+from .models import SaleItem
+
+
+def checkout_items(sale, items_data):
+    """
+    Deduct stock and record the line items of ``sale``.
+
+    Stock is allocated first-expiry-first-out across batches with one
+    locked query and taken with a single conditional update, so a checkout
+    costs the same number of queries whatever the basket size and two
+    tills can never oversell.
+    Must be called inside a transaction.
+    """
+    # A basket may list the same product more than once
+    requested = OrderedDict()
+    for item_data in items_data:
+        product = item_data.get('product')
+        if not product:
+            raise serializers.ValidationError("Product ID is required for each item.")
+        requested[product.id] = requested.get(product.id, 0) + item_data.get('quantity')
+
+    products = {item_data['product'].id: item_data['product'] for item_data in items_data}
+    try:
+        allocations = Inventory.objects.allocate(sale.branch, requested)
+    except InsufficientStock as e:
+        raise serializers.ValidationError(f"Insufficient stock for product {products[e.product_id].name}")
+
+    reserved = Inventory.objects.reserve({
+        batch.id: units
+        for batches in allocations.values()
+        for batch, units in batches
+    })
+    if not reserved:
+        raise serializers.ValidationError("Insufficient stock for one or more products")
+    versioned_cache.bump('inventory', sale.branch_id)
+    stock_summary.touch(*allocations)
+
+    # One movement per batch drawn from, so expiry audits can trace every unit
+    taken = [(batch, units) for batches in allocations.values() for batch, units in batches]
+    movements = StockMovement.objects.bulk_create([
+        StockMovement(
+            product=products[batch.product_id],
+            branch=sale.branch,
+            movement_type='REMOVE',
+            quantity=units,
+            details=f"Sold via {sale.payment_method}. Batch: {batch.batch_number or 'N/A'}"
+        )
+        for batch, units in taken
+    ])
+    ledger.record((batch, -units, movement) for (batch, units), movement in zip(taken, movements))
+
+    return SaleItem.objects.bulk_create([
+        SaleItem(
+            sale=sale,
+            product=item_data['product'],
+            quantity=item_data['quantity'],
+            price_at_sale=item_data.get('price_at_sale')
+        )
+        for item_data in items_data
+    ])
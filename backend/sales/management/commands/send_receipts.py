@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+from sales.receipts import ReceiptSender, claim_messages
+
+
+class Command(BaseCommand):
+    help = "Worker that delivers queued receipt emails and SMS from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when nothing is due instead of polling.")
+        parser.add_argument('--batch-size', type=int, default=50, help="Messages claimed per round trip.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to wait when nothing is due.")
+
+    def handle(self, *args, **options):
+        sender = ReceiptSender()
+        sent = failed = 0
+        try:
+            while True:
+                messages = claim_messages(options['batch_size'])
+                if not messages:
+                    # Don't hold the SMTP connection open while idle
+                    sender.close()
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                batch_sent, batch_failed = sender.send(messages)
+                sent += batch_sent
+                failed += batch_failed
+        finally:
+            sender.close()
+
+        self.stdout.write(f"Sent {sent} receipts, {failed} failed.")
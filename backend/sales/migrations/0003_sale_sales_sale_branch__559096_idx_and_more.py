@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_sale_email_status_sale_sms_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['branch', 'date', 'id'], name='sales_sale_branch__559096_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['date', 'id'], name='sales_sale_date_038a5f_idx'),
+        ),
+    ]
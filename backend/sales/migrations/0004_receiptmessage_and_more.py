@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 20:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_sale_sales_sale_branch__559096_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('EMAIL', 'Email'), ('SMS', 'SMS')], max_length=5)),
+                ('recipient', models.CharField(max_length=255)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField()),
+                ('html_body', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('provider_id', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('retry_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipt_messages', to='sales.sale')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='receiptmessage',
+            index=models.Index(fields=['status', 'created_at'], name='sales_recei_status_cfbaa6_idx'),
+        ),
+    ]
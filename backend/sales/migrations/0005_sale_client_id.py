@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 21:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_receiptmessage_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='client_id',
+            field=models.UUIDField(blank=True, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models, transaction
+from django.utils import timezone
 from inventory.models import Inventory
 from sites.models import Site
 from accounts.models import User, Customer
@@ -17,11 +18,18 @@ class Sale(models.Model):
     customer = models.ForeignKey(Customer, null=True, blank=True, on_delete=models.SET_NULL, db_index=True)
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHOD_CHOICES)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    date = models.DateTimeField(auto_now_add=True)
+    date = models.DateTimeField(default=timezone.now, editable=False)  # When sold; offline sales keep the terminal's time
     processed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     receipt_sent = models.BooleanField(default=False)
     email_status = models.CharField(max_length=20, default='PENDING')
     sms_status = models.CharField(max_length=20, default='PENDING')
+    client_id = models.UUIDField(null=True, blank=True, unique=True)  # Set by POS terminals, so retried uploads are recognised
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'date', 'id']),
+            models.Index(fields=['date', 'id']),
+        ]
 
     def __str__(self):
         return f"Sale at {self.branch.name} - {self.total_amount}"
@@ -34,3 +42,44 @@ class SaleItem(models.Model):
 
     def __str__(self):
         return f"{self.product.name} - {self.quantity} pcs"
+
+
+class ReceiptMessage(models.Model):
+    """
+    A receipt email or SMS in the outbox. Written in the same transaction
+    that marks the sale's email/sms status as queued; the send_receipts
+    worker delivers it and writes the outcome back to the sale.
+    """
+    CHANNEL_CHOICES = [
+        ('EMAIL', 'Email'),
+        ('SMS', 'SMS'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    sale = models.ForeignKey(Sale, related_name='receipt_messages', on_delete=models.CASCADE)
+    channel = models.CharField(max_length=5, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=255)  # Email address or phone number
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    provider_id = models.CharField(max_length=64, blank=True)  # Twilio message SID
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} receipt for sale {self.sale_id} ({self.get_status_display()})"
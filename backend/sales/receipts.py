@@ -0,0 +1,176 @@
+"""
+Receipt delivery through the outbox.
+
+Views only queue a ReceiptMessage; ``manage.py send_receipts`` workers send
+them in batches over one SMTP connection and one SMS client, retry failures
+with exponential backoff and write the outcome back to
+``Sale.email_status`` / ``Sale.sms_status``.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models import ReceiptMessage, Sale
+from .sms import get_sms_backend
+
+logger = logging.getLogger(__name__)
+
+STATUS_FIELDS = {'EMAIL': 'email_status', 'SMS': 'sms_status'}
+
+
+def receipt_recipient(sale, channel):
+    customer = sale.customer
+    if not customer:
+        return None
+    return customer.email if channel == 'EMAIL' else customer.phone_number
+
+
+def queue_receipt(sale, channel):
+    """
+    Put a receipt for ``sale`` in the outbox. Returns None if the customer
+    has no address for the channel.
+    """
+    recipient = receipt_recipient(sale, channel)
+    if not recipient:
+        return None
+
+    if channel == 'EMAIL':
+        items = sale.items.select_related('product')
+        message = ReceiptMessage(
+            subject=f"Receipt for Your Purchase at {sale.branch.name}",
+            body="Here is your receipt",
+            html_body=render_to_string('receipt_template.html', {'sale': sale, 'items': items}),
+        )
+    else:
+        message = ReceiptMessage(body=(
+            f"Thank you for your purchase at {sale.branch.name}!\n"
+            f"Amount Paid: GHC{sale.total_amount}\n"
+            f"Payment Method: {sale.payment_method}\n"
+            f"Date: {sale.date}\n"
+        ))
+    message.sale = sale
+    message.channel = channel
+    message.recipient = recipient
+
+    with transaction.atomic():
+        message.save()
+        Sale.objects.filter(pk=sale.pk).update(**{STATUS_FIELDS[channel]: 'QUEUED'})
+    return message
+
+
+def claim_messages(limit):
+    """
+    Take up to ``limit`` messages that are due, plus any a dead worker left
+    in SENDING. Locked rows are skipped, so workers can run side by side.
+    """
+    now = timezone.now()
+    abandoned = now - timedelta(seconds=settings.RECEIPT_SEND_TIMEOUT)
+    with transaction.atomic():
+        messages = list(
+            ReceiptMessage.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='PENDING') | Q(status='SENDING', started_at__lt=abandoned))
+            .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+            .order_by('created_at')[:limit]
+        )
+        ReceiptMessage.objects.filter(pk__in=[message.pk for message in messages]).update(
+            status='SENDING', started_at=now, attempts=F('attempts') + 1,
+        )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+class ReceiptSender:
+    """
+    Sends claimed messages. One instance lives as long as the worker: the
+    SMTP connection stays open between batches while there is work, and
+    the SMS backend (one Twilio client) is built once.
+    """
+
+    def __init__(self, connection=None, sms_backend=None):
+        self.connection = connection or get_connection()
+        self.sms_backend = sms_backend
+        self.sent = []
+        self.failed = []
+
+    def close(self):
+        self.connection.close()
+
+    def send(self, messages):
+        """Send a batch, then record every outcome with a few bulk writes."""
+        self.sent, self.failed = [], []
+        emails = [message for message in messages if message.channel == 'EMAIL']
+        texts = [message for message in messages if message.channel == 'SMS']
+        if emails:
+            self.send_emails(emails)
+        if texts:
+            self.send_texts(texts)
+        self.record()
+        return len(self.sent), len(self.failed)
+
+    def send_emails(self, messages):
+        for message in messages:
+            email = EmailMultiAlternatives(
+                message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.recipient],
+                connection=self.connection,
+            )
+            if message.html_body:
+                email.attach_alternative(message.html_body, 'text/html')
+            try:
+                self.connection.open()  # No-op while the connection is up
+                email.send()
+            except Exception as e:
+                # Drop the connection; the next message reconnects
+                self.fail(message, e)
+                self.close()
+                continue
+            self.sent.append(message)
+
+    def send_texts(self, messages):
+        if self.sms_backend is None:
+            try:
+                self.sms_backend = get_sms_backend()
+            except Exception as e:
+                for message in messages:
+                    self.fail(message, e)
+                return
+
+        for message in messages:
+            try:
+                message.provider_id = self.sms_backend.send(message.recipient, message.body) or ''
+            except Exception as e:
+                self.fail(message, e)
+                continue
+            self.sent.append(message)
+
+    def fail(self, message, error):
+        logger.warning("Sending %s receipt for sale %s failed: %s", message.channel, message.sale_id, error)
+        message.error = str(error)
+        if message.attempts >= settings.RECEIPT_SEND_MAX_ATTEMPTS:
+            message.status = 'FAILED'
+        else:
+            message.status = 'PENDING'
+            message.retry_at = timezone.now() + timedelta(
+                seconds=settings.RECEIPT_RETRY_DELAY * 2 ** (message.attempts - 1)
+            )
+        self.failed.append(message)
+
+    def record(self):
+        now = timezone.now()
+        for message in self.sent:
+            message.status, message.sent_at, message.error = 'SENT', now, ''
+        ReceiptMessage.objects.bulk_update(
+            self.sent + self.failed, ['status', 'error', 'provider_id', 'retry_at', 'sent_at'],
+        )
+
+        for channel, field in STATUS_FIELDS.items():
+            sent = {message.sale_id for message in self.sent if message.channel == channel}
+            if sent:
+                Sale.objects.filter(pk__in=sent).update(**{field: 'SENT'}, receipt_sent=True)
+            gave_up = {message.sale_id for message in self.failed if message.channel == channel and message.status == 'FAILED'}
+            if gave_up:
+                Sale.objects.filter(pk__in=gave_up).update(**{field: 'FAILED'})
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import cache as versioned_cache
+from dashboard.models import DailyBranchSales
+from .models import Sale
+
+
+@receiver([post_save, post_delete], sender=Sale)
+def invalidate_sale_views(sender, instance, **kwargs):
+    versioned_cache.bump('sale', instance.branch_id)
+
+
+# Sales are folded into the rollup where they are written (see
+# DailyBranchSales.objects.record_sales); deletes from anywhere come here
+@receiver(post_delete, sender=Sale)
+def remove_from_rollup(sender, instance, **kwargs):
+    DailyBranchSales.objects.remove_sale(instance)
@@ -0,0 +1,23 @@
+"""
+SMS transports, picked by ``settings.SMS_BACKEND`` the way Django picks an
+email backend. A backend instance holds one provider client and is meant to
+be reused for every message a process sends.
+"""
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class TwilioSMSBackend:
+    def __init__(self):
+        from twilio.rest import Client
+
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def send(self, to, body):
+        """Send one message and return the provider's id for it."""
+        message = self.client.messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to)
+        return message.sid
+
+
+def get_sms_backend():
+    return import_string(settings.SMS_BACKEND)()
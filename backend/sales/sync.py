@@ -0,0 +1,187 @@
+"""
+Offline POS sync.
+
+Terminals that lose their link queue sales locally, each stamped with a
+client-generated UUID, and flush hundreds at once through ``apply`` when
+it returns. A UUID already stored (a retried upload, or the same sale
+twice in one upload) is reported as a duplicate and never charged again.
+
+The new sales of an upload are applied in one transaction: the sellable
+batches of every product in it are locked in one query, each sale is
+allocated first-expiry-first-out from those rows in memory, in upload
+order (a sale that cannot be covered is rejected without affecting the
+rest), and the stock is taken with one conditional UPDATE before the
+sales, line items, movements and ledger entries are written with
+bulk_create and the dashboard rollups updated once per day.
+
+``changes`` is the other half of a sync: the products and branch
+batches modified since the terminal's last sync token.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from core import cache as versioned_cache
+from dashboard.models import DailyBranchSales
+from inventory import ledger, summary as stock_summary
+from inventory.models import Inventory, StockMovement
+from products.models import Product
+from .models import Sale, SaleItem
+
+
+def _allocate(stock, items):
+    """
+    Take one sale's ``items`` from ``stock`` ({product_id: [[batch,
+    units left], ...]}). Returns ([(batch, units), ...], None), or (None,
+    product_id) without taking anything if a product cannot be covered.
+    """
+    wanted = Counter()
+    for item in items:
+        wanted[item['product'].id] += item['quantity']
+
+    taken = []
+    for product_id, units in wanted.items():
+        for entry in stock.get(product_id, ()):
+            if not units:
+                break
+            take = min(units, entry[1])
+            if take:
+                taken.append((entry, take))
+                units -= take
+        if units:
+            return None, product_id
+
+    for entry, take in taken:
+        entry[1] -= take
+    return [(entry[0], take) for entry, take in taken], None
+
+
+def apply(branch, sales, user):
+    """
+    Record the validated ``sales`` (client_id, payment_method,
+    total_amount, customer, sold_at, items) made at ``branch``. Returns
+    one result per sale, in order: {'client_id', 'status', 'sale_id'}
+    with status 'created' or 'duplicate', or {'client_id', 'status':
+    'rejected', 'error'}. Returns None, writing nothing, if a batch was
+    drained concurrently or a simultaneous upload of the same sales won
+    the race; the upload can simply be retried.
+    """
+    try:
+        return _apply(branch, sales, user)
+    except IntegrityError:  # Sale.client_id is unique
+        return None
+
+
+def _apply(branch, sales, user):
+    now = timezone.now()
+    with transaction.atomic():
+        known = dict(
+            Sale.objects.filter(client_id__in=[sale['client_id'] for sale in sales]).values_list('client_id', 'id')
+        )
+        products = {item['product'].id: item['product'] for sale in sales for item in sale['items']}
+        stock = defaultdict(list)
+        for batch in Inventory.objects.sellable(branch, products.keys()):
+            stock[batch.product_id].append([batch, batch.quantity])
+
+        results, created = [], []
+        for sale in sales:
+            client_id = sale['client_id']
+            if client_id in known:
+                results.append({'client_id': client_id, 'status': 'duplicate', 'sale_id': known[client_id]})
+                continue
+            taken, short = _allocate(stock, sale['items'])
+            if taken is None:
+                results.append({
+                    'client_id': client_id,
+                    'status': 'rejected',
+                    'error': f"Insufficient stock for product {products[short].name}",
+                })
+                continue
+            known[client_id] = None  # A repeat later in this upload is a duplicate
+            results.append({'client_id': client_id, 'status': 'created'})
+            created.append((sale, taken))
+
+        if not created:
+            return results
+
+        reserved = Counter()
+        for _, taken in created:
+            for batch, units in taken:
+                reserved[batch.id] += units
+        if not Inventory.objects.reserve(reserved):
+            transaction.set_rollback(True)
+            return None
+
+        rows = Sale.objects.bulk_create([
+            Sale(
+                client_id=sale['client_id'],
+                branch=branch,
+                customer=sale.get('customer'),
+                payment_method=sale['payment_method'],
+                total_amount=sale['total_amount'],
+                date=min(sale.get('sold_at') or now, now),  # Never trust a terminal clock that runs ahead
+                processed_by=user,
+            )
+            for sale, _ in created
+        ])
+        SaleItem.objects.bulk_create([
+            SaleItem(sale=row, product=item['product'], quantity=item['quantity'], price_at_sale=item.get('price_at_sale'))
+            for row, (sale, _) in zip(rows, created)
+            for item in sale['items']
+        ])
+
+        # One movement per batch drawn from, as in checkout
+        drawn = [(row, batch, units) for row, (_, taken) in zip(rows, created) for batch, units in taken]
+        movements = StockMovement.objects.bulk_create([
+            StockMovement(
+                product=products[batch.product_id],
+                branch=branch,
+                movement_type='REMOVE',
+                quantity=units,
+                details=f"Sold via {row.payment_method} (offline sale {row.client_id}). "
+                        f"Batch: {batch.batch_number or 'N/A'}",
+            )
+            for row, batch, units in drawn
+        ])
+        ledger.record((batch, -units, movement) for (_, batch, units), movement in zip(drawn, movements))
+        DailyBranchSales.objects.record_sales(rows)
+
+        versioned_cache.bump('inventory', branch.id)
+        versioned_cache.bump('sale', branch.id)
+        stock_summary.touch(*{batch.product_id for _, batch, _ in drawn})
+
+    ids = {row.client_id: row.id for row in rows}
+    for result in results:
+        if result['status'] != 'rejected' and result.get('sale_id') is None:
+            result['sale_id'] = ids[result['client_id']]
+    return results
+
+
+def parse_token(token):
+    """The moment a sync token was issued, or None if it is not one."""
+    try:
+        moment = parse_datetime(token)
+    except ValueError:
+        return None
+    return moment if moment and timezone.is_aware(moment) else None
+
+
+def changes(branch, since):
+    """
+    The products and ``branch`` batches written since the token moment
+    ``since`` (everything when None), and the token for the next sync.
+
+    The window starts POS_SYNC_OVERLAP_SECONDS before ``since`` so rows
+    written by a transaction that committed after the previous token was
+    issued are not missed; clients upsert, so the overlap is harmless.
+    """
+    token = timezone.now()
+    products = Product.objects.order_by('pk')
+    batches = Inventory.objects.filter(branch=branch).order_by('pk')
+    if since is not None:
+        since -= timedelta(seconds=settings.POS_SYNC_OVERLAP_SECONDS)
+        products = products.filter(updated_at__gt=since)
+        batches = batches.filter(updated_at__gt=since)
+    return products, batches, token.isoformat()
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SitesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sites'
+
+    def ready(self):
+        from . import signals  # noqa: F401
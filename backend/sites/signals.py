@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core import cache as versioned_cache
+from .models import Site
+
+
+@receiver([post_save, post_delete], sender=Site)
+def invalidate_site_views(sender, instance, **kwargs):
+    versioned_cache.bump('site', instance.pk)
@@ -0,0 +1,63 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import Inventory
+from products.models import Product, ProductCode
+from sites.models import Site
+
+
+class BarcodeLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.product = Product.objects.create(name="Paracetamol 500mg", brand="Letap", category="Drugs", unit_price=Decimal("0.50"))
+        self.batch = Inventory.objects.create(product=self.product, branch=self.branch, quantity=40, threshold_quantity=0)
+        ProductCode.objects.create(code="036000291452", product=self.product)  # UPC-A
+        ProductCode.objects.create(code="PARA-BOX-10", product=self.product, pack_size=10, label="Box of 10")
+
+    def scan(self, code):
+        return self.client.get(f'/api/v1/products/by-code/{code}/')
+
+    def test_scan_hits_the_cache_after_the_first_lookup(self):
+        res = self.scan("0036000291452")  # The same code printed as EAN-13
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual((res.data["product"]["id"], res.data["in_stock"]), (self.product.id, 40))
+
+        self.scan("PARA-BOX-10")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.scan("036000291452").data["in_stock"], 40)
+            res = self.scan("PARA-BOX-10")
+        self.assertEqual((res.data["pack_size"], res.data["pack_price"]), (10, "5.00"))
+
+        self.assertEqual(self.scan("UNKNOWN").status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.scan("UNKNOWN").status_code, 404)
+
+    def test_product_edits_and_sales_invalidate_the_cache(self):
+        self.scan("PARA-BOX-10")
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(f'/api/v1/products/{self.product.id}/', {"unit_price": "0.60"}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.scan("PARA-BOX-10").data["pack_price"], "6.00")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.batch.adjust_quantity(-15)
+        self.assertEqual(self.scan("PARA-BOX-10").data["in_stock"], 25)
+
+    def test_codes_are_normalized_and_unique(self):
+        url = f'/api/v1/products/{self.product.id}/codes/'
+        res = self.client.post(url, {"code": " 0036000291452 "}, format='json')
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(url, {"code": "4006381333931", "pack_size": 20, "label": "Box of 20"}, format='json')
+        self.assertEqual((res.status_code, res.data["code"]), (201, "04006381333931"))
+        self.assertEqual([code["code"] for code in self.client.get(url).data],
+                         ["00036000291452", "PARA-BOX-10", "04006381333931"])
@@ -0,0 +1,103 @@
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import Inventory, InventoryVersion, StockMovement
+from products.models import Product
+from sites.models import Site
+
+
+class BulkReceivingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.warehouse,
+        )
+        self.client.force_authenticate(user=self.ceo)
+        self.products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("1.00")) for i in range(60)
+        ])
+        self.existing = Inventory.objects.create(
+            product=self.products[0], branch=self.warehouse, batch_number="A1", quantity=5, expiration_date="2030-01-01",
+        )
+
+    def receive(self, lines):
+        return self.client.post('/api/v1/warehouse/receive/bulk/', lines, format='json')
+
+    def test_upserts_batches_and_logs_every_line(self):
+        res = self.receive([
+            {"product_id": self.products[0].id, "quantity": 10, "batch_number": "A1"},
+            {"product_id": self.products[1].id, "quantity": 7, "batch_number": "B1", "expiration_date": "2031-06-30"},
+            {"product_id": self.products[1].id, "quantity": 3, "batch_number": "B1"},
+        ])
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["lines"], 3)
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.quantity, str(self.existing.expiration_date)), (15, "2030-01-01"))
+        new = Inventory.objects.get(product=self.products[1])
+        self.assertEqual((new.quantity, str(new.expiration_date), new.received_by), (10, "2031-06-30", self.ceo))
+        self.assertEqual(
+            sorted(InventoryVersion.objects.values_list('previous_quantity', 'new_quantity')), [(0, 10), (5, 15)],
+        )
+        self.assertEqual(sorted(StockMovement.objects.values_list('quantity', flat=True)), [10, 10])
+
+    def test_receiving_the_same_new_batch_twice_adds_up(self):
+        for quantity in (4, 6):
+            res = self.receive([{"product_id": self.products[6].id, "quantity": quantity, "batch_number": "N1"}])
+            self.assertEqual(res.status_code, 200)
+        self.assertEqual(Inventory.objects.get(product=self.products[6]).quantity, 10)
+        self.assertEqual(
+            list(InventoryVersion.objects.order_by('pk').values_list('previous_quantity', 'new_quantity')), [(0, 4), (4, 10)],
+        )
+
+    def test_query_count_does_not_grow_with_the_delivery(self):
+        counts = []
+        for products, batch in ((self.products[:5], "S"), (self.products[:60], "L")):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.receive([{"product_id": product.id, "quantity": 2, "batch_number": batch} for product in products])
+            self.assertEqual(res.status_code, 200)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile("delivery.csv", (
+            "product_id,quantity,batch_number,expiration_date\n"
+            f"{self.products[2].id},40,C1,2029-12-31\n"
+            f"{self.products[3].id},8,,\n"
+        ).encode(), content_type="text/csv")
+        res = self.client.post('/api/v1/warehouse/receive/bulk/', {"file": upload}, format='multipart')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(Inventory.objects.get(product=self.products[2]).quantity, 40)
+        self.assertEqual(Inventory.objects.get(product=self.products[3]).batch_number, "")
+
+    def test_rejects_the_whole_delivery_on_any_bad_line(self):
+        res = self.receive([
+            {"product_id": self.products[4].id, "quantity": 1},
+            {"product_id": 999999, "quantity": 1},
+        ])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual((res.data["lines"][0], list(res.data["lines"][1])), ({}, ["product_id"]))
+
+        res = self.receive([{"product_id": self.products[4].id, "quantity": 1}, {"product_id": self.products[5].id, "quantity": 0}])
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("quantity", res.data["lines"][1])
+        self.assertEqual(Inventory.objects.count(), 1)
+
+    def test_single_line_endpoint_and_permissions(self):
+        res = self.client.post('/api/v1/warehouse/receive/', {
+            "product_id": self.products[0].id, "quantity": 4, "batch_number": "A1",
+        }, format='json')
+        self.assertEqual((res.status_code, res.data["current_quantity"]), (200, 9))
+
+        admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.warehouse,
+        )
+        self.client.force_authenticate(user=admin)
+        self.assertEqual(self.receive([{"product_id": self.products[0].id, "quantity": 1}]).status_code, 403)
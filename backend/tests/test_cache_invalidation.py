@@ -0,0 +1,101 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from dashboard.models import DailyBranchSales
+from inventory.models import Inventory
+from products.models import Product
+from sales.models import Sale
+from sites.models import Site
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch A")
+        self.other_branch = Site.objects.create(name="Branch B")
+        self.admin = User.objects.create(
+            email="a@branch.com", first_name="A", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.other_admin = User.objects.create(
+            email="b@branch.com", first_name="B", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.other_branch,
+        )
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000002", role="CEO",
+        )
+        self.product = Product.objects.create(name="Ibuprofen", category="Drugs", unit_price=Decimal("2.00"))
+        for branch in (self.branch, self.other_branch):
+            Inventory.objects.create(product=self.product, branch=branch, quantity=100)
+
+    def get(self, user, url, **params):
+        self.client.force_authenticate(user=user)
+        return self.client.get(url, params).data
+
+    def total_sales(self, user):
+        stats = self.get(user, '/api/v1/dashboard/statistics/')["statistics"]
+        return {row["title"]: row["value"] for row in stats}["Total Sales"]
+
+    def sell(self, user, branch):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post('/api/v1/sales/', {
+                "branch": branch.id,
+                "payment_method": "CASH",
+                "total_amount": "2.00",
+                "items": [{"product": self.product.id, "quantity": 1, "price_at_sale": "2.00"}],
+            }, format='json')
+        self.assertEqual(res.status_code, 201)
+
+    def test_sale_invalidates_every_view_of_its_branch(self):
+        # Warm the caches, including a parameterised sales-table key
+        self.assertEqual(self.total_sales(self.admin), 0)
+        self.assertEqual(self.get(self.admin, '/api/v1/dashboard/monthly-sales/'), [])
+        self.assertEqual(len(self.get(self.admin, '/api/v1/dashboard/sales-table/', product=self.product.id)), 0)
+        self.assertEqual(self.total_sales(self.ceo), 0)
+
+        self.sell(self.admin, self.branch)
+
+        self.assertEqual(self.total_sales(self.admin), Decimal("2.00"))
+        self.assertEqual(len(self.get(self.admin, '/api/v1/dashboard/monthly-sales/')), 1)
+        self.assertEqual(len(self.get(self.admin, '/api/v1/dashboard/sales-table/', product=self.product.id)), 1)
+        self.assertEqual(self.total_sales(self.ceo), Decimal("2.00"))
+
+    def test_sale_leaves_other_branches_cached(self):
+        self.assertEqual(self.total_sales(self.other_admin), 0)
+        self.assertEqual(len(self.get(self.other_admin, '/api/v1/dashboard/sales-table/')), 0)
+
+        # Changed behind the cache's back: only visible once B is invalidated
+        DailyBranchSales.objects.create(branch=self.other_branch, date="2020-01-01", sales_count=1, revenue=5)
+        Sale.objects.bulk_create([Sale(branch=self.other_branch, payment_method='CASH', total_amount=5)])
+
+        self.sell(self.admin, self.branch)
+
+        self.assertEqual(self.total_sales(self.other_admin), 0)
+        self.assertEqual(len(self.get(self.other_admin, '/api/v1/dashboard/sales-table/')), 0)
+
+    def test_inventory_change_invalidates_expiry_list(self):
+        inventory = Inventory.objects.get(branch=self.branch)
+        self.assertEqual(self.get(self.admin, '/api/v1/dashboard/expiry-list/'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.expiration_date = "2020-01-01"
+            inventory.save()
+
+        self.assertEqual(len(self.get(self.admin, '/api/v1/dashboard/expiry-list/')), 1)
+        self.assertEqual(self.get(self.other_admin, '/api/v1/dashboard/expiry-list/'), [])
+
+    def test_customer_rename_invalidates_sales_table(self):
+        customer = Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        Sale.objects.create(branch=self.branch, customer=customer, payment_method='CASH', total_amount=2)
+        self.assertEqual(self.get(self.admin, '/api/v1/dashboard/sales-table/')[0]["customer_name"], "Ama Mensah")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.last_name = "Owusu"
+            customer.save()
+
+        self.assertEqual(self.get(self.admin, '/api/v1/dashboard/sales-table/')[0]["customer_name"], "Ama Owusu")
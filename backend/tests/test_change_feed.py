@@ -0,0 +1,118 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from changes.models import Change
+from inventory.models import Inventory
+from products.models import Product
+from sites.models import Site
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.other_branch = Site.objects.create(name="Tema")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.customer = Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        self.product = Product.objects.create(name="Paracetamol", category="Drugs", unit_price=Decimal("0.50"))
+        self.batch = Inventory.objects.create(product=self.product, branch=self.branch, quantity=10, threshold_quantity=0)
+        self.elsewhere = Inventory.objects.create(product=self.product, branch=self.other_branch, quantity=10)
+
+    def changes(self, since=0):
+        res = self.client.get('/api/v1/sync/changes/', {"since": since})
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def ids(self, data):
+        return {key: [row["id"] for row in data[key]] for key in ("products", "inventory", "sites", "customers")}
+
+    def test_full_mirror_then_only_what_changed(self):
+        mirror = self.changes()
+        self.assertEqual(self.ids(mirror), {
+            "products": [self.product.id],
+            "inventory": [self.batch.id],  # Not the other branch's stock
+            "sites": [self.branch.id, self.other_branch.id],
+            "customers": [self.customer.id],
+        })
+        self.assertFalse(mirror["more"])
+        self.assertEqual(self.changes(mirror["next"])["products"], [])
+
+        res = self.client.post('/api/v1/sales/', {
+            "branch": self.branch.id, "payment_method": "CASH", "total_amount": "1.00",
+            "items": [{"product": self.product.id, "quantity": 2, "price_at_sale": "0.50"}],
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.elsewhere.adjust_quantity(-1)
+        self.product.unit_price = Decimal("0.60")
+        self.product.save()
+        customer_id = self.customer.id
+        self.customer.delete()
+
+        delta = self.changes(mirror["next"])
+        self.assertEqual(self.ids(delta), {
+            "products": [self.product.id], "inventory": [self.batch.id], "sites": [], "customers": [],
+        })
+        self.assertEqual(delta["inventory"][0]["quantity"], 8)
+        self.assertEqual(delta["products"][0]["unit_price"], "0.60")
+        self.assertEqual(delta["deleted"]["customers"], [customer_id])
+
+    def test_each_stock_write_is_recorded_once(self):
+        since = self.changes()["next"]
+        self.batch.adjust_quantity(-1)
+        self.batch.quantity = 5
+        self.batch.save()
+        self.batch.threshold_quantity = 2
+        self.batch.save(update_fields=['threshold_quantity'])
+        self.assertEqual(Change.objects.filter(sequence=None, entity='inventory', object_id=self.batch.id).count(), 3)
+        self.assertEqual(self.changes(since)["inventory"][0]["threshold_quantity"], 2)
+
+    def test_ceo_mirrors_every_branch(self):
+        self.admin.role = 'CEO'
+        self.admin.save()
+        self.assertEqual(self.ids(self.changes())["inventory"], [self.batch.id, self.elsewhere.id])
+
+    @override_settings(CHANGE_FEED_PAGE_SIZE=2)
+    def test_pages_until_done(self):
+        seen, since, pages = set(), 0, 0
+        while True:
+            data = self.changes(since)
+            seen.update(("site", site["id"]) for site in data["sites"])
+            since, pages = data["next"], pages + 1
+            if not data["more"]:
+                break
+        self.assertEqual(seen, {("site", self.branch.id), ("site", self.other_branch.id)})
+        self.assertGreater(pages, 2)
+
+    def test_a_change_committing_late_is_not_skipped(self):
+        # Takes its id first but commits after a later change was served
+        late = Change.objects.create(entity='product', object_id=self.product.id)
+        Change.objects.filter(pk=late.pk).delete()
+        self.customer.save()
+        since = self.changes()["next"]
+
+        Change.objects.create(id=late.id, entity='product', object_id=self.product.id)
+        self.assertEqual(self.ids(self.changes(since))["products"], [self.product.id])
+
+    def test_compaction_keeps_the_latest_change_per_row(self):
+        for _ in range(3):
+            self.batch.adjust_quantity(-1)
+        before = self.changes()
+        out = StringIO()
+        call_command('compact_changes', stdout=out)
+        self.assertIn("superseded changes deleted", out.getvalue())
+        self.assertEqual(Change.objects.filter(entity='inventory', object_id=self.batch.id).count(), 1)
+        after = self.changes()
+        self.assertEqual(self.ids(after), self.ids(before))
+        self.assertEqual(after["next"], before["next"])
+
+    def test_since_must_be_a_sequence(self):
+        self.assertEqual(self.client.get('/api/v1/sync/changes/', {"since": "yesterday"}).status_code, 400)
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from inventory.models import Inventory, StockMovement
+from products.models import Product
+from sales.checkout import checkout_items
+from sales.models import Sale, SaleItem
+from sites.models import Site
+from accounts.models import User
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch", is_warehouse=False)
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+
+        self.products = [
+            Product.objects.create(name=f"Product {i}", category="Drugs", unit_price=Decimal("5.00"))
+            for i in range(5)
+        ]
+        for product in self.products:
+            Inventory.objects.create(product=product, branch=self.branch, quantity=50)
+
+    def post_sale(self, items):
+        return self.client.post('/api/v1/sales/', {
+            "branch": self.branch.id,
+            "payment_method": "CASH",
+            "total_amount": "100.00",
+            "items": [
+                {"product": product.id, "quantity": quantity, "price_at_sale": "5.00"}
+                for product, quantity in items
+            ],
+        }, format='json')
+
+    def test_checkout_deducts_stock_and_records_lines(self):
+        res = self.post_sale([(self.products[0], 3), (self.products[1], 7)])
+        self.assertEqual(res.status_code, 201)
+
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).quantity, 47)
+        self.assertEqual(Inventory.objects.get(product=self.products[1]).quantity, 43)
+        self.assertEqual(SaleItem.objects.count(), 2)
+        self.assertEqual(StockMovement.objects.filter(movement_type='REMOVE').count(), 2)
+
+    def test_repeated_product_is_deducted_once_per_line(self):
+        res = self.post_sale([(self.products[0], 30), (self.products[0], 20)])
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).quantity, 0)
+
+    def test_insufficient_stock_rolls_back_whole_sale(self):
+        res = self.post_sale([(self.products[0], 5), (self.products[1], 51)])
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('Insufficient stock', str(res.data))
+
+        self.assertEqual(Sale.objects.count(), 0)
+        self.assertEqual(SaleItem.objects.count(), 0)
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).quantity, 50)
+
+    def test_query_count_does_not_grow_with_basket(self):
+        self.assertEqual(self.count_checkout_queries(self.products[:1]), self.count_checkout_queries(self.products))
+
+    def count_checkout_queries(self, products):
+        sale = Sale.objects.create(branch=self.branch, payment_method='CASH', total_amount=Decimal("5.00"))
+        items_data = [{'product': product, 'quantity': 1, 'price_at_sale': Decimal("5.00")} for product in products]
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                checkout_items(sale, items_data)
+        return len(ctx.captured_queries)
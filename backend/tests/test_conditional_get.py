@@ -0,0 +1,97 @@
+import time
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from inventory.models import Inventory
+from products.models import Product
+from sites.models import Site
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.other_branch = Site.objects.create(name="Tema")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000001", role="CEO", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.product = Product.objects.create(name="Paracetamol", category="Drugs", unit_price=Decimal("0.50"))
+        self.batch = Inventory.objects.create(product=self.product, branch=self.branch, quantity=10, threshold_quantity=0)
+        self.elsewhere = Inventory.objects.create(product=self.product, branch=self.other_branch, quantity=10, threshold_quantity=0)
+
+    def get(self, url, response=None, **params):
+        headers = {"HTTP_IF_NONE_MATCH": response["ETag"]} if response else {}
+        return self.client.get(url, params, **headers)
+
+    def test_unchanged_poll_skips_queryset_and_serializer(self):
+        first = self.get('/api/v1/products/')
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"].startswith('W/"'))
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        with self.assertNumQueries(0):
+            again = self.get('/api/v1/products/', first)
+        self.assertEqual((again.status_code, again.content, again["ETag"]), (304, b"", first["ETag"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.unit_price = Decimal("0.60")
+            self.product.save()
+        changed = self.get('/api/v1/products/', first)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_if_modified_since(self):
+        self.get('/api/v1/sites/')
+        cache.set(f"cache_modified:site:{self.branch.id}", time.time() - 60, timeout=None)  # Last changed a minute ago
+        first = self.get('/api/v1/sites/')
+        self.assertEqual(len(first.data), 1)
+        since = {"HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]}
+        self.assertEqual(self.client.get('/api/v1/sites/', **since).status_code, 304)
+        self.assertEqual(self.client.get('/api/v1/sites/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() - 3600)).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.branch.city = "Accra"
+            self.branch.save()
+        self.assertEqual(self.client.get('/api/v1/sites/', **since).status_code, 200)
+
+    def test_validators_are_scoped_to_the_branch(self):
+        first = self.get('/api/v1/inventory/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.elsewhere.adjust_quantity(-1)
+        self.assertEqual(self.get('/api/v1/inventory/', first).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.batch.adjust_quantity(-1)
+        self.assertEqual(self.get('/api/v1/inventory/', first).status_code, 200)
+
+    def test_dashboard_variants_have_their_own_etags(self):
+        self.client.force_authenticate(user=self.ceo)
+        network = self.get('/api/v1/dashboard/statistics/')
+        branch = self.get('/api/v1/dashboard/statistics/', branch=self.other_branch.id)
+        self.assertNotEqual(network["ETag"], branch["ETag"])
+        self.assertEqual(self.get('/api/v1/dashboard/statistics/', branch, branch=self.other_branch.id).status_code, 304)
+        self.assertEqual(self.get('/api/v1/dashboard/statistics/', branch, branch=self.branch.id).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        res = self.get('/api/v1/dashboard/statistics/', network)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["statistics"][1]["value"], 1)
+
+    def test_writes_are_not_conditional(self):
+        first = self.get('/api/v1/products/')
+        res = self.client.post('/api/v1/products/', {
+            "name": "ORS", "category": "Drugs", "unit_price": "1.00",
+        }, format='json', HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(res.status_code, 201)
+        self.assertNotIn("ETag", res)
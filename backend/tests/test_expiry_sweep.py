@@ -0,0 +1,69 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import ExpiringBatch, Inventory, StockMovement
+from products.models import Product
+from sites.models import Site
+
+
+class ExpirySweepTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.other = Site.objects.create(name="Legon")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+        self.today = timezone.localdate()
+        for batch_number, days, quantity in [
+            ("GONE", -5, 4), ("D20", 20, 6), ("D45", 45, 7), ("D80", 80, 8), ("D200", 200, 9), ("EMPTY", -1, 0),
+        ]:
+            self.add_batch(self.branch, batch_number, days, quantity)
+        self.add_batch(self.other, "OTHER", 10, 3)
+
+    def add_batch(self, branch, batch_number, days, quantity):
+        return Inventory.objects.create(
+            product=self.product, branch=branch, batch_number=batch_number,
+            expiration_date=self.today + timedelta(days=days), quantity=quantity,
+        )
+
+    def sweep(self):
+        out = StringIO()
+        call_command('sweep_expiry', stdout=out)
+        return out.getvalue()
+
+    def test_sweep_buckets_batches_and_quarantines_once(self):
+        self.assertIn("Swept 2 branches: 5 batches classified, 1 quarantined.", self.sweep())
+        self.assertEqual(
+            dict(ExpiringBatch.objects.filter(branch=self.branch).values_list('batch_number', 'bucket')),
+            {"GONE": 'EXPIRED', "D20": 'DAYS_30', "D45": 'DAYS_60', "D80": 'DAYS_90'},
+        )
+        movement = StockMovement.objects.get(movement_type='QUARANTINE')
+        self.assertEqual((movement.branch, movement.quantity), (self.branch, 4))
+
+        # Sold out since the last sweep; nothing is quarantined twice
+        Inventory.objects.filter(batch_number="D20").update(quantity=0)
+        self.assertIn("4 batches classified, 0 quarantined.", self.sweep())
+        self.assertFalse(ExpiringBatch.objects.filter(batch_number="D20").exists())
+        self.assertEqual(StockMovement.objects.filter(movement_type='QUARANTINE').count(), 1)
+
+    def test_endpoint_serves_the_branch_buckets(self):
+        self.sweep()
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(1):
+            res = self.client.get('/api/v1/dashboard/expiry-buckets/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['as_of'], self.today)
+        self.assertEqual(
+            [(bucket['bucket'], bucket['quantity'], [batch['batch_number'] for batch in bucket['batches']])
+             for bucket in res.data['buckets']],
+            [('EXPIRED', 4, ["GONE"]), ('DAYS_30', 6, ["D20"]), ('DAYS_60', 7, ["D45"]), ('DAYS_90', 8, ["D80"])],
+        )
+        self.assertTrue(res.data['buckets'][0]['batches'][0]['quarantined'])
@@ -0,0 +1,69 @@
+import csv
+import io
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from inventory.models import StockMovement
+from products.models import Product
+from sales.models import Sale
+from sites.models import Site
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch")
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO",
+        )
+        self.client.force_authenticate(user=self.ceo)
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+
+    def add_movements(self, count):
+        StockMovement.objects.bulk_create([
+            StockMovement(product=self.product, branch=self.branch, movement_type='ADD', quantity=i + 1)
+            for i in range(count)
+        ])
+
+    def export(self, url):
+        """Fetch and fully consume a CSV export, returning (rows, queries)."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, {'format': 'csv'})
+            self.assertEqual(res.status_code, 200)
+            self.assertTrue(res.streaming)
+            body = b''.join(res.streaming_content).decode()
+        return list(csv.reader(io.StringIO(body))), len(queries)
+
+    @override_settings(EXPORT_CHUNK_SIZE=4)
+    def test_movement_export_streams_joined_rows(self):
+        self.add_movements(10)
+        rows, _ = self.export('/api/v1/reports/stock-movements/')
+
+        self.assertEqual(rows[0], ['Product', 'Branch', 'Type', 'Quantity', 'Date'])
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[1][:3], ['Amoxicillin', 'Branch', 'Addition'])
+        self.assertEqual(sorted(int(row[3]) for row in rows[1:]), list(range(1, 11)))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_movements(3)
+        _, few = self.export('/api/v1/reports/stock-movements/')
+        self.add_movements(300)
+        rows, many = self.export('/api/v1/reports/stock-movements/')
+
+        self.assertEqual(len(rows), 304)
+        self.assertEqual(few, many)
+
+    def test_sales_export_names_customers(self):
+        customer = Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        Sale.objects.create(branch=self.branch, customer=customer, payment_method='MOMO', total_amount=Decimal("9.50"))
+        Sale.objects.create(branch=self.branch, payment_method='CASH', total_amount=Decimal("2.00"))
+
+        rows, _ = self.export('/api/v1/reports/sales/')
+        self.assertEqual([row[3:6] for row in rows[1:]], [
+            ['', 'Cash', '2.00'],
+            ['Ama Mensah', 'Mobile Money', '9.50'],
+        ])
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventory.models import Inventory, InsufficientStock, StockMovement, StockTransfer
+from products.models import Product
+from sites.models import Site
+from accounts.models import User
+
+
+class FefoAllocationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.branch = Site.objects.create(name="Branch", is_warehouse=False)
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.warehouse,
+        )
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.branch,
+        )
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+
+        today = timezone.now().date()
+        self.late = self.add_batch(self.branch, "LATE", today + timedelta(days=300), 10)
+        self.undated = self.add_batch(self.branch, "UNDATED", None, 10)
+        self.soon = self.add_batch(self.branch, "SOON", today + timedelta(days=10), 4)
+        self.expired = self.add_batch(self.branch, "EXPIRED", today - timedelta(days=1), 50)
+
+    def add_batch(self, branch, batch_number, expiration_date, quantity):
+        return Inventory.objects.create(
+            product=self.product, branch=branch, batch_number=batch_number,
+            expiration_date=expiration_date, quantity=quantity,
+        )
+
+    def test_allocation_follows_expiry_and_skips_expired(self):
+        with transaction.atomic():
+            allocations = Inventory.objects.allocate(self.branch, {self.product.id: 20})[self.product.id]
+
+        self.assertEqual(
+            [(batch.batch_number, units) for batch, units in allocations],
+            [("SOON", 4), ("LATE", 10), ("UNDATED", 6)],
+        )
+
+    def test_allocation_raises_when_short(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            with transaction.atomic():
+                Inventory.objects.allocate(self.branch, {self.product.id: 25})
+        self.assertEqual(ctx.exception.available, 24)
+
+    def test_sale_draws_soonest_expiring_batches(self):
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post('/api/v1/sales/', {
+            "branch": self.branch.id,
+            "payment_method": "CASH",
+            "total_amount": "18.00",
+            "items": [{"product": self.product.id, "quantity": 6, "price_at_sale": "3.00"}],
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+
+        for batch in (self.soon, self.late, self.expired):
+            batch.refresh_from_db()
+        self.assertEqual(self.soon.quantity, 0)
+        self.assertEqual(self.late.quantity, 8)
+        self.assertEqual(self.expired.quantity, 50)
+        self.assertEqual(StockMovement.objects.filter(movement_type='REMOVE').count(), 2)
+
+    def test_dispatch_and_receive_carry_batches(self):
+        today = timezone.now().date()
+        first = self.add_batch(self.warehouse, "W1", today + timedelta(days=30), 5)
+        second = self.add_batch(self.warehouse, "W2", today + timedelta(days=90), 20)
+
+        self.client.force_authenticate(user=self.ceo)
+        res = self.client.post('/api/v1/warehouse/dispatch/', {
+            "product_id": self.product.id,
+            "quantity": 8,
+            "destination_id": self.branch.id,
+        }, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([line["quantity"] for line in res.data["allocations"]], [5, 3])
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.quantity, second.quantity), (0, 17))
+
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post(f'/api/v1/warehouse/receive-transfer/{res.data["transfer_id"]}/')
+        self.assertEqual(res.status_code, 200)
+
+        # Receiving confirms the dispatch without taking the stock twice
+        second.refresh_from_db()
+        self.assertEqual(second.quantity, 17)
+        self.assertEqual(Inventory.objects.get(branch=self.branch, batch_number="W1").quantity, 5)
+        self.assertEqual(Inventory.objects.get(branch=self.branch, batch_number="W2").quantity, 3)
+        self.assertFalse(StockMovement.objects.filter(status='IN_TRANSIT').exists())
+        self.assertEqual(StockTransfer.objects.get().transfer_status, 'RECEIVED')
+
+    def test_receive_of_approved_request_allocates_from_source(self):
+        self.add_batch(self.warehouse, "W1", None, 12)
+        transfer = StockTransfer.objects.create(
+            product=self.product, quantity=7, transfer_status='IN_TRANSIT',
+            from_branch=self.warehouse, to_branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post(f'/api/v1/warehouse/receive-transfer/{transfer.id}/')
+        self.assertEqual(res.status_code, 200)
+
+        self.assertEqual(Inventory.objects.get(branch=self.warehouse, batch_number="W1").quantity, 5)
+        self.assertEqual(Inventory.objects.get(branch=self.branch, batch_number="W1").quantity, 7)
@@ -0,0 +1,86 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import Inventory, LowStockAlert, Notification
+from products.models import Product
+from sites.models import Site
+
+
+class LowStockAlertTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.branch = Site.objects.create(name="Osu")
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.warehouse,
+        )
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.branch,
+        )
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+        self.batch = Inventory.objects.create(product=self.product, branch=self.branch, quantity=12, threshold_quantity=10)
+
+    def sell(self, quantity):
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post('/api/v1/sales/', {
+            "branch": self.branch.id, "payment_method": "CASH", "total_amount": "3.00",
+            "items": [{"product": self.product.id, "quantity": quantity, "price_at_sale": "3.00"}],
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+
+    def alerts(self):
+        return list(Notification.objects.filter(notification_type='STOCK_ALERT').values_list('recipient__email', flat=True))
+
+    def test_each_crossing_alerts_once(self):
+        self.sell(1)
+        self.assertEqual(self.alerts(), [])
+
+        self.sell(2)  # 11 -> 9 crosses the threshold
+        self.sell(1)  # Still below: no second alert
+        self.assertEqual(self.alerts(), ["admin@branch.com"])
+        alert = LowStockAlert.objects.get()
+        self.assertEqual((alert.quantity, alert.threshold_quantity, alert.resolved_at), (9, 10, None))
+
+        # Restocking resolves the alert and arms the next crossing
+        self.batch.refresh_from_db()
+        self.batch.adjust_quantity(5)
+        self.assertIsNotNone(LowStockAlert.objects.get().resolved_at)
+        self.sell(4)
+        self.assertEqual(len(self.alerts()), 2)
+        self.assertEqual(LowStockAlert.objects.filter(resolved_at__isnull=True).count(), 1)
+
+    def test_transfers_and_manual_edits_alert_too(self):
+        warehouse_admin = User.objects.create(
+            email="admin@warehouse.com", first_name="Warehouse", last_name="Admin",
+            phone_number="0200000002", role="Admin", branch=self.warehouse,
+        )
+        Inventory.objects.create(product=self.product, branch=self.warehouse, quantity=30, threshold_quantity=25)
+
+        self.client.force_authenticate(user=self.ceo)
+        res = self.client.post('/api/v1/warehouse/dispatch/', {
+            "product_id": self.product.id, "quantity": 10, "destination_id": self.branch.id,
+        }, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.alerts(), [warehouse_admin.email])
+
+        self.batch.quantity = 3
+        self.batch.save()
+        self.assertEqual(sorted(self.alerts()), ["admin@branch.com", warehouse_admin.email])
+
+    def test_branch_listing_is_one_query(self):
+        Inventory.objects.create(product=self.product, branch=self.branch, batch_number="B2", quantity=1)
+        Inventory.objects.create(product=self.product, branch=self.warehouse, quantity=1)
+
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(1):
+            res = self.client.get(f'/api/v1/sites/{self.branch.id}/low-stock/')
+        self.assertEqual([(item["batch_number"], item["quantity"]) for item in res.data["low_stock_items"]], [("B2", 1)])
+
+        self.assertEqual(self.client.get(f'/api/v1/sites/{self.warehouse.id}/low-stock/').status_code, 404)
+        self.client.force_authenticate(user=self.ceo)
+        self.assertEqual(len(self.client.get(f'/api/v1/sites/{self.warehouse.id}/low-stock/').data["low_stock_items"]), 1)
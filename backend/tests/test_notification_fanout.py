@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory import fanout, unread
+from inventory.models import Inventory, Notification
+from products.models import Product
+from sites.models import Site
+
+
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.branches = [Site.objects.create(name=f"Branch {i}") for i in range(3)]
+        self.ceos = [self.user(f"ceo{i}", "CEO", self.warehouse) for i in range(2)]
+        self.admins = [self.user(f"admin{i}", "Admin", branch) for i, branch in enumerate(self.branches * 2)]
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+
+    def user(self, name, role, branch):
+        return User.objects.create(
+            email=f"{name}@pharmacy.com", first_name=name, last_name="User",
+            phone_number="0200000000", role=role, branch=branch,
+        )
+
+    def recipients(self, **filters):
+        return sorted(Notification.objects.filter(**filters).values_list('recipient__email', flat=True))
+
+    def test_notifying_every_admin_is_one_insert(self):
+        fanout.notify_roles(['Admin'], notification_type='STOCK_ALERT', title="Recall", message="Batch X recalled")
+        Notification.objects.all().delete()
+
+        # Warm directory: load the users once, insert once
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(2):
+                fanout.notify_roles(['Admin'], notification_type='STOCK_ALERT', title="Recall", message="Batch X recalled")
+
+        self.assertEqual(self.recipients(), sorted(admin.email for admin in self.admins))
+        self.assertEqual([unread.get_count(admin.id) for admin in self.admins], [1] * 6)
+
+    def test_directory_filters_by_branch_and_follows_user_changes(self):
+        branch = self.branches[0]
+        self.assertEqual(sorted(fanout.recipient_ids(['Admin'], [branch])), [self.admins[0].id, self.admins[3].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = self.user("newcomer", "Admin", branch)
+            self.admins[3].is_active = False
+            self.admins[3].save()
+        self.assertEqual(sorted(fanout.recipient_ids(['Admin'], [branch])), [self.admins[0].id, newcomer.id])
+
+    def test_transfer_request_notifies_every_ceo(self):
+        self.client.force_authenticate(user=self.admins[0])
+        res = self.client.post('/api/v1/stock-transfer/', {"product": self.product.id, "quantity": 5}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.recipients(notification_type='TRANSFER_REQUEST'), ["ceo0@pharmacy.com", "ceo1@pharmacy.com"])
+
+    def test_dispatch_and_receipt_notify_every_branch_admin(self):
+        warehouse_admins = [self.user(f"wh{i}", "Admin", self.warehouse) for i in range(2)]
+        Inventory.objects.create(
+            product=self.product, branch=self.warehouse, batch_number="W1",
+            expiration_date=timezone.now().date() + timedelta(days=90), quantity=20,
+        )
+
+        self.client.force_authenticate(user=self.ceos[0])
+        res = self.client.post('/api/v1/warehouse/dispatch/', {
+            "product_id": self.product.id, "quantity": 8, "destination_id": self.branches[1].id,
+        }, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            self.recipients(notification_type='TRANSFER_APPROVAL'), ["admin1@pharmacy.com", "admin4@pharmacy.com"],
+        )
+
+        # Two admins at the sending site used to raise MultipleObjectsReturned
+        self.client.force_authenticate(user=self.admins[1])
+        res = self.client.post(f'/api/v1/warehouse/receive-transfer/{res.data["transfer_id"]}/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.recipients(notification_type='SYSTEM'), sorted(user.email for user in warehouse_admins))
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory import unread
+from inventory.models import Notification, NotificationArchive
+from sites.models import Site
+
+
+@override_settings(NOTIFICATION_TTL_DAYS={'STOCK_ALERT': 14, 'TRANSFER_REQUEST': 90}, NOTIFICATION_DEFAULT_TTL_DAYS=30)
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Site.objects.create(name="Branch")
+        self.user = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+
+    def notification(self, notification_type, age_days, **fields):
+        notification = Notification.objects.create(
+            recipient=self.user, notification_type=notification_type, title=f"{notification_type} {age_days}d",
+            message="Message", related_branch=self.branch, **fields,
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=age_days))
+        return notification
+
+    def archive(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_notifications', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_expired_and_archived_rows_in_batches(self):
+        keep = [
+            self.notification('STOCK_ALERT', 10),
+            self.notification('TRANSFER_REQUEST', 60),
+            self.notification('SYSTEM_ALERT', 20),  # No TTL of its own; default applies
+        ]
+        self.notification('STOCK_ALERT', 20)
+        self.notification('TRANSFER_REQUEST', 120, is_read=True)
+        self.notification('SYSTEM_ALERT', 40)
+        self.notification('STOCK_ALERT', 1, is_archived=True)
+        self.assertEqual(unread.get_count(self.user.id), 5)
+
+        self.assertIn("Archived 4 notifications in 2 batches.", self.archive('--batch-size', '3'))
+
+        self.assertEqual(sorted(Notification.objects.values_list('pk', flat=True)), [n.pk for n in keep])
+        self.assertEqual(NotificationArchive.objects.count(), 4)
+        archived = NotificationArchive.objects.get(title="TRANSFER_REQUEST 120d")
+        self.assertEqual((archived.recipient_id, archived.related_branch_id, archived.is_read), (self.user.id, self.branch.id, True))
+
+        # Two unread live notifications left the inbox
+        self.assertEqual(unread.get_count(self.user.id), 3)
+        self.assertEqual(unread.unread_queryset(self.user.id).count(), 3)
+
+        self.assertIn("Archived 0 notifications in 0 batches.", self.archive())
+
+    def test_max_batches_and_inbox_unaffected(self):
+        for _ in range(5):
+            self.notification('STOCK_ALERT', 30)
+        live = self.notification('STOCK_ALERT', 0)
+
+        self.assertIn("Archived 2 notifications in 1 batches.", self.archive('--batch-size', '2', '--max-batches', '1'))
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        res = client.get('/api/v1/notifications/')
+        self.assertEqual(len(res.data['results']), 4)
+        self.assertEqual(res.data['results'][0]['id'], live.id)
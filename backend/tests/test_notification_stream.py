@@ -0,0 +1,136 @@
+import json
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import User
+from apis.utils import create_notification
+from core.streams import NotificationStreamRouter
+from inventory.models import Notification
+from sites.models import Site
+
+
+async def django_stub(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Site.objects.create(name="Branch")
+        self.user = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.other = User.objects.create(
+            email="other@branch.com", first_name="Other", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.branch,
+        )
+        Notification.objects.create(recipient=self.user, notification_type='SYSTEM_ALERT', title="Old", message="Unread")
+
+    def open_stream(self, token):
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/v1/notifications/stream/',
+            'query_string': f"token={token}".encode(), 'headers': [(b'origin', b'http://localhost:5173')],
+        }
+        return ApplicationCommunicator(NotificationStreamRouter(django_stub), scope)
+
+    async def next_event(self, stream):
+        body = (await stream.receive_output(timeout=2))['body'].decode()
+        name, data = body.strip().split('\n')
+        return name.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    def notify(self, recipient, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(recipient, 'SYSTEM_ALERT', title, "Pushed")
+
+    def mark_all_read(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/v1/notifications/mark-all-as-read/')
+
+    def test_stream_pushes_notifications_and_unread_deltas(self):
+        async_to_sync(self.stream_scenario)()
+
+    async def stream_scenario(self):
+        stream = self.open_stream(AccessToken.for_user(self.user))
+        await stream.send_input({'type': 'http.request'})
+
+        start = await stream.receive_output(timeout=2)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertIn((b'access-control-allow-origin', b'http://localhost:5173'), start['headers'])
+        self.assertEqual(await self.next_event(stream), ('unread', {'count': 1}))
+
+        await sync_to_async(self.notify)(self.user, "Stock alert")
+        name, data = await self.next_event(stream)
+        self.assertEqual((name, data['title'], data['is_read']), ('notification', "Stock alert", False))
+        self.assertEqual(await self.next_event(stream), ('unread', {'delta': 1}))
+
+        # Someone else's notification never reaches this stream
+        await sync_to_async(self.notify)(self.other, "Not yours")
+        self.assertTrue(await stream.receive_nothing(timeout=0.2))
+
+        await sync_to_async(self.mark_all_read)()
+        self.assertEqual(await self.next_event(stream), ('unread', {'delta': -2}))
+
+        await stream.send_input({'type': 'http.disconnect'})
+        await stream.wait(timeout=2)
+
+    async def closed(self, stream):
+        # Skips keepalives up to the end of the response
+        while True:
+            output = await stream.receive_output(timeout=2)
+            if not output.get('more_body'):
+                return output['body'] == b''
+
+    def test_stream_ends_when_the_token_expires(self):
+        async_to_sync(self.expiry_scenario)()
+
+    async def expiry_scenario(self):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=1))
+        stream = self.open_stream(token)
+        await stream.send_input({'type': 'http.request'})
+        self.assertEqual((await stream.receive_output(timeout=2))['status'], 200)
+        self.assertEqual(await self.next_event(stream), ('unread', {'count': 1}))
+        self.assertTrue(await self.closed(stream))
+
+        # Reconnecting with the expired token is refused
+        stream = self.open_stream(token)
+        await stream.send_input({'type': 'http.request'})
+        self.assertEqual((await stream.receive_output(timeout=2))['status'], 401)
+
+    @mock.patch('core.streams.KEEPALIVE_SECONDS', 0.1)
+    def test_stream_ends_when_the_user_is_deactivated(self):
+        async_to_sync(self.deactivation_scenario)()
+
+    async def deactivation_scenario(self):
+        stream = self.open_stream(AccessToken.for_user(self.user))
+        await stream.send_input({'type': 'http.request'})
+        self.assertEqual((await stream.receive_output(timeout=2))['status'], 200)
+        self.assertEqual(await self.next_event(stream), ('unread', {'count': 1}))
+        self.assertEqual((await stream.receive_output(timeout=2))['body'], b": keepalive\n\n")
+
+        await sync_to_async(User.objects.filter(pk=self.user.pk).update)(is_active=False)
+        self.assertTrue(await self.closed(stream))
+
+    def test_rejects_bad_token_and_passes_other_paths_through(self):
+        async_to_sync(self.routing_scenario)()
+
+    async def routing_scenario(self):
+        stream = self.open_stream("not-a-token")
+        await stream.send_input({'type': 'http.request'})
+        self.assertEqual((await stream.receive_output(timeout=2))['status'], 401)
+
+        other = ApplicationCommunicator(NotificationStreamRouter(django_stub), {
+            'type': 'http', 'method': 'GET', 'path': '/api/v1/notifications/', 'query_string': b'', 'headers': [],
+        })
+        await other.send_input({'type': 'http.request'})
+        self.assertEqual((await other.receive_output(timeout=2))['status'], 204)
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from documents.models import PdfRender
+from products.models import Product
+from sales.models import Sale, SaleItem
+from sites.models import Site
+
+
+class PdfQueueTests(TestCase):
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.store_dir)
+        override = override_settings(PDF_STORE_DIR=self.store_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch")
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO",
+        )
+        customer = Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        product = Product.objects.create(name="Paracetamol", category="Drugs", unit_price=Decimal("1.50"))
+        self.sale = Sale.objects.create(branch=self.branch, customer=customer, payment_method='CASH', total_amount=Decimal("3.00"))
+        SaleItem.objects.create(sale=self.sale, product=product, quantity=2, price_at_sale=Decimal("1.50"))
+
+    def receipt(self):
+        return self.client.get(f'/api/v1/receipts/{self.sale.id}/')
+
+    def render(self):
+        out = StringIO()
+        call_command('render_pdfs', '--once', stdout=out)
+        return out.getvalue()
+
+    def test_receipt_is_queued_then_served_from_store(self):
+        first = self.receipt()
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first['Retry-After'], '1')
+        self.assertEqual(self.receipt().status_code, 202)
+        self.assertEqual(PdfRender.objects.filter(status='PENDING').count(), 1)
+
+        self.assertIn("Rendered 1 PDFs, 0 failed.", self.render())
+
+        res = self.receipt()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/pdf')
+        self.assertIn(b'Ama Mensah', b''.join(res.streaming_content))
+        job = PdfRender.objects.get()
+        self.assertEqual((job.status, job.html), ('DONE', ''))
+
+    def test_changed_sale_gets_a_new_render(self):
+        self.receipt()
+        self.render()
+
+        Sale.objects.filter(pk=self.sale.pk).update(payment_method='MOMO')
+        self.assertEqual(self.receipt().status_code, 202)
+        self.assertEqual(PdfRender.objects.count(), 2)
+
+    @override_settings(PDF_RENDER_MAX_ATTEMPTS=2)
+    def test_failing_render_is_retried_then_reported(self):
+        self.receipt()
+        with mock.patch('documents.rendering.render_pdf', side_effect=RuntimeError("no fonts")):
+            self.assertIn("0 PDFs, 1 failed", self.render())
+            job = PdfRender.objects.get()
+            self.assertEqual(job.status, 'PENDING')
+
+            # Backed off: nothing to claim until the retry is due
+            self.assertIn("0 PDFs, 0 failed", self.render())
+            PdfRender.objects.filter(pk=job.pk).update(retry_at=job.created_at)
+            self.render()
+
+        job = PdfRender.objects.get()
+        self.assertEqual((job.status, job.attempts, job.error), ('FAILED', 2, "no fonts"))
+        self.assertEqual(self.receipt().status_code, 500)
+
+    def test_report_pdf_goes_through_the_queue(self):
+        self.client.force_authenticate(user=self.ceo)
+        self.assertEqual(self.client.get('/api/v1/reports/sales/', {'format': 'pdf'}).status_code, 202)
+        self.render()
+        res = self.client.get('/api/v1/reports/sales/', {'format': 'pdf'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/pdf')
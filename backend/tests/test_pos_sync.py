@@ -0,0 +1,123 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from dashboard.models import DailyBranchSales
+from inventory.models import Inventory, StockLedgerEntry
+from products.models import Product
+from sales.models import Sale
+from sites.models import Site
+
+
+class PosSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.other_branch = Site.objects.create(name="Tema")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.customer = Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        self.paracetamol = Product.objects.create(name="Paracetamol", category="Drugs", unit_price=Decimal("0.50"))
+        self.ors = Product.objects.create(name="ORS", category="Drugs", unit_price=Decimal("1.00"))
+        self.batch = Inventory.objects.create(product=self.paracetamol, branch=self.branch, quantity=10, threshold_quantity=0)
+        Inventory.objects.create(product=self.ors, branch=self.branch, quantity=3, threshold_quantity=0)
+
+    def sale(self, product, quantity, **extra):
+        return {
+            "client_id": str(uuid.uuid4()),
+            "payment_method": "CASH",
+            "total_amount": str(product.unit_price * quantity),
+            "items": [{"product_id": product.id, "quantity": quantity, "price_at_sale": str(product.unit_price)}],
+            **extra,
+        }
+
+    def sync(self, sales, **extra):
+        return self.client.post('/api/v1/sales/sync/', {"branch": self.branch.id, "sales": sales, **extra}, format='json')
+
+    def test_upload_applies_sales_once(self):
+        sales = [
+            self.sale(self.paracetamol, 4, customer_id=self.customer.id),
+            self.sale(self.ors, 5),  # Only 3 in stock
+            self.sale(self.paracetamol, 6),
+        ]
+        res = self.sync(sales)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([r["status"] for r in res.data["results"]], ["created", "rejected", "created"])
+        self.assertEqual(res.data["results"][1]["error"], "Insufficient stock for product ORS")
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.quantity, 0)
+        self.assertEqual(StockLedgerEntry.objects.filter(inventory=self.batch).count(), 3)  # Opening stock + 2 sales
+
+        rollup = DailyBranchSales.objects.get(branch=self.branch)
+        self.assertEqual((rollup.sales_count, rollup.revenue, rollup.customer_count, rollup.new_customer_count),
+                         (2, Decimal("5.00"), 1, 1))
+
+        # The link dropped before the terminal saw the response: it uploads again
+        retried = self.sync(sales)
+        self.assertEqual([r["status"] for r in retried.data["results"]], ["duplicate", "rejected", "duplicate"])
+        self.assertEqual([r.get("sale_id") for r in retried.data["results"]],
+                         [r.get("sale_id") for r in res.data["results"]])
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertEqual(DailyBranchSales.objects.get(branch=self.branch).sales_count, 2)
+
+    def test_bad_sales_do_not_hold_back_the_rest(self):
+        repeated = self.sale(self.paracetamol, 1)
+        res = self.sync([
+            repeated,
+            {**self.sale(self.paracetamol, 1), "items": [{"product_id": 999, "quantity": 1, "price_at_sale": "1.00"}]},
+            {"client_id": "not-a-uuid"},
+            repeated,
+        ])
+        self.assertEqual(res.status_code, 200)
+        results = res.data["results"]
+        self.assertEqual([r["status"] for r in results], ["created", "invalid", "invalid", "duplicate"])
+        self.assertIn("items", results[1]["errors"])
+        self.assertEqual(results[3]["sale_id"], results[0]["sale_id"])
+        self.assertEqual(Inventory.objects.get(pk=self.batch.pk).quantity, 9)
+
+    def test_offline_sales_keep_the_terminal_time(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        res = self.sync([
+            self.sale(self.paracetamol, 1, sold_at=yesterday.isoformat()),
+            self.sale(self.paracetamol, 1, sold_at=(timezone.now() + timedelta(days=1)).isoformat()),
+        ])
+        old, ahead = (Sale.objects.get(pk=r["sale_id"]) for r in res.data["results"])
+        self.assertEqual(old.date, yesterday)
+        self.assertLessEqual(ahead.date, timezone.now())
+        self.assertEqual(
+            sorted(DailyBranchSales.objects.filter(branch=self.branch).values_list('date', flat=True)),
+            [timezone.localdate(yesterday), timezone.localdate()],
+        )
+
+    @override_settings(POS_SYNC_OVERLAP_SECONDS=0)
+    def test_delta_since_the_sync_token(self):
+        first = self.sync([])
+        self.assertEqual(len(first.data["products"]), 2)
+        self.assertEqual(len(first.data["inventory"]), 2)
+
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Product.objects.update(updated_at=an_hour_ago)
+        Inventory.objects.update(updated_at=an_hour_ago)
+        token = self.sync([]).data["sync_token"]
+
+        self.ors.unit_price = Decimal("1.20")
+        self.ors.save()
+        Inventory.objects.create(product=self.ors, branch=self.other_branch, quantity=50)
+        res = self.sync([self.sale(self.paracetamol, 2)], sync_token=token)
+        self.assertEqual([p["id"] for p in res.data["products"]], [self.ors.id])
+        self.assertEqual([(b["id"], b["quantity"]) for b in res.data["inventory"]], [(self.batch.id, 8)])
+        self.assertNotEqual(res.data["sync_token"], token)
+
+        self.assertEqual(self.sync([], sync_token="yesterday").status_code, 400)
+
+    def test_only_the_own_branch(self):
+        res = self.client.post('/api/v1/sales/sync/', {"branch": self.other_branch.id, "sales": []}, format='json')
+        self.assertEqual(res.status_code, 404)
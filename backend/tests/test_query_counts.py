@@ -0,0 +1,142 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from inventory.models import Inventory, Notification, StockMovement, StockTransfer
+from products.models import Product
+from sales.models import Sale, SaleItem
+from sites.models import Site
+
+
+class ListQueryCountTests(TestCase):
+    """
+    Every list endpoint costs the same number of queries for a page of two
+    rows as for a page of twenty, with every relation its serializer reads
+    filled in.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch")
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000001", role="CEO",
+        )
+        self.created = 0
+
+    def products(self, n):
+        start = Product.objects.count()
+        return Product.objects.bulk_create([
+            Product(name=f"Product {start + i}", category="Drugs", unit_price=Decimal("1.00")) for i in range(n)
+        ])
+
+    def add_inventory(self, n, branch=None):
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=branch or self.branch, quantity=5, received_by=self.admin)
+            for product in self.products(n)
+        ])
+
+    def add_movements(self, n):
+        StockMovement.objects.bulk_create([
+            StockMovement(product=product, branch=self.branch, movement_type='ADD', quantity=1)
+            for product in self.products(n)
+        ])
+
+    def add_transfers(self, n, **fields):
+        return StockTransfer.objects.bulk_create([
+            StockTransfer(
+                product=product, from_branch=self.branch, to_branch=self.warehouse, quantity=1,
+                requested_by=self.admin, approved_by=self.ceo, processed_by=self.ceo, confirmed_by=self.admin,
+                **fields,
+            )
+            for product in self.products(n)
+        ])
+
+    def add_sales(self, n):
+        product = self.products(1)[0]
+        for i in range(n):
+            customer = Customer.objects.create(first_name=f"C{i}", last_name="Test", phone_number="0240000000")
+            sale = Sale.objects.create(branch=self.branch, customer=customer, processed_by=self.admin,
+                                       payment_method='CASH', total_amount=Decimal("2.00"))
+            SaleItem.objects.bulk_create([
+                SaleItem(sale=sale, product=product, quantity=1, price_at_sale=Decimal("1.00")) for _ in range(2)
+            ])
+
+    def add_customers(self, n):
+        Customer.objects.bulk_create([
+            Customer(first_name=f"C{i}", last_name="Test", phone_number="0240000000") for i in range(n)
+        ])
+
+    def add_notifications(self, n):
+        transfers = self.add_transfers(n)
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=self.admin, sender=self.ceo, related_branch=self.branch,
+                notification_type='TRANSFER_REQUEST' if i % 2 else 'SYSTEM_ALERT',
+                title="Transfer", message="Transfer requested", related_object_id=transfer.id,
+            )
+            for i, transfer in enumerate(transfers)
+        ])
+
+    def assertConstantQueries(self, url, add_rows, queries, user=None):
+        self.client.force_authenticate(user=user or self.admin)
+        for n in (2, 20):
+            add_rows(n)
+            cache.clear()
+            with self.assertNumQueries(queries):
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+
+    def test_inventory(self):
+        self.assertConstantQueries('/api/v1/inventory/', self.add_inventory, 1)
+
+    def test_stock_movements(self):
+        self.assertConstantQueries('/api/v1/stock-movement/', self.add_movements, 1)
+
+    def test_stock_transfers(self):
+        self.assertConstantQueries('/api/v1/stock-transfer/', self.add_transfers, 1)
+
+    def test_in_transit_transfers(self):
+        self.admin.branch = self.warehouse
+        self.assertConstantQueries(
+            '/api/v1/transfers/in-transit/', lambda n: self.add_transfers(n, transfer_status='IN_TRANSIT'), 1,
+        )
+
+    def test_sales(self):
+        self.assertConstantQueries('/api/v1/sales/', self.add_sales, 2)
+
+    def test_customers_and_products(self):
+        self.assertConstantQueries('/api/v1/customers/', self.add_customers, 1)
+        self.assertConstantQueries('/api/v1/products/', self.products, 1)
+
+    def test_notifications(self):
+        # Page, then every related transfer in one go
+        self.assertConstantQueries('/api/v1/notifications/', self.add_notifications, 2)
+
+    def test_users(self):
+        def add_users(n):
+            start = User.objects.count()
+            User.objects.bulk_create([
+                User(email=f"user{start + i}@branch.com", first_name="U", last_name="Ser",
+                     phone_number="0200000000", role="Admin", branch=self.branch)
+                for i in range(n)
+            ])
+        self.assertConstantQueries('/api/v1/users/', add_users, 1)
+
+    def test_expiry_list(self):
+        def add_expired(n):
+            self.add_inventory(n)
+            Inventory.objects.update(expiration_date="2020-01-01")
+        self.assertConstantQueries('/api/v1/dashboard/expiry-list/', add_expired, 1)
+
+    def test_reports(self):
+        self.assertConstantQueries('/api/v1/reports/inventory/', self.add_inventory, 1)
+        self.assertConstantQueries('/api/v1/reports/stock-movements/', self.add_movements, 1)
+        self.assertConstantQueries('/api/v1/reports/stock-transfers/', self.add_transfers, 1)
+        self.assertConstantQueries('/api/v1/reports/sales/', self.add_sales, 2)
@@ -0,0 +1,169 @@
+import socketserver
+import threading
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from accounts.models import Customer
+from sales.models import ReceiptMessage, Sale
+from sites.models import Site
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server to accept mail and count connections."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply("221 bye")
+                return
+            if command == 'DATA':
+                self.reply("354 go ahead")
+                data = []
+                while (chunk := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(chunk)
+                self.server.messages.append(b''.join(data).decode())
+            self.reply("250 ok")
+
+
+class FakeSMSBackend:
+    instances = 0
+    sent = []
+    fail_for = set()
+
+    def __init__(self):
+        FakeSMSBackend.instances += 1
+
+    def send(self, to, body):
+        if to in self.fail_for:
+            raise ConnectionError("provider unavailable")
+        self.sent.append((to, body))
+        return f"SM{len(self.sent)}"
+
+
+class ReceiptOutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = SMTPStandIn()
+        threading.Thread(target=cls.smtp.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=cls.smtp.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            SMS_BACKEND=f'{__name__}.FakeSMSBackend',
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.smtp.connections = 0
+        self.smtp.messages.clear()
+        FakeSMSBackend.instances = 0
+        FakeSMSBackend.sent.clear()
+        FakeSMSBackend.fail_for = set()
+
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.customers = [
+            Customer.objects.create(
+                first_name=f"Customer{i}", last_name="Test", phone_number=f"02400000{i:02}", email=f"c{i}@example.com",
+            )
+            for i in range(3)
+        ]
+        self.sales = [
+            Sale.objects.create(branch=self.branch, customer=customer, payment_method='CASH', total_amount=Decimal("5.00"))
+            for customer in self.customers
+        ]
+
+    def send_receipts(self):
+        out = StringIO()
+        call_command('send_receipts', '--once', stdout=out)
+        return out.getvalue()
+
+    def test_views_only_queue(self):
+        res = self.client.post(f'/api/v1/receipts/{self.sales[0].id}/send-email/')
+        self.assertEqual(res.status_code, 202)
+        res = self.client.post(f'/api/v1/api/receipts/{self.sales[0].id}/send-sms/')
+        self.assertEqual(res.status_code, 202)
+
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertEqual(FakeSMSBackend.sent, [])
+        sale = Sale.objects.get(pk=self.sales[0].pk)
+        self.assertEqual((sale.email_status, sale.sms_status), ('QUEUED', 'QUEUED'))
+        self.assertEqual(ReceiptMessage.objects.filter(status='PENDING').count(), 2)
+
+    def test_walk_in_sale_has_no_recipient(self):
+        sale = Sale.objects.create(branch=self.branch, payment_method='CASH', total_amount=Decimal("1.00"))
+        res = self.client.post(f'/api/v1/receipts/{sale.id}/send-email/')
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(ReceiptMessage.objects.exists())
+
+    def test_worker_batches_over_one_connection_and_one_client(self):
+        for sale in self.sales:
+            self.client.post(f'/api/v1/receipts/{sale.id}/send-email/')
+            self.client.post(f'/api/v1/api/receipts/{sale.id}/send-sms/')
+
+        self.assertIn("Sent 6 receipts, 0 failed.", self.send_receipts())
+
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertIn("Osu", self.smtp.messages[0])
+        self.assertEqual(FakeSMSBackend.instances, 1)
+        self.assertEqual(len(FakeSMSBackend.sent), 3)
+
+        for sale in Sale.objects.filter(pk__in=[sale.pk for sale in self.sales]):
+            self.assertEqual((sale.email_status, sale.sms_status, sale.receipt_sent), ('SENT', 'SENT', True))
+        self.assertEqual(
+            sorted(ReceiptMessage.objects.filter(channel='SMS').values_list('provider_id', flat=True)),
+            ['SM1', 'SM2', 'SM3'],
+        )
+
+    @override_settings(RECEIPT_SEND_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_fail_and_can_be_retried(self):
+        sale = self.sales[0]
+        FakeSMSBackend.fail_for = {self.customers[0].phone_number}
+        self.client.post(f'/api/v1/api/receipts/{sale.id}/send-sms/')
+
+        self.assertIn("Sent 0 receipts, 1 failed.", self.send_receipts())
+        message = ReceiptMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ('PENDING', 1))
+        self.assertIsNotNone(message.retry_at)
+
+        # Not due yet
+        self.assertIn("Sent 0 receipts, 0 failed.", self.send_receipts())
+
+        ReceiptMessage.objects.update(retry_at=message.created_at)
+        self.send_receipts()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.error), ('FAILED', "provider unavailable"))
+        self.assertEqual(Sale.objects.get(pk=sale.pk).sms_status, 'FAILED')
+
+        FakeSMSBackend.fail_for = set()
+        res = self.client.post(f'/api/v1/receipts/{sale.id}/retry/')
+        self.assertEqual((res.status_code, res.data["channels"]), (202, ['SMS']))
+        self.assertIn("Sent 1 receipts, 0 failed.", self.send_receipts())
+        self.assertEqual(Sale.objects.get(pk=sale.pk).sms_status, 'SENT')
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from dashboard.models import DailyBranchSales
+from inventory.models import Inventory
+from products.models import Product
+from sales.models import Sale
+from sites.models import Site
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch")
+        self.other_branch = Site.objects.create(name="Other Branch")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.customer = Customer.objects.create(first_name="Ama", last_name="Mensah", phone_number="0240000000")
+        self.product = Product.objects.create(name="Vitamin C", category="Supplements", unit_price=Decimal("4.00"))
+        Inventory.objects.create(product=self.product, branch=self.branch, quantity=100)
+
+    def record(self, branch, amount, customer=None):
+        sale = Sale.objects.create(branch=branch, customer=customer, payment_method='CASH', total_amount=Decimal(amount))
+        DailyBranchSales.objects.record_sale(sale)
+        return sale
+
+    def test_sale_through_api_updates_rollup(self):
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post('/api/v1/sales/', {
+            "branch": self.branch.id,
+            "payment_method": "CASH",
+            "total_amount": "8.00",
+            "items": [{"product": self.product.id, "quantity": 2, "price_at_sale": "4.00"}],
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+
+        rollup = DailyBranchSales.objects.get(branch=self.branch)
+        self.assertEqual((rollup.sales_count, rollup.revenue), (1, Decimal("8.00")))
+
+    def test_customers_are_counted_once(self):
+        self.record(self.branch, "10.00", self.customer)
+        self.record(self.branch, "5.00", self.customer)
+        self.record(self.branch, "2.50")
+        self.record(self.other_branch, "7.00", self.customer)
+
+        rollup = DailyBranchSales.objects.get(branch=self.branch)
+        self.assertEqual(rollup.sales_count, 3)
+        self.assertEqual(rollup.revenue, Decimal("17.50"))
+        self.assertEqual(rollup.customer_count, 1)
+        self.assertEqual(rollup.new_customer_count, 1)
+        self.assertEqual(DailyBranchSales.objects.get(branch=self.other_branch).new_customer_count, 1)
+
+    def test_deleted_sales_come_back_out(self):
+        first = self.record(self.branch, "10.00", self.customer)
+        Sale.objects.filter(pk=first.pk).update(date=first.date - timedelta(days=1))
+        first.refresh_from_db()
+        DailyBranchSales.objects.update(date=timezone.localdate(first.date))
+        second = self.record(self.branch, "5.00", self.customer)
+        self.record(self.branch, "4.00", self.customer)
+        self.record(self.branch, "2.50")
+
+        first.delete()
+        second.delete()
+
+        out = StringIO()
+        call_command('rebuild_sales_rollup', '--verify-only', stdout=out)
+        self.assertIn("matches the Sale table", out.getvalue())
+        today = DailyBranchSales.objects.get(branch=self.branch, date=timezone.localdate())
+        self.assertEqual(
+            (today.sales_count, today.revenue, today.customer_count, today.new_customer_count),
+            (2, Decimal("6.50"), 1, 1),
+        )
+
+    def test_deleting_a_branch_takes_its_sales_and_rollups(self):
+        self.record(self.other_branch, "7.00", self.customer)
+        self.other_branch.delete()
+        self.assertFalse(DailyBranchSales.objects.filter(branch_id=self.other_branch.id).exists())
+
+    def test_dashboard_reads_rollup(self):
+        self.record(self.branch, "10.00", self.customer)
+        self.record(self.other_branch, "7.00")
+        # Sales missing from the rollup must not show up on the dashboard
+        Sale.objects.create(branch=self.branch, payment_method='CASH', total_amount=Decimal("1000.00"))
+
+        self.client.force_authenticate(user=self.admin)
+        stats = {row["title"]: row["value"] for row in self.client.get('/api/v1/dashboard/statistics/').data["statistics"]}
+        self.assertEqual(stats["Total Sales"], Decimal("10.00"))
+        self.assertEqual(stats["Total Customers"], 1)
+
+        monthly = self.client.get('/api/v1/dashboard/monthly-sales/').data
+        self.assertEqual([Decimal(row["total"]) for row in monthly], [Decimal("10.00")])
+
+    def test_rebuild_command_backfills_and_verifies(self):
+        self.record(self.branch, "10.00", self.customer)
+        Sale.objects.create(branch=self.branch, customer=self.customer, payment_method='CASH', total_amount=Decimal("3.00"))
+        Sale.objects.create(branch=self.other_branch, payment_method='MOMO', total_amount=Decimal("6.00"))
+
+        out = StringIO()
+        call_command('rebuild_sales_rollup', '--verify-only', stdout=out)
+        self.assertIn("2 rollup rows out of step", out.getvalue())
+
+        out = StringIO()
+        call_command('rebuild_sales_rollup', stdout=out)
+        self.assertIn("matches the Sale table", out.getvalue())
+
+        rollup = DailyBranchSales.objects.get(branch=self.branch)
+        self.assertEqual((rollup.sales_count, rollup.revenue, rollup.customer_count), (2, Decimal("13.00"), 1))
+        self.assertEqual(DailyBranchSales.objects.get(branch=self.other_branch).revenue, Decimal("6.00"))
@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import Customer, User
+from core.search import SearchIndex
+from inventory.models import Inventory
+from products.models import Product, ProductCode
+from sales.models import Sale, SaleItem
+from sites.models import Site
+
+
+class SearchIndexTests(TestCase):
+    def test_prefix_fuzzy_and_every_token(self):
+        index = SearchIndex([
+            (1, "Amoxicillin 500mg Caps GSK"), (2, "Amoxiclav 625"), (3, "Paracetamol 500mg"), (4, "Ibuprofen"),
+        ])
+        self.assertEqual([doc for doc, _ in index.search("amox")], [1, 2])
+        self.assertEqual([doc for doc, _ in index.search("amoxcillin")], [1])  # Typo
+        self.assertEqual([doc for doc, _ in index.search("para 500")], [3])
+        self.assertEqual(index.search("ibuprofen")[0], (4, 1.0))
+        self.assertEqual(index.search("xyz"), [])
+        self.assertEqual(index.search("  "), [])
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.empty = Product.objects.create(name="Amoxicillin 250mg", brand="Generic", category="Drugs", unit_price=Decimal("2.00"))
+        self.stocked = Product.objects.create(name="Amoxicillin 500mg", brand="GSK", category="Drugs", unit_price=Decimal("3.00"))
+        Inventory.objects.create(product=self.stocked, branch=self.branch, quantity=30)
+        Inventory.objects.create(product=self.empty, branch=self.branch, quantity=50, expiration_date=date(2020, 1, 1))
+
+    def search(self, q):
+        res = self.client.get('/api/v1/products/search/', {"q": q})
+        self.assertEqual(res.status_code, 200)
+        return res.data["results"]
+
+    def test_ranks_by_relevance_then_branch_stock(self):
+        results = self.search("amoxicilin")
+        self.assertEqual([(r["id"], r["in_stock"]) for r in results], [(self.stocked.id, 30), (self.empty.id, 0)])
+        self.assertEqual([r["id"] for r in self.search("gsk")], [self.stocked.id])
+        self.assertEqual(self.search("paracetamol"), [])
+
+    def test_new_products_are_found_and_results_capped(self):
+        self.assertEqual(self.search("vitamin"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.bulk_create([
+                Product(name=f"Vitamin C {i}", category="Supplements", unit_price=Decimal("1.00")) for i in range(30)
+            ])
+            Product.objects.create(name="Vitamin D", category="Supplements", unit_price=Decimal("1.00"))
+        self.assertEqual(len(self.search("vitamin")), 20)
+
+        # Served from the rebuilt in-process index
+        with self.assertNumQueries(2):
+            self.assertEqual(self.search("vitamin d")[0]["name"], "Vitamin D")
+
+    def test_only_name_and_brand_edits_rebuild_the_index(self):
+        self.search("amox")
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(pk=self.stocked.pk)
+            product.unit_price = Decimal("3.50")
+            product.save()
+            ProductCode.objects.create(code="6001234567890", product=product)
+        with self.assertNumQueries(2):
+            self.search("amox")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.brand = "Beecham"
+            product.save()
+        self.assertEqual([r["id"] for r in self.search("beecham")], [self.stocked.id])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get('/api/v1/products/search/').status_code, 400)
+
+
+class CustomerSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.ceo)
+        self.kofi = Customer.objects.create(first_name="Kofi", last_name="Mensah", phone_number="0244123456")
+        self.ama = Customer.objects.create(first_name="Ama", last_name="Owusu", phone_number="0277000000")
+        product = Product.objects.create(name="Ibuprofen", category="Drugs", unit_price=Decimal("1.00"))
+        for customer in (self.kofi, self.ama):
+            sale = Sale.objects.create(branch=self.branch, customer=customer, payment_method='CASH', total_amount=Decimal("1.00"))
+            SaleItem.objects.create(sale=sale, product=product, quantity=1, price_at_sale=Decimal("1.00"))
+
+    def test_search_by_name_or_phone(self):
+        res = self.client.get('/api/v1/customers/search/', {"q": "kofi mensa"})
+        self.assertEqual([c["id"] for c in res.data["results"]], [self.kofi.id])
+        res = self.client.get('/api/v1/customers/search/', {"q": "0277"})
+        self.assertEqual([c["id"] for c in res.data["results"]], [self.ama.id])
+
+    def test_sales_table_filters_by_customer_and_product_name(self):
+        res = self.client.get('/api/v1/dashboard/sales-table/', {"customerName": "owusu"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([sale["customer"] for sale in res.data], [self.ama.id])
+        res = self.client.get('/api/v1/dashboard/sales-table/', {"productName": "ibuprofen"})
+        self.assertEqual(len(res.data), 2)
@@ -0,0 +1,167 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+from accounts.models import User
+from inventory import ledger
+from inventory.models import Inventory, InventoryVersion, StockSnapshot
+from inventory.receiving import receive_lines
+from products.models import Product
+from sales.checkout import checkout_items
+from sales.models import Sale
+from sites.models import Site
+from rest_framework import serializers
+
+THREADS = 8
+ATTEMPTS_PER_THREAD = 25
+INITIAL_STOCK = 60
+
+
+class ConcurrentStockTests(TransactionTestCase):
+    """
+    Hammers one inventory row from many threads at once. Runs against
+    whichever database is configured (Postgres in docker-compose, SQLite
+    locally); the only acceptable outcome is that exactly the available
+    stock is sold.
+    """
+
+    def setUp(self):
+        self.branch = Site.objects.create(name="Branch")
+        self.product = Product.objects.create(name="Paracetamol", category="Drugs", unit_price=Decimal("1.00"))
+        self.inventory = Inventory.objects.create(product=self.product, branch=self.branch, quantity=INITIAL_STOCK)
+
+    def run_threads(self, attempt):
+        successes = []
+        lock = threading.Lock()
+        start = threading.Barrier(THREADS)
+
+        def worker():
+            try:
+                start.wait()
+                for _ in range(ATTEMPTS_PER_THREAD):
+                    while True:
+                        try:
+                            ok = attempt()
+                            break
+                        except OperationalError:
+                            # SQLite reports lock contention instead of waiting
+                            time.sleep(0.001)
+                    if ok:
+                        with lock:
+                            successes.append(1)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return len(successes)
+
+    def test_reserve_never_oversells(self):
+        sold = self.run_threads(lambda: Inventory.objects.reserve({self.inventory.id: 1}))
+
+        self.inventory.refresh_from_db()
+        self.assertEqual(sold, INITIAL_STOCK)
+        self.assertEqual(self.inventory.quantity, 0)
+
+    def test_adjust_quantity_never_goes_negative(self):
+        def attempt():
+            return Inventory.objects.get(pk=self.inventory.pk).adjust_quantity(-1)
+
+        sold = self.run_threads(attempt)
+
+        self.inventory.refresh_from_db()
+        self.assertEqual(sold, INITIAL_STOCK)
+        self.assertEqual(self.inventory.quantity, 0)
+
+    def test_concurrent_deliveries_of_a_new_batch_all_count(self):
+        warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        user = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=warehouse,
+        )
+
+        def attempt():
+            with transaction.atomic():
+                receive_lines(warehouse, [{'product': self.product, 'quantity': 1, 'batch_number': "NEW"}], user)
+            return True
+
+        received = self.run_threads(attempt)
+
+        batch = Inventory.objects.get(branch=warehouse, batch_number="NEW")
+        self.assertEqual(batch.quantity, received)
+        versions = list(InventoryVersion.objects.filter(inventory=batch).order_by('new_quantity').values_list('previous_quantity', 'new_quantity'))
+        self.assertEqual(versions, [(n, n + 1) for n in range(received)])
+
+    def test_snapshot_waits_for_a_batch_being_received(self):
+        user = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.branch,
+        )
+        received, release = threading.Event(), threading.Event()
+
+        def deliver():
+            try:
+                with transaction.atomic():
+                    receive_lines(self.branch, [{'product': self.product, 'quantity': 7, 'batch_number': "NEW"}], user)
+                    received.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        def take_snapshot():
+            try:
+                received.wait(5)
+                while True:
+                    try:
+                        return ledger.snapshot(self.branch.id)
+                    except OperationalError:
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=deliver), threading.Thread(target=take_snapshot)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)  # Let the snapshot block behind the open delivery
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(
+            dict(StockSnapshot.objects.values_list('inventory__batch_number', 'quantity')),
+            {self.inventory.batch_number: INITIAL_STOCK, "NEW": 7},
+        )
+        live = dict(Inventory.objects.values_list('id', 'quantity'))
+        self.assertEqual(ledger.stock_at(self.branch.id, timezone.now())[0], live)
+
+    def test_adjust_quantity_stamps_the_row(self):
+        long_ago = timezone.now() - timedelta(days=30)
+        Inventory.objects.filter(pk=self.inventory.pk).update(last_checked=long_ago, updated_at=long_ago)
+        self.assertTrue(self.inventory.adjust_quantity(-1))
+
+        stored = Inventory.objects.get(pk=self.inventory.pk)
+        self.assertGreater(stored.last_checked, long_ago)
+        self.assertEqual(stored.last_checked, stored.updated_at)
+
+    def test_concurrent_checkouts_never_oversell(self):
+        def attempt():
+            try:
+                with transaction.atomic():
+                    sale = Sale.objects.create(branch=self.branch, payment_method='CASH', total_amount=Decimal("1.00"))
+                    checkout_items(sale, [{'product': self.product, 'quantity': 1, 'price_at_sale': Decimal("1.00")}])
+                return True
+            except serializers.ValidationError:
+                return False
+
+        sold = self.run_threads(attempt)
+
+        self.inventory.refresh_from_db()
+        self.assertEqual(sold, INITIAL_STOCK)
+        self.assertEqual(self.inventory.quantity, 0)
+        self.assertEqual(Sale.objects.count(), INITIAL_STOCK)
@@ -0,0 +1,80 @@
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import Inventory, StockLedgerEntry, StockSnapshot
+from products.models import Product
+from sites.models import Site
+
+
+def day(d, hour=0):
+    return timezone.make_aware(datetime(2025, 1, d, hour))
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Osu")
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+        self.batch = Inventory.objects.create(product=self.product, branch=self.branch, quantity=50, threshold_quantity=0)
+
+    def sell(self, quantity):
+        res = self.client.post('/api/v1/sales/', {
+            "branch": self.branch.id, "payment_method": "CASH", "total_amount": "3.00",
+            "items": [{"product": self.product.id, "quantity": quantity, "price_at_sale": "3.00"}],
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+
+    def stock_at(self, at):
+        res = self.client.get(f'/api/v1/sites/{self.branch.id}/stock-at/', {"at": at})
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def test_every_write_path_appends_to_the_ledger(self):
+        self.sell(5)
+        self.batch.refresh_from_db()
+        self.batch.adjust_quantity(8)
+        self.batch.quantity = 40
+        self.batch.save()
+        self.batch.save(update_fields=['threshold_quantity'])
+
+        self.assertEqual(list(StockLedgerEntry.objects.order_by('pk').values_list('delta', flat=True)), [50, -5, 8, -13])
+        self.assertIsNotNone(StockLedgerEntry.objects.get(delta=-5).movement)
+
+    def test_point_in_time_reads_the_nearest_checkpoint(self):
+        StockLedgerEntry.objects.update(created_at=day(1))
+        out = StringIO()
+        call_command('snapshot_stock', stdout=out)
+        self.assertIn("Snapshotted 1 branches: 1 batches.", out.getvalue())
+        StockSnapshot.objects.update(taken_at=day(2))
+
+        self.sell(5)
+        StockLedgerEntry.objects.filter(delta=-5).update(created_at=day(3))
+        self.batch.refresh_from_db()
+        self.batch.adjust_quantity(10)
+
+        with self.assertNumQueries(4):
+            data = self.stock_at("2025-01-03")
+        self.assertEqual((data["checkpoint"], data["total_quantity"], data["total_value"]), (day(2), 45, Decimal("135.00")))
+        self.assertEqual(self.stock_at("2025-01-02T12:00:00")["total_quantity"], 50)
+        self.assertEqual(self.client.get(f'/api/v1/sites/{self.branch.id}/stock-at/').data["total_quantity"], 55)
+
+        # Before the first checkpoint the live quantity is walked back
+        data = self.stock_at("2025-01-01T12:00:00")
+        self.assertEqual((data["checkpoint"], data["total_quantity"]), (None, 50))
+        self.assertEqual(self.stock_at("2024-12-31")["items"], [])
+
+    def test_rejects_bad_dates_and_other_branches(self):
+        res = self.client.get(f'/api/v1/sites/{self.branch.id}/stock-at/', {"at": "yesterday"})
+        self.assertEqual(res.status_code, 400)
+        other = Site.objects.create(name="Legon")
+        self.assertEqual(self.client.get(f'/api/v1/sites/{other.id}/stock-at/').status_code, 404)
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import Inventory, ProductStockSummary
+from products.models import Product
+from sites.models import Site
+
+
+@override_settings(STOCK_EXPIRING_SOON_DAYS=30)
+class ProductStockSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.branch = Site.objects.create(name="Osu")
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.warehouse,
+        )
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.branch,
+        )
+        self.product = Product.objects.create(name="Amoxicillin", category="Drugs", unit_price=Decimal("3.00"))
+
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_batch(self.warehouse, "W1", today + timedelta(days=200), 40)
+            self.add_batch(self.warehouse, "W2", today + timedelta(days=10), 5)
+            self.add_batch(self.branch, "B1", today + timedelta(days=100), 12)
+            self.add_batch(self.branch, "B0", today - timedelta(days=3), 2)
+
+    def add_batch(self, branch, batch_number, expiration_date, quantity):
+        return Inventory.objects.create(
+            product=self.product, branch=branch, batch_number=batch_number,
+            expiration_date=expiration_date, quantity=quantity,
+        )
+
+    def summary(self):
+        return ProductStockSummary.objects.get(product=self.product)
+
+    def test_follows_every_inventory_write(self):
+        summary = self.summary()
+        self.assertEqual((summary.total_quantity, summary.expiring_soon_quantity, summary.expired_quantity), (59, 5, 2))
+        self.assertEqual(summary.branches[str(self.branch.id)], {'quantity': 14, 'expiring_soon': 0, 'expired': 2})
+
+        # A sale takes the soonest unexpired batch at the branch
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post('/api/v1/sales/', {
+                "branch": self.branch.id, "payment_method": "CASH", "total_amount": "12.00",
+                "items": [{"product": self.product.id, "quantity": 4, "price_at_sale": "3.00"}],
+            }, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.summary().branches[str(self.branch.id)]['quantity'], 10)
+
+        # Dispatch then receipt moves stock between branches without changing the total
+        self.client.force_authenticate(user=self.ceo)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post('/api/v1/warehouse/dispatch/', {
+                "product_id": self.product.id, "quantity": 8, "destination_id": self.branch.id,
+            }, format='json')
+        self.assertEqual(self.summary().total_quantity, 47)
+
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/v1/warehouse/receive-transfer/{res.data["transfer_id"]}/')
+        summary = self.summary()
+        self.assertEqual(summary.total_quantity, 55)
+        self.assertEqual(summary.branches[str(self.branch.id)]['quantity'], 18)
+        self.assertEqual(summary.branches[str(self.branch.id)]['expiring_soon'], 5)
+
+    def test_endpoint_is_ceo_only_and_refreshes_stale_expiry_buckets(self):
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get('/api/v1/stock-summary/').status_code, 403)
+
+        # Computed last week: W2 was not yet inside the window
+        ProductStockSummary.objects.update(as_of=timezone.localdate() - timedelta(days=7), expiring_soon_quantity=0)
+
+        self.client.force_authenticate(user=self.ceo)
+        res = self.client.get('/api/v1/stock-summary/')
+        self.assertEqual(res.status_code, 200)
+        row = res.data['results'][0]
+        self.assertEqual((row['product_name'], row['total_quantity'], row['expiring_soon_quantity']), ("Amoxicillin", 59, 5))
+        self.assertEqual(
+            [(branch['branch_name'], branch['quantity']) for branch in row['branches']], [("Warehouse", 45), ("Osu", 14)],
+        )
+
+        with self.assertNumQueries(2):  # Page, then site names
+            self.client.get('/api/v1/stock-summary/')
+        res = self.client.get(f'/api/v1/stock-summary/{self.product.id}/')
+        self.assertEqual(res.data['total_quantity'], 59)
+
+    def test_rebuild_command_reports_and_repairs_drift(self):
+        ProductStockSummary.objects.update(total_quantity=1)
+
+        out = StringIO()
+        call_command('rebuild_stock_summary', '--verify-only', stdout=out)
+        self.assertIn("1 stock summaries out of step with inventory.", out.getvalue())
+        self.assertEqual(self.summary().total_quantity, 1)
+
+        call_command('rebuild_stock_summary', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_stock_summary', '--verify-only', stdout=out)
+        self.assertIn("Stock summaries match the Inventory table.", out.getvalue())
+        self.assertEqual(self.summary().total_quantity, 59)
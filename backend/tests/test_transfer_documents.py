@@ -0,0 +1,117 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import User
+from inventory.models import Inventory, InventoryVersion, Notification, StockMovement, TransferDocument
+from products.models import Product
+from sites.models import Site
+
+
+class TransferDocumentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.warehouse = Site.objects.create(name="Warehouse", is_warehouse=True)
+        self.branch = Site.objects.create(name="Osu")
+        self.ceo = User.objects.create(
+            email="ceo@pharmacy.com", first_name="The", last_name="CEO",
+            phone_number="0200000000", role="CEO", branch=self.warehouse,
+        )
+        self.admin = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000001", role="Admin", branch=self.branch,
+        )
+        self.products = Product.objects.bulk_create([
+            Product(name=f"Product {i}", category="Drugs", unit_price=Decimal("1.00")) for i in range(40)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(product=product, branch=self.warehouse, batch_number=f"W{product.id}",
+                      expiration_date=date(2031, 1, 1), quantity=100, threshold_quantity=0)
+            for product in self.products
+        ])
+        # An older batch of the first product goes out first
+        self.early = Inventory.objects.create(
+            product=self.products[0], branch=self.warehouse, batch_number="EARLY",
+            expiration_date=date(2030, 1, 1), quantity=5, threshold_quantity=0,
+        )
+
+    def dispatch(self, lines, destination=None):
+        self.client.force_authenticate(user=self.ceo)
+        return self.client.post('/api/v1/transfer-documents/', {
+            "destination_id": (destination or self.branch).id,
+            "lines": [{"product_id": product.id, "quantity": quantity} for product, quantity in lines],
+        }, format='json')
+
+    def receive(self, document_id):
+        self.client.force_authenticate(user=self.admin)
+        return self.client.post(f'/api/v1/transfer-documents/{document_id}/receive/')
+
+    def test_dispatch_and_receive_a_document(self):
+        res = self.dispatch([(self.products[0], 8), (self.products[1], 3)])
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            [(a["batch_number"], a["quantity"]) for a in res.data["allocations"]],
+            [("EARLY", 5), (f"W{self.products[0].id}", 3), (f"W{self.products[1].id}", 3)],
+        )
+        self.assertEqual(Inventory.objects.get(pk=self.early.pk).quantity, 0)
+        self.assertEqual(list(Notification.objects.values_list('recipient', flat=True)), [self.admin.id])
+
+        document_id = res.data["document_id"]
+        res = self.receive(document_id)
+        self.assertEqual((res.status_code, res.data["batches"]), (200, 3))
+        self.assertEqual(
+            sorted(Inventory.objects.filter(branch=self.branch).values_list('batch_number', 'quantity', 'expiration_date')),
+            sorted([("EARLY", 5, date(2030, 1, 1)), (f"W{self.products[0].id}", 3, date(2031, 1, 1)),
+                    (f"W{self.products[1].id}", 3, date(2031, 1, 1))]),
+        )
+        self.assertEqual(
+            set(StockMovement.objects.filter(linked_document=document_id).values_list('branch', 'status')),
+            {(self.warehouse.id, 'CONFIRMED'), (self.branch.id, None)},
+        )
+        self.assertEqual(InventoryVersion.objects.count(), 6)
+        self.assertEqual(TransferDocument.objects.get().status, 'RECEIVED')
+
+        self.assertEqual(self.receive(document_id).status_code, 400)
+
+        res = self.client.get(f'/api/v1/transfer-documents/{document_id}/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([line["quantity"] for line in res.data["lines"]], [8, 3])
+
+    def test_short_document_writes_nothing(self):
+        res = self.dispatch([(self.products[0], 10), (self.products[1], 500)])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual((res.data["product_id"], res.data["available"]), (self.products[1].id, 100))
+        self.assertFalse(TransferDocument.objects.exists())
+        self.assertEqual(Inventory.objects.get(pk=self.early.pk).quantity, 5)
+
+    def test_cannot_dispatch_to_the_source_branch(self):
+        res = self.dispatch([(self.products[0], 1)], destination=self.warehouse)
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("destination_id", res.data)
+        self.assertFalse(TransferDocument.objects.exists())
+        self.assertEqual(Inventory.objects.get(pk=self.early.pk).quantity, 5)
+
+    def test_query_count_does_not_grow_with_the_document(self):
+        self.dispatch([(self.products[0], 1)])  # Warms the cached recipient directory
+        counts = []
+        for products in (self.products[1:5], self.products[1:40]):
+            with CaptureQueriesContext(connection) as dispatched:
+                res = self.dispatch([(product, 1) for product in products])
+            with CaptureQueriesContext(connection) as received:
+                self.receive(res.data["document_id"])
+            counts.append((len(dispatched.captured_queries), len(received.captured_queries)))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_only_the_destination_receives(self):
+        document_id = self.dispatch([(self.products[2], 1)]).data["document_id"]
+        other = User.objects.create(
+            email="admin@legon.com", first_name="Other", last_name="Admin",
+            phone_number="0200000002", role="Admin", branch=Site.objects.create(name="Legon"),
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.post(f'/api/v1/transfer-documents/{document_id}/receive/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/v1/transfer-documents/{document_id}/').status_code, 404)
@@ -0,0 +1,89 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import User
+from apis.utils import create_notification
+from apis.views import NotificationDetailAPIView
+from inventory import unread
+from inventory.models import Notification
+from sites.models import Site
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.branch = Site.objects.create(name="Branch")
+        self.user = User.objects.create(
+            email="admin@branch.com", first_name="Branch", last_name="Admin",
+            phone_number="0200000000", role="Admin", branch=self.branch,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def notify(self, n=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [create_notification(self.user, 'SYSTEM_ALERT', f"Alert {i}", "Check stock") for i in range(n)]
+
+    def call(self, method, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url)
+
+    def unread_count(self):
+        return self.client.get('/api/v1/notifications/unread-count/').data['unread_count']
+
+    def assertMatchesTable(self):
+        self.assertEqual(unread.get_count(self.user.id), unread.unread_queryset(self.user.id).count())
+
+    def test_count_is_a_single_cache_hit(self):
+        self.notify(3)
+        self.assertEqual(self.unread_count(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 3)
+
+    def test_every_write_path_adjusts_the_counter(self):
+        first, second, third, fourth = self.notify(4)
+        self.assertEqual(self.unread_count(), 4)
+
+        self.call('patch', f'/api/v1/notifications/{first.id}/mark-as-read/')
+        self.call('patch', f'/api/v1/notifications/{first.id}/mark-as-read/')  # Already read
+        self.assertEqual(self.unread_count(), 3)
+        self.assertMatchesTable()
+
+        self.call('patch', f'/api/v1/notifications/archive/{second.id}/')
+        self.assertEqual(self.unread_count(), 2)
+        self.assertMatchesTable()
+
+        self.call('delete', f'/api/v1/notifications/{third.id}/')
+        self.assertEqual(self.unread_count(), 1)
+
+        self.notify(2)
+        self.call('post', '/api/v1/notifications/mark-all-as-read/')
+        self.assertEqual(self.unread_count(), 0)
+        self.assertMatchesTable()
+
+        self.notify(2)
+        self.call('delete', '/api/v1/notifications/clear-all/')
+        self.assertEqual(self.unread_count(), 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_racing_requests_adjust_the_counter_once(self):
+        first, _ = self.notify(2)
+        self.assertEqual(self.unread_count(), 2)
+        loaded = Notification.objects.get(pk=first.pk)  # Both requests read the row before either deletes it
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationDetailAPIView().perform_destroy(loaded)
+            NotificationDetailAPIView().perform_destroy(loaded)
+        self.assertEqual(self.unread_count(), 1)
+        self.assertMatchesTable()
+
+    def test_rebuild_command_reconciles_drift(self):
+        self.notify(2)
+        self.assertEqual(self.unread_count(), 2)
+        Notification.objects.update(is_read=True)  # Behind the counter's back
+
+        out = StringIO()
+        call_command('rebuild_unread_counts', stdout=out)
+        self.assertIn("Rebuilt unread counters for 1 users, 1 were out of step.", out.getvalue())
+        self.assertEqual(self.unread_count(), 0)
@@ -1,20 +1,22 @@
 import React, { useState } from 'react';
 import {
   Dialog, DialogTitle, DialogContent, DialogActions,
-  Grid, FormControl, InputLabel, Select, MenuItem,
+  Grid,
   TextField, Button, CircularProgress, IconButton, Typography, Box, Tooltip
 } from '@mui/material';
 import { Close, TransferWithinAStation } from '@mui/icons-material';
 import axios from '../../utils/axiosInstance';
+import SearchPicker from '../SearchPicker';
 
 const TransferDialog = ({
   open, onClose, form, setForm,
-  branches, products,
+  branches,
   currentUser,
   setSnackbar,
   onSubmit
 }) => {
   const [loading, setLoading] = useState(false);
+  const [selectedProduct, setSelectedProduct] = useState(null);
 
   const handleChange = (e) => {
     const { name, value } = e.target;
@@ -43,15 +45,13 @@ const TransferDialog = ({
       const res = await axios.post('v1/stock-transfer/', payload);
       const transfer = res.data;
 
-      const productObj = products.find(p => p.id === product);
-
       // Notify sender
       try {
         await axios.post('v1/notifications/', {
           recipient: currentUser.id,
           notification_type: 'TRANSFER_REQUEST',
           title: `Transfer Request Sent`,
-          message: `You requested ${quantity}x ${productObj?.name}`,
+          message: `You requested ${quantity}x ${selectedProduct?.name}`,
           related_object_id: transfer.id
         });
       } catch (e) {
@@ -66,6 +66,7 @@ const TransferDialog = ({
 
       onClose();
       setForm({ product: '', quantity: '', to_branch: '', details: '' });
+      setSelectedProduct(null);
       onSubmit();
 
     } catch (err) {
@@ -111,19 +112,16 @@ const TransferDialog = ({
       <DialogContent dividers sx={{ p: 3 }}>
         <Grid container spacing={3}>
           <Grid item xs={12}>
-            <FormControl fullWidth>
-              <InputLabel>Product</InputLabel>
-              <Select
-                name="product"
-                value={form.product}
-                onChange={handleChange}
-                label="Product"
-              >
-                {products.map((p) => (
-                  <MenuItem key={p.id} value={p.id}>{p.name}</MenuItem>
-                ))}
-              </Select>
-            </FormControl>
+            <SearchPicker
+              url="v1/products/search/"
+              label="Product"
+              value={selectedProduct}
+              onChange={(p) => {
+                setSelectedProduct(p);
+                setForm(prev => ({ ...prev, product: p ? p.id : '' }));
+              }}
+              hint="Type a product name or brand"
+            />
           </Grid>
 
           <Grid item xs={12}>
@@ -0,0 +1,17 @@
+import React from 'react';
+import { Box, Button, CircularProgress } from '@mui/material';
+
+// "Load more" under a cursor-paginated list; hidden once the last page is in
+const LoadMoreButton = ({ hasMore, loading, onClick }) => {
+  if (!hasMore) return null;
+  return (
+    <Box display="flex" justifyContent="center" mt={2}>
+      <Button variant="outlined" onClick={onClick} disabled={loading}
+        startIcon={loading ? <CircularProgress size={16} /> : null}>
+        Load more
+      </Button>
+    </Box>
+  );
+};
+
+export default LoadMoreButton;
@@ -0,0 +1,37 @@
+import React, { useState } from 'react';
+import { Autocomplete, TextField } from '@mui/material';
+import { useSearch } from '../utils/pagination';
+
+// Picks one row from a `?q=` search endpoint (v1/products/search/,
+// v1/customers/search/) as the user types, instead of listing every row
+const SearchPicker = ({
+  url, label, value, onChange, params,
+  getOptionLabel = (option) => option.name || '',
+  renderOption,
+  hint = 'Start typing to search',
+  error,
+}) => {
+  const [query, setQuery] = useState('');
+  const { results, loading } = useSearch(url, query, params);
+
+  return (
+    <Autocomplete
+      value={value}
+      onChange={(_, option) => onChange(option)}
+      inputValue={query}
+      onInputChange={(_, text) => setQuery(text)}
+      options={results}
+      filterOptions={(options) => options} // Already ranked by the server
+      getOptionLabel={getOptionLabel}
+      isOptionEqualToValue={(option, selected) => option.id === selected.id}
+      loading={loading}
+      noOptionsText={query.trim() ? 'No matches' : hint}
+      renderOption={renderOption && (({ key, ...props }, option) => (
+        <li key={key} {...props}>{renderOption(option)}</li>
+      ))}
+      renderInput={(inputParams) => <TextField {...inputParams} label={label} error={error} />}
+    />
+  );
+};
+
+export default SearchPicker;
@@ -1,9 +1,12 @@
 // src/context/NotificationContext.jsx
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { fetchNotifications, getUnreadCount } from '../services/notifications';
+import { fetchNotifications, getUnreadCount, openNotificationStream } from '../services/notifications';
 
 const NotificationContext = createContext();
 
+// Only used while the push stream is unavailable
+const POLL_INTERVAL = 30000;
+
 export const NotificationProvider = ({ children }) => {
   const [unreadCount, setUnreadCount] = useState(0);
   const [notifications, setNotifications] = useState([]);
@@ -22,11 +25,56 @@ export const NotificationProvider = ({ children }) => {
   };
 
   useEffect(() => {
-    refreshNotifications();
-    
-    // Optional: Set up polling for new notifications
-    const interval = setInterval(refreshNotifications, 30000); // Every 30 seconds
-    return () => clearInterval(interval);
+    let stream = null;
+    let pollTimer = null;
+    let retryTimer = null;
+    let stopped = false;
+
+    const startPolling = () => {
+      if (!pollTimer) pollTimer = setInterval(refreshNotifications, POLL_INTERVAL);
+    };
+    const stopPolling = () => {
+      clearInterval(pollTimer);
+      pollTimer = null;
+    };
+
+    const connect = () => {
+      if (stopped) return;
+      stream = openNotificationStream();
+      if (!stream) {
+        startPolling();
+        return;
+      }
+
+      stream.addEventListener('open', stopPolling);
+      stream.addEventListener('notification', (event) => {
+        const notification = JSON.parse(event.data);
+        setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+      });
+      stream.addEventListener('unread', (event) => {
+        const { count, delta } = JSON.parse(event.data);
+        setUnreadCount(prev => (count !== undefined ? count : Math.max(0, prev + delta)));
+      });
+      stream.onerror = () => {
+        // Dropped connections reconnect on their own; a rejected one (expired
+        // token, or a server without the stream) is closed: poll, which also
+        // refreshes the token, and try the stream again later.
+        if (stream.readyState === EventSource.CLOSED) {
+          stream = null;
+          startPolling();
+          retryTimer = setTimeout(connect, POLL_INTERVAL);
+        }
+      };
+    };
+
+    refreshNotifications().then(connect);
+
+    return () => {
+      stopped = true;
+      stream?.close();
+      stopPolling();
+      clearTimeout(retryTimer);
+    };
   }, []);
 
   return (
@@ -40,4 +88,4 @@ export const NotificationProvider = ({ children }) => {
   );
 };
 
-export const useNotifications = () => useContext(NotificationContext);
\ No newline at end of file
+export const useNotifications = () => useContext(NotificationContext);
@@ -38,6 +38,8 @@ import {
   CheckCircle
 } from '@mui/icons-material';
 import axios from '../utils/axiosInstance';
+import { usePagedList } from '../utils/pagination';
+import LoadMoreButton from '../components/LoadMoreButton';
 import { styled } from '@mui/material/styles';
 import { motion } from 'framer-motion';
 
@@ -68,7 +70,6 @@ const Customer = () => {
     email: ''
   });
   const [loading, setLoading] = useState(false);
-  const [customers, setCustomers] = useState([]);
   const [showCustomers, setShowCustomers] = useState(false);
   const [snackbar, setSnackbar] = useState({
     open: false,
@@ -83,26 +84,20 @@ const Customer = () => {
     { value: 'Dr', label: 'Dr' }
   ];
 
-  useEffect(() => {
-    if (showCustomers) {
-      fetchCustomers();
-    }
-  }, [showCustomers]);
+  const {
+    items: customers, hasMore, loading: customersLoading, error: customersError, loadMore, reload: fetchCustomers,
+  } = usePagedList('v1/customers/', {}, showCustomers);
 
-  const fetchCustomers = async () => {
-    try {
-      const response = await axios.get('v1/customers/');
-      setCustomers(response.data);
-      console.log(response.data)
-    } catch (error) {
-      console.error('Error fetching customers:', error);
+  useEffect(() => {
+    if (customersError) {
+      console.error('Error fetching customers:', customersError);
       setSnackbar({
         open: true,
         message: 'Failed to fetch customers',
         severity: 'error'
       });
     }
-  };
+  }, [customersError]);
 
   const handleChange = (e) => {
     const { name, value } = e.target;
@@ -379,6 +374,9 @@ const Customer = () => {
               </TableBody>
             </Table>
           </TableContainer>
+          <Box pb={2}>
+            <LoadMoreButton hasMore={hasMore} loading={customersLoading} onClick={loadMore} />
+          </Box>
         </DialogContent>
         <DialogActions sx={{ bgcolor: 'background.default' }}>
           <Button 
@@ -5,31 +5,26 @@ import {
 } from '@mui/material';
 import { Add, Inventory2 } from '@mui/icons-material';
 import axios from '../utils/axiosInstance';
+import { usePagedList, useSearch } from '../utils/pagination';
+import LoadMoreButton from '../components/LoadMoreButton';
 import ProductTable from '../components/Product/ProductTable';
 import ProductFormDialog from '../components/Product/ProductFormDialog';
 import SnackbarAlert from '../components/Inventory/SnackbarAlert';
 import { motion } from 'framer-motion';
 
 const Product = () => {
-  const [products, setProducts] = useState([]);
-  const [loading, setLoading] = useState(false);
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' });
   const [dialogOpen, setDialogOpen] = useState(false);
   const [editProduct, setEditProduct] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [categoryFilter, setCategoryFilter] = useState('');
+  const { items: products, hasMore, loading, error, loadMore, reload: fetchProducts } = usePagedList('v1/products/');
+  // A search covers the whole catalog, not just the pages loaded so far
+  const { results: searchResults, loading: searchLoading } = useSearch('v1/products/search/', searchTerm);
 
-  const fetchProducts = async () => {
-    setLoading(true);
-    try {
-      const res = await axios.get('v1/products/');
-      setProducts(res.data);
-    } catch (err) {
-      setSnackbar({ open: true, message: 'Failed to fetch products', severity: 'error' });
-    } finally {
-      setLoading(false);
-    }
-  };
+  useEffect(() => {
+    if (error) setSnackbar({ open: true, message: 'Failed to fetch products', severity: 'error' });
+  }, [error]);
 
   const handleOpenCreate = () => {
     setEditProduct(null);
@@ -56,13 +51,9 @@ const Product = () => {
     }
   };
 
-  useEffect(() => {
-    fetchProducts();
-  }, []);
-
-  const filteredProducts = products.filter(p =>
-    (!searchTerm || p.name.toLowerCase().includes(searchTerm.toLowerCase()) || p.brand?.toLowerCase().includes(searchTerm.toLowerCase())) &&
-    (!categoryFilter || p.category === categoryFilter)
+  const isSearch = searchTerm.trim() !== '';
+  const filteredProducts = (isSearch ? searchResults : products).filter(p =>
+    !categoryFilter || p.category === categoryFilter
   );
 
   return (
@@ -108,10 +99,13 @@ const Product = () => {
         </FormControl>
       </Stack>
 
-      {loading ? (
+      {(isSearch ? searchLoading : loading && products.length === 0) ? (
         <Box display="flex" justifyContent="center" mt={5}><CircularProgress /></Box>
       ) : (
-        <ProductTable products={filteredProducts} onEdit={handleEdit} onDelete={handleDelete} />
+        <>
+          <ProductTable products={filteredProducts} onEdit={handleEdit} onDelete={handleDelete} />
+          {!isSearch && <LoadMoreButton hasMore={hasMore} loading={loading} onClick={loadMore} />}
+        </>
       )}
 
       <ProductFormDialog
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from '../utils/axiosInstance';
+import SearchPicker from '../components/SearchPicker';
 import { motion } from 'framer-motion';
 import { styled } from '@mui/material/styles';
 
@@ -12,10 +13,6 @@ import {
   Avatar,
   Divider,
   Grid,
-  FormControl,
-  InputLabel,
-  Select,
-  MenuItem,
   TextField,
   Button,
   IconButton,
@@ -116,11 +113,10 @@ const Purchase = () => {
   const [customer, setCustomer] = useState('');
   const [selectedProducts, setSelectedProducts] = useState([]);
   const [currentProduct, setCurrentProduct] = useState('');
+  const [currentProductDetails, setCurrentProductDetails] = useState(null);
   const [currentQuantity, setCurrentQuantity] = useState(1);
   const [paymentMethod, setPaymentMethod] = useState('CASH');
   const [totalAmount, setTotalAmount] = useState(0);
-  const [customers, setCustomers] = useState([]);
-  const [products, setProducts] = useState([]);
   const [isProcessing, setIsProcessing] = useState(false);
   const [transactionSubmitted, setTransactionSubmitted] = useState(false);
   const [transactionId, setTransactionId] = useState(null);
@@ -139,31 +135,6 @@ const Purchase = () => {
   });
   const navigate = useNavigate();
 
-  useEffect(() => {
-    // Fetch customers and products
-    axios.get('v1/customers/')
-      .then(response => {
-        // Ensure response.data is an array
-        const customersData = Array.isArray(response.data) ? response.data : [];
-        setCustomers(customersData);
-      })
-      .catch(error => {
-        console.error("Error fetching customers:", error);
-        setCustomers([]); // Set to empty array on error
-      });
-  
-    axios.get('v1/products/')
-      .then(response => {
-        // Ensure products data is an array
-        const productsData = Array.isArray(response.data) ? response.data : [];
-        setProducts(productsData);
-      })
-      .catch(error => {
-        console.error("Error fetching products:", error);
-        setProducts([]); // Set to empty array on error
-      });
-  }, []);
-
   useEffect(() => {
     // Calculate total amount whenever selectedProducts changes
     const newTotal = selectedProducts.reduce((sum, item) => {
@@ -184,15 +155,14 @@ const Purchase = () => {
     setIsFormValid(Object.keys(newErrors).length === 0);
   }, [customer, selectedProducts, paymentMethod, totalAmount]);
 
-  const handleCustomerChange = (e) => {
-    const customerId = e.target.value;
-    setCustomer(customerId);
-    const cust = Array.isArray(customers) ? customers.find(c => c.id === customerId) : null;
+  const handleCustomerChange = (cust) => {
+    setCustomer(cust ? cust.id : '');
     setSelectedCustomer(cust || null);
   };
 
-  const handleProductChange = (e) => {
-    setCurrentProduct(e.target.value);
+  const handleProductChange = (prod) => {
+    setCurrentProduct(prod ? prod.id : '');
+    setCurrentProductDetails(prod || null);
   };
 
   const handleQuantityChange = (e) => {
@@ -202,7 +172,7 @@ const Purchase = () => {
   const handleAddProduct = () => {
     if (!currentProduct || currentQuantity <= 0) return;
 
-    const productToAdd = products.find(p => p.id === currentProduct);
+    const productToAdd = currentProductDetails;
     if (!productToAdd) return;
 
     // Check if product already exists in the list
@@ -230,6 +200,7 @@ const Purchase = () => {
 
     // Reset current selection
     setCurrentProduct('');
+    setCurrentProductDetails(null);
     setCurrentQuantity(1);
   };
 
@@ -287,6 +258,7 @@ const Purchase = () => {
     setCustomer('');
     setSelectedProducts([]);
     setCurrentProduct('');
+    setCurrentProductDetails(null);
     setCurrentQuantity(1);
     setPaymentMethod('CASH');
     setTotalAmount(0);
@@ -382,36 +354,24 @@ const Purchase = () => {
                       <Person sx={{ verticalAlign: 'middle', mr: 1, color: '#5564EE' }} />
                       Customer Information
                     </Typography>
-                    <FormControl fullWidth error={!!errors.customer}>
-  <InputLabel>Select Customer</InputLabel>
-  <Select 
-    value={customer} 
-    onChange={handleCustomerChange}
-    MenuProps={{
-      PaperProps: {
-        sx: {
-          maxHeight: 300
-        }
-      }
-    }}
-  >
-    {Array.isArray(customers) && customers.length > 0 ? (
-      customers.map((cust) => (
-        <MenuItem key={cust.id} value={cust.id}>
-          <Box display="flex" alignItems="center">
-            <Avatar sx={{ width: 24, height: 24, mr: 2, fontSize: '0.8rem', bgcolor: '#5564EE' }}>
-              {cust.name?.charAt(0) || 'C'}
-            </Avatar>
-            {cust.name || 'Unknown Customer'}
-          </Box>
-        </MenuItem>
-      ))
-    ) : (
-      <MenuItem disabled>No customers available</MenuItem>
-    )}
-  </Select>
+                    <SearchPicker
+  url="v1/customers/search/"
+  label="Select Customer"
+  value={selectedCustomer}
+  onChange={handleCustomerChange}
+  getOptionLabel={(cust) => cust.name || 'Unknown Customer'}
+  hint="Type a name or phone number"
+  error={!!errors.customer}
+  renderOption={(cust) => (
+    <Box display="flex" alignItems="center">
+      <Avatar sx={{ width: 24, height: 24, mr: 2, fontSize: '0.8rem', bgcolor: '#5564EE' }}>
+        {cust.name?.charAt(0) || 'C'}
+      </Avatar>
+      {cust.name || 'Unknown Customer'}
+    </Box>
+  )}
+/>
   {errors.customer && <Typography color="error" variant="caption">{errors.customer}</Typography>}
-</FormControl>
                   </Box>
 
                   <Box mb={3}>
@@ -422,27 +382,21 @@ const Purchase = () => {
                     
                     <Grid container spacing={2} alignItems="flex-end">
                       <Grid item xs={12} sm={5}>
-                      <FormControl fullWidth error={!!errors.products}>
-  <InputLabel>Select Product</InputLabel>
-  <Select 
-    value={currentProduct} 
-    onChange={handleProductChange}
-    label="Select Product"
-  >
-    {Array.isArray(products) && products.length > 0 ? (
-      products.map((prod) => (
-        <MenuItem key={prod.id} value={prod.id}>
-          <Box display="flex" justifyContent="space-between" width="100%">
-            <span>{prod.name || 'N/A'}</span>
-            <span>GHC {Number(prod.unit_price || 0).toFixed(2)}</span>
-          </Box>
-        </MenuItem>
-      ))
-    ) : (
-      <MenuItem disabled>No products available</MenuItem>
-    )}
-  </Select>
-</FormControl>
+                      <SearchPicker
+  url="v1/products/search/"
+  label="Select Product"
+  value={currentProductDetails}
+  onChange={handleProductChange}
+  getOptionLabel={(prod) => prod.name || 'N/A'}
+  hint="Type a product name or brand"
+  error={!!errors.products}
+  renderOption={(prod) => (
+    <Box display="flex" justifyContent="space-between" width="100%">
+      <span>{prod.name || 'N/A'}</span>
+      <span>GHC {Number(prod.unit_price || 0).toFixed(2)}</span>
+    </Box>
+  )}
+/>
                       </Grid>
                       <Grid item xs={12} sm={3}>
                         <TextField
@@ -1,5 +1,5 @@
 // pages/Inventory.jsx
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import {
   Box, CircularProgress, Tabs, Tab, Button, Stack, Dialog, DialogTitle, DialogContent,
   IconButton, Typography, DialogActions, Tooltip, FormControl, InputLabel, Select, MenuItem
@@ -11,6 +11,8 @@ import TransferDialog from '../components/Inventory/TransferDialog';
 import IncomingTransfers from '../components/Inventory/IncomingTransfers';
 import SnackbarAlert from '../components/Inventory/SnackbarAlert';
 import axios from '../utils/axiosInstance';
+import { usePagedList } from '../utils/pagination';
+import LoadMoreButton from '../components/LoadMoreButton';
 import { createNotification } from '../services/notifications';
 import {
   TransferWithinAStation, LocalShipping, Close,
@@ -21,11 +23,12 @@ import relativeTime from 'dayjs/plugin/relativeTime';
 dayjs.extend(relativeTime);
 
 const Inventory = () => {
-  const [inventory, setInventory] = useState([]);
-  const [stockMovements, setStockMovements] = useState([]);
-  const [transfers, setTransfers] = useState([]);
-  const [notifications, setNotifications] = useState([]);
-  const [loading, setLoading] = useState(false);
+  const inventoryList = usePagedList('v1/inventory/');
+  const movementList = usePagedList('v1/stock-movement/');
+  const notificationList = usePagedList('v1/notifications/');
+  const inventory = inventoryList.items;
+  const notifications = notificationList.items.filter(n => n.notification_type !== 'TRANSFER_APPROVAL');
+  const loading = [inventoryList, movementList, notificationList].some(list => list.loading && list.items.length === 0);
   const [transferDialogOpen, setTransferDialogOpen] = useState(false);
   const [dispatchDialogOpen, setDispatchDialogOpen] = useState(false);
   const [confirmDialogOpen, setConfirmDialogOpen] = useState(false);
@@ -33,10 +36,10 @@ const Inventory = () => {
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' });
   const [transferForm, setTransferForm] = useState({ product: '', quantity: '', details: '' });
   const [branches, setBranches] = useState([]);
-  const [products, setProducts] = useState([]);
   const [currentUser, setCurrentUser] = useState(null);
   const [activeTab, setActiveTab] = useState(() => parseInt(localStorage.getItem('activeTab')) || 0);
   const [branchFilter, setBranchFilter] = useState('warehouse');
+  const alerted = useRef(new Set()); // Rows already checked, so loading more pages does not re-alert them
 
   const isCEO = currentUser?.role === 'CEO';
   const isViewOnlyMode = isCEO && branchFilter !== 'warehouse';
@@ -64,9 +67,7 @@ const Inventory = () => {
   );
 
   useEffect(() => {
-    fetchData(); 
-    fetchBranches(); 
-    fetchProducts();
+    fetchBranches();
   }, []);
 
   useEffect(() => {
@@ -81,25 +82,16 @@ const Inventory = () => {
     if (inventory.length > 0) checkLowStock();
   }, [inventory]);
 
-  const fetchData = async () => {
-    setLoading(true);
-    try {
-      const [inventoryRes, movementsRes, transfersRes, notificationsRes] = await Promise.all([
-        axios.get('v1/inventory/'),
-        axios.get('v1/stock-movement/'),
-        axios.get('v1/stock-transfer/'),
-        axios.get('v1/notifications/')
-      ]);
-
-      setInventory(inventoryRes.data);
-      setStockMovements(movementsRes.data);
-      setTransfers(transfersRes.data);
-      setNotifications(notificationsRes.data.filter(n => n.notification_type !== 'TRANSFER_APPROVAL'));
-    } catch (error) {
+  useEffect(() => {
+    if (inventoryList.error || movementList.error || notificationList.error) {
       setSnackbar({ open: true, message: 'Failed to fetch data', severity: 'error' });
-    } finally {
-      setLoading(false);
     }
+  }, [inventoryList.error, movementList.error, notificationList.error]);
+
+  const fetchData = () => {
+    inventoryList.reload();
+    movementList.reload();
+    notificationList.reload();
   };
 
   const fetchBranches = async () => {
@@ -109,15 +101,10 @@ const Inventory = () => {
     } catch (e) { console.error(e); }
   };
 
-  const fetchProducts = async () => {
-    try {
-      const res = await axios.get('v1/products/');
-      setProducts(res.data);
-    } catch (e) { console.error(e); }
-  };
-
   const checkLowStock = () => {
     inventory.forEach(item => {
+      if (alerted.current.has(item.id)) return;
+      alerted.current.add(item.id);
       if (item.quantity <= item.threshold_quantity && item.quantity > 0) {
         createNotification({
           recipient: currentUser.id,
@@ -204,12 +191,14 @@ const Inventory = () => {
             <>
               {isViewOnlyMode && <ViewOnlyBanner tabName="Inventory" />}
               <InventoryTable inventory={filteredInventory} rowsPerPage={5} />
+              <LoadMoreButton hasMore={inventoryList.hasMore} loading={inventoryList.loading} onClick={inventoryList.loadMore} />
             </>
           )}
           {activeTab === 1 && (
             <>
               {isViewOnlyMode && <ViewOnlyBanner tabName="Movement History" />}
-              <StockMovements movements={stockMovements} rowsPerPage={5} />
+              <StockMovements movements={movementList.items} rowsPerPage={5} />
+              <LoadMoreButton hasMore={movementList.hasMore} loading={movementList.loading} onClick={movementList.loadMore} />
             </>
           )}
           {activeTab === 2 && (
@@ -217,11 +206,12 @@ const Inventory = () => {
               {isViewOnlyMode && <ViewOnlyBanner tabName="Notifications" />}
               <NotificationList
                 notifications={notifications}
-                setNotifications={setNotifications}
+                setNotifications={notificationList.setItems}
                 enableDelete
                 enablePagination
                 rowsPerPage={5}
               />
+              <LoadMoreButton hasMore={notificationList.hasMore} loading={notificationList.loading} onClick={notificationList.loadMore} />
             </>
           )}
         </>
@@ -233,7 +223,6 @@ const Inventory = () => {
         form={transferForm}
         setForm={setTransferForm}
         branches={branches}
-        products={products}
         currentUser={currentUser}
         setSnackbar={setSnackbar}
         onSubmit={fetchData}
@@ -39,11 +39,12 @@ import { DatePicker } from '@mui/x-date-pickers/DatePicker';
 import jsPDF from 'jspdf';
 import 'jspdf-autotable';
 import axios from '../utils/axiosInstance';
+import { usePagedList } from '../utils/pagination';
+import LoadMoreButton from '../components/LoadMoreButton';
+import SearchPicker from '../components/SearchPicker';
 
 const TransactionHistory = () => {
   const [sales, setSales] = useState([]);
-  const [allSales, setAllSales] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [page, setPage] = useState(1);
   const [perPage] = useState(10);
   const [totalPages, setTotalPages] = useState(1);
@@ -53,79 +54,53 @@ const TransactionHistory = () => {
     startDate: null,
     endDate: null,
     paymentMethod: '',
-    customer: '',
-    product: '',
+    customer: null,
+    product: null,
     searchQuery: '',
   });
-  const [customers, setCustomers] = useState([]);
-  const [products, setProducts] = useState([]);
   const [currentUser, setCurrentUser] = useState(null);
   const [branch, setBranch] = useState('');
 
-  // Fetch initial data with error handling
-  const fetchInitialData = async () => {
-    try {
-      setLoading(true);
-      
-      // Get current user and branch info
-      const userRes = await axios.get('v1/user/me/').catch(err => {
-        throw new Error('Failed to fetch user data');
-      });
-      setCurrentUser(userRes.data);
-      setBranch(userRes.data.branch?.name || 'Head Office');
-
-      // Fetch customers, products, and sales
-      const [customersRes, productsRes, salesRes] = await Promise.all([
-        axios.get('v1/customers/').catch(err => {
-          console.error("Error fetching customers:", err);
-          return { data: [] };
-        }),
-        axios.get('v1/products/').catch(err => {
-          console.error("Error fetching products:", err);
-          return { data: [] };
-        }),
-        axios.get('v1/sales/').catch(err => {
-          console.error("Error fetching sales:", err);
-          return { data: [] };
-        })
-      ]);
-      
-      setCustomers(customersRes.data || []);
-      setProducts(productsRes.data || []);
-      
-      // Enhance sales data
-      const salesData = salesRes.data.results || salesRes.data || [];
-      const enhancedSales = salesData.map((sale, index) => ({
-        ...sale,
-        frontendId: index + 1,
-        customerName: customersRes.data?.find(c => c.id === sale.customer)?.name || 'N/A',
-        productNames: sale.items?.map(item => item.product_name).join(', ') || 'N/A'
-      }));
+  // Sales arrive a page at a time; filters apply to every page loaded so far
+  const salesList = usePagedList('v1/sales/');
+  const loading = salesList.loading && salesList.items.length === 0;
+  const allSales = salesList.items.map((sale, index) => ({
+    ...sale,
+    frontendId: index + 1,
+    customerName: sale.customer_name || 'N/A',
+    productNames: sale.items?.map(item => item.product_name).join(', ') || 'N/A'
+  }));
 
-      setAllSales(enhancedSales);
-      setSales(enhancedSales);
-      setTotalPages(Math.ceil(enhancedSales.length / perPage) || 1);
+  useEffect(() => {
+    const fetchUser = async () => {
+      try {
+        const userRes = await axios.get('v1/user/me/');
+        setCurrentUser(userRes.data);
+        setBranch(userRes.data.branch?.name || 'Head Office');
+      } catch (error) {
+        console.error("Error fetching user data:", error);
+      }
+    };
+    fetchUser();
+  }, []);
 
-    } catch (error) {
-      console.error("Error fetching initial data:", error);
+  useEffect(() => {
+    if (salesList.error) {
+      console.error("Error fetching sales:", salesList.error);
       setSnackbar({ 
         open: true, 
         message: 'Error loading data. Please try again.', 
         severity: 'error' 
       });
-    } finally {
-      setLoading(false);
     }
-  };
+  }, [salesList.error]);
 
   useEffect(() => {
-    fetchInitialData();
-  }, []);
+    setPage(1);
+  }, [filter]);
 
   // Apply filters
   useEffect(() => {
-    if (allSales.length === 0) return;
-
     let filteredData = [...allSales];
 
     // Search query
@@ -149,13 +124,13 @@ const TransactionHistory = () => {
 
     if (filter.customer) {
       filteredData = filteredData.filter(sale => 
-        sale.customer === parseInt(filter.customer)
+        sale.customer === filter.customer.id
       );
     }
 
     if (filter.product) {
       filteredData = filteredData.filter(sale => 
-        sale.items?.some(item => item.product === parseInt(filter.product))
+        sale.items?.some(item => item.product === filter.product.id)
       );
     }
 
@@ -168,9 +143,8 @@ const TransactionHistory = () => {
     }
 
     setSales(filteredData);
-    setPage(1);
-    setTotalPages(Math.ceil(filteredData.length / perPage));
-  }, [filter, allSales]);
+    setTotalPages(Math.ceil(filteredData.length / perPage) || 1);
+  }, [filter, salesList.items]);
 
   // Get current page data
   const currentPageData = sales.slice(
@@ -278,38 +252,22 @@ const TransactionHistory = () => {
           </FormControl>
         </Grid>
         <Grid item xs={6} sm={4} md={2}>
-          <FormControl fullWidth>
-            <InputLabel>Customer</InputLabel>
-            <Select
-              value={filter.customer}
-              onChange={(e) => setFilter({ ...filter, customer: e.target.value })}
-              label="Customer"
-            >
-              <MenuItem value="">All Customers</MenuItem>
-              {customers.map(customer => (
-                <MenuItem key={customer.id} value={customer.id}>
-                  {customer.name}
-                </MenuItem>
-              ))}
-            </Select>
-          </FormControl>
+          <SearchPicker
+            url="v1/customers/search/"
+            label="Customer"
+            value={filter.customer}
+            onChange={(customer) => setFilter({ ...filter, customer })}
+            hint="All customers; type to pick one"
+          />
         </Grid>
         <Grid item xs={6} sm={4} md={2}>
-          <FormControl fullWidth>
-            <InputLabel>Product</InputLabel>
-            <Select
-              value={filter.product}
-              onChange={(e) => setFilter({ ...filter, product: e.target.value })}
-              label="Product"
-            >
-              <MenuItem value="">All Products</MenuItem>
-              {products.map(product => (
-                <MenuItem key={product.id} value={product.id}>
-                  {product.name}
-                </MenuItem>
-              ))}
-            </Select>
-          </FormControl>
+          <SearchPicker
+            url="v1/products/search/"
+            label="Product"
+            value={filter.product}
+            onChange={(product) => setFilter({ ...filter, product })}
+            hint="All products; type to pick one"
+          />
         </Grid>
 
         {/* Search and Action Buttons */}
@@ -336,8 +294,8 @@ const TransactionHistory = () => {
                 startDate: null,
                 endDate: null,
                 paymentMethod: '',
-                customer: '',
-                product: '',
+                customer: null,
+                product: null,
                 searchQuery: '',
               })}
               fullWidth
@@ -468,6 +426,7 @@ const TransactionHistory = () => {
             onChange={(e, value) => setPage(value)}
             sx={{ mt: 3, display: 'flex', justifyContent: 'center' }}
           />
+          <LoadMoreButton hasMore={salesList.hasMore} loading={salesList.loading} onClick={salesList.loadMore} />
         </>
       )}
 
@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { Box, Snackbar, Typography, Paper, Button, Skeleton } from '@mui/material';
 import axios from '../utils/axiosInstance';
+import { usePagedList } from '../utils/pagination';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 import InventoryTab from '../components/warehouse/InventoryTab';
 import InventoryFilters from '../components/warehouse/InventoryFilters';
@@ -21,9 +23,7 @@ const WarehouseDashboard = () => {
   const [requests, setRequests] = useState([]);
   const [processedRequests, setProcessedRequests] = useState([]);
   const [selectedRequest, setSelectedRequest] = useState(null);
-  const [inventory, setInventory] = useState([]);
   const [branches, setBranches] = useState([]);
-  const [movements, setMovements] = useState([]);
   const [rejectionReason, setRejectionReason] = useState('');
   const [statusFilter, setStatusFilter] = useState('ALL');
   const [receiveOpen, setReceiveOpen] = useState(false);
@@ -41,6 +41,9 @@ const WarehouseDashboard = () => {
   const [toDateReq, setToDateReq] = useState('');
   const [fromDateReq, setFromDateReq] = useState('');
   const { ConfirmDialog, confirm } = UseConfirm();
+  const inventoryList = usePagedList('v1/inventory/', { warehouse: true }, tab !== null);
+  const movementList = usePagedList('v1/stock-movement/', {}, tab !== null);
+  const requestList = usePagedList('v1/notifications/', { filter: 'warehouse' }, tab !== null);
 
   useEffect(() => {
     const saved = Number(localStorage.getItem('warehouseTab'));
@@ -48,86 +51,87 @@ const WarehouseDashboard = () => {
   }, []);
 
   useEffect(() => {
-    if (tab !== null) fetchData();
+    if (tab !== null) fetchBranches();
   }, [tab]);
 
+  useEffect(() => {
+    if (inventoryList.error || movementList.error || requestList.error) {
+      showSnackbar('Failed to fetch warehouse data', 'error');
+    }
+  }, [inventoryList.error, movementList.error, requestList.error]);
+
   const handleTabChange = (newTab) => {
     localStorage.setItem('warehouseTab', newTab);
     setTab(newTab);
   };
 
-  const fetchData = async () => {
-    try {
-      const [inventoryRes, movementRes, allReqRes, branchesRes] = await Promise.all([
-        axios.get('v1/inventory/?warehouse=true'),
-        axios.get('v1/stock-movement/'),
-        axios.get('v1/notifications/?filter=warehouse'),
-        axios.get('v1/sites/')
-      ]);
-
-      const allNotifications = allReqRes.data;
-      
-      const isBranchRequest = (n) => {
-        const transfer = n.related_transfer;
-        if (!transfer) return false;
-      
-        const source = transfer.source_site || transfer.metadata?.source_site;
-        const requested_by = transfer.metadata?.requested_by;
-      
-        if (!source || typeof source.is_warehouse !== 'boolean') {
-          if (requested_by) {
-            console.warn('⚠️ Missing source, but keeping request from:', requested_by);
-            return true; // Allow it if we have user
-          }
-          console.warn('❌ Discarding: no source, no requester');
-          return false;
-        }
-      
-        return source.is_warehouse === false;
-      };
-      
-      
-      
-
-      const pending = allNotifications
-        .filter(n => n.notification_type === 'TRANSFER_REQUEST' && !n.is_read && isBranchRequest(n))
-        .map(n => ({
-          ...n,
-          ...n.related_transfer,
-          metadata: n.related_transfer?.metadata || {},
-        }));
-
-      const processed = allNotifications
-        .filter(n => n.notification_type === 'TRANSFER_REQUEST' && n.is_read && isBranchRequest(n))
-        .map(n => ({
-          ...n,
-          ...n.related_transfer,
-          metadata: n.related_transfer?.metadata || {},
-        }));
-
-      const sortedInventory = inventoryRes.data.sort(
-        (a, b) => new Date(b.last_updated || b.updated_at) - new Date(a.last_updated || a.updated_at)
-      );
-
-      const sortedMovements = movementRes.data.sort(
-        (a, b) => new Date(b.timestamp || b.created_at) - new Date(a.timestamp || a.created_at)
-      );
+  const fetchData = () => {
+    inventoryList.reload();
+    movementList.reload();
+    requestList.reload();
+    fetchBranches();
+  };
 
-      setInventory(sortedInventory);
-      setMovements(sortedMovements);
-      setRequests(pending);
-      setProcessedRequests(
-        processed.map(r => ({
-          ...r,
-          status: r.status || r.transfer_status || r.metadata?.status || 'UNKNOWN'
-        }))
-      );
+  const fetchBranches = async () => {
+    try {
+      const branchesRes = await axios.get('v1/sites/');
       setBranches(branchesRes.data.filter(site => !site.is_warehouse));
     } catch (err) {
       showSnackbar('Failed to fetch warehouse data', 'error');
     }
   };
 
+  // Requests are split out of every notification page loaded so far
+  useEffect(() => {
+    const allNotifications = requestList.items;
+    
+    const isBranchRequest = (n) => {
+      const transfer = n.related_transfer;
+      if (!transfer) return false;
+    
+      const source = transfer.source_site || transfer.metadata?.source_site;
+      const requested_by = transfer.metadata?.requested_by;
+    
+      if (!source || typeof source.is_warehouse !== 'boolean') {
+        if (requested_by) {
+          console.warn('⚠️ Missing source, but keeping request from:', requested_by);
+          return true; // Allow it if we have user
+        }
+        console.warn('❌ Discarding: no source, no requester');
+        return false;
+      }
+    
+      return source.is_warehouse === false;
+    };
+    
+    
+    
+
+    const pending = allNotifications
+      .filter(n => n.notification_type === 'TRANSFER_REQUEST' && !n.is_read && isBranchRequest(n))
+      .map(n => ({
+        ...n,
+        ...n.related_transfer,
+        metadata: n.related_transfer?.metadata || {},
+      }));
+
+    const processed = allNotifications
+      .filter(n => n.notification_type === 'TRANSFER_REQUEST' && n.is_read && isBranchRequest(n))
+      .map(n => ({
+        ...n,
+        ...n.related_transfer,
+        metadata: n.related_transfer?.metadata || {},
+      }));
+
+    setRequests(pending);
+    setProcessedRequests(
+      processed.map(r => ({
+        ...r,
+        status: r.status || r.transfer_status || r.metadata?.status || 'UNKNOWN'
+      }))
+    );
+  }, [requestList.items]);
+
   const showSnackbar = (message, severity = 'success') => {
     setSnackbar({ open: true, message, severity });
   };
@@ -196,6 +200,13 @@ const WarehouseDashboard = () => {
     );
   }
 
+  const inventory = [...inventoryList.items].sort(
+    (a, b) => new Date(b.last_updated || b.updated_at) - new Date(a.last_updated || a.updated_at)
+  );
+  const movements = [...movementList.items].sort(
+    (a, b) => new Date(b.timestamp || b.created_at) - new Date(a.timestamp || a.created_at)
+  );
+
   const filteredInventory = inventory.filter(item => {
     const matchesSearch = item.product.name.toLowerCase().includes(inventorySearch.toLowerCase());
     const matchesStock =
@@ -279,6 +290,7 @@ const WarehouseDashboard = () => {
               onStockLevelChange={setStockLevelFilter}
             />
             <InventoryTab inventory={filteredInventory} />
+            <LoadMoreButton hasMore={inventoryList.hasMore} loading={inventoryList.loading} onClick={inventoryList.loadMore} />
           </>
         )}
         {tab === 1 && (
@@ -293,6 +305,7 @@ const WarehouseDashboard = () => {
               onDateChange={handleDateChange}
             />
             <MovementsTab movements={filteredMovements} />
+            <LoadMoreButton hasMore={movementList.hasMore} loading={movementList.loading} onClick={movementList.loadMore} />
           </>
         )}
         {tab > 1 && (
@@ -330,6 +343,7 @@ const WarehouseDashboard = () => {
                 statusFilter={statusFilter}
                 setStatusFilter={setStatusFilter}
               />
+              <LoadMoreButton hasMore={requestList.hasMore} loading={requestList.loading} onClick={requestList.loadMore} />
             </Box>
           </>
         )}
@@ -1,10 +1,11 @@
 // src/services/notifications.js
 import axiosInstance from '../utils/axiosInstance';
+import { pageResults } from '../utils/pagination';
 
 export const fetchNotifications = async () => {
   try {
     const response = await axiosInstance.get('v1/notifications/');
-    return response.data;
+    return pageResults(response.data);
   } catch (error) {
     console.error('Error fetching notifications:', error);
     throw error;
@@ -49,4 +50,13 @@ export const createNotification = async (notificationData) => {
     console.error('Error creating notification:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+// Server-sent events stream of new notifications and unread-count changes.
+// EventSource can't send headers, so the access token goes in the query string.
+export const openNotificationStream = () => {
+  const access = localStorage.getItem('access') ? JSON.parse(localStorage.getItem('access')) : null;
+  if (!access || typeof EventSource === 'undefined') return null;
+  return new EventSource(
+    `${axiosInstance.defaults.baseURL}v1/notifications/stream/?token=${encodeURIComponent(access)}`
+  );
+};
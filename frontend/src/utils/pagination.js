@@ -0,0 +1,82 @@
+// pagination.js
+
+import { useCallback, useEffect, useRef, useState } from 'react';
+import axios from './axiosInstance';
+
+// List endpoints return cursor pages: { next, previous, results }
+export const pageResults = (data) => (Array.isArray(data) ? data : data?.results || []);
+
+// A cursor-paginated list loaded one page at a time: the first page when
+// `url` or `params` change (while `enabled`), each further page only when
+// `loadMore` is called
+export const usePagedList = (url, params = {}, enabled = true) => {
+  const [items, setItems] = useState([]);
+  const [next, setNext] = useState(null);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+  const request = useRef(0);
+  const paramsKey = JSON.stringify(params);
+
+  const fetchPage = useCallback(async (pageUrl, append) => {
+    const current = ++request.current;
+    setLoading(true);
+    setError(null);
+    try {
+      const response = await axios.get(pageUrl, append ? {} : { params: JSON.parse(paramsKey) });
+      if (current !== request.current) return; // Superseded by a newer request
+      const results = pageResults(response.data);
+      setItems(prev => (append ? [...prev, ...results] : results));
+      setNext(response.data?.next || null);
+    } catch (err) {
+      if (current === request.current) setError(err);
+    } finally {
+      if (current === request.current) setLoading(false);
+    }
+  }, [paramsKey]);
+
+  const reload = useCallback(() => fetchPage(url, false), [fetchPage, url]);
+
+  const loadMore = useCallback(() => {
+    if (next && !loading) fetchPage(next, true);
+  }, [fetchPage, next, loading]);
+
+  useEffect(() => {
+    if (enabled) reload();
+  }, [reload, enabled]);
+
+  return { items, setItems, hasMore: !!next, loading, error, loadMore, reload };
+};
+
+// Results of a `?q=` search endpoint for `query`, fetched once typing pauses
+export const useSearch = (url, query, params = {}, delay = 250) => {
+  const [results, setResults] = useState([]);
+  const [loading, setLoading] = useState(false);
+  const paramsKey = JSON.stringify(params);
+
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setResults([]);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      setLoading(true);
+      try {
+        const response = await axios.get(url, { params: { ...JSON.parse(paramsKey), q } });
+        if (!cancelled) setResults(response.data?.results || []);
+      } catch (err) {
+        console.error(`Error searching ${url}:`, err);
+        if (!cancelled) setResults([]);
+      } finally {
+        if (!cancelled) setLoading(false);
+      }
+    }, delay);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [url, query, paramsKey, delay]);
+
+  return { results, loading };
+};